@@ -0,0 +1,180 @@
+#coding: utf-8
+"""Benchmarks of the eps-0.1 validation hot path.
+
+Measures, over synthetic articles of increasing size:
+
+  - the compilation of the Schematron validator XSLT, for each phase;
+  - the validation against the full Schematron schema;
+  - the validation against the JATS Publishing 1.1 DTD;
+  - the ``StyleCheckingPipeline``;
+  - the native validator.
+
+For each measure the best wall-clock time of ``--repeat`` runs is reported,
+together with the throughput and the peak resident set size of the process
+so far. As sizes are measured in increasing order, the peak RSS reported for
+a size is the one reached while validating it.
+
+Usage::
+
+    python benchmarks/bench_validation.py
+    python benchmarks/bench_validation.py --json > baseline.json
+    python benchmarks/bench_validation.py --baseline baseline.json
+
+With ``--baseline``, the exit status is 1 if any measure is slower than the
+baseline by more than ``--tolerance``.
+"""
+from __future__ import unicode_literals, division
+import io
+import sys
+import json
+import time
+import argparse
+import resource
+
+from lxml import etree
+
+from erudit_catalog import catalog, checks, corpus, dtd, native, schematron
+
+
+SIZES = [10, 100, 500, 1000]
+
+
+def build_article(size):
+    """A synthetic article with `size` references and citations, and a tenth
+    of it of figures, tables and equations.
+    """
+    tenth = max(size // 10, 1)
+    et = corpus.build_article(refs=size, xrefs=size, figs=tenth, tables=tenth,
+            formulas=tenth, contribs=tenth, affs=tenth)
+    return corpus.tostring(et, catalog['ALLOWED_PUBLIC_IDS'][0])
+
+
+def peak_rss():
+    """Peak resident set size of the process, in MiB.
+    """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere.
+    return maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def bench_compile(repeat):
+    """Compilation of the validator XSLT of each phase, skipping the cache.
+    """
+    schema_path = catalog['SCH_SCHEMAS']['eps-0.1']
+    phases = [None] + list(schematron.schema_phases(schema_path))
+    for phase in phases:
+        seconds = best_of(
+                lambda: schematron.compile_validator_xslt(schema_path, phase),
+                repeat)
+        yield {'name': 'compile', 'phase': phase or '#ALL', 'seconds': seconds}
+
+
+def bench_validation(sizes, repeat):
+    sch = schematron.PrecompiledSchematron(schematron.compile_validator_xslt(
+            catalog['SCH_SCHEMAS']['eps-0.1']))
+    jats = dtd.get_dtd()
+    pipeline = checks.StyleCheckingPipeline()
+    validator = native.NativeValidator()
+
+    measures = [
+        ('schematron', sch.validate),
+        ('dtd', jats.validate),
+        ('pipeline', lambda et: next(pipeline.run(et, rewrap=True))),
+        ('native', validator.validate),
+    ]
+
+    for size in sizes:
+        data = build_article(size)
+        et = etree.parse(io.BytesIO(data))
+        for name, func in measures:
+            seconds = best_of(lambda: func(et), repeat)
+            yield {
+                'name': name,
+                'size': size,
+                'seconds': seconds,
+                'articles_per_second': 1 / seconds,
+                'mib_per_second': len(data) / (1024 ** 2) / seconds,
+                'peak_rss_mib': peak_rss(),
+            }
+
+
+def measure_key(measure):
+    return '%s:%s' % (measure['name'], measure.get('phase', measure.get('size')))
+
+
+def compare(results, baseline, tolerance):
+    """Yields the measures of `results` that are slower than their
+    counterparts in `baseline` by more than `tolerance`.
+    """
+    previous = dict((measure_key(m), m['seconds']) for m in baseline)
+    for measure in results:
+        before = previous.get(measure_key(measure))
+        if before and measure['seconds'] > before * (1 + tolerance):
+            yield measure, before
+
+
+def print_report(results, stream=sys.stdout):
+    for measure in results:
+        if measure['name'] == 'compile':
+            stream.write('%-10s %-32s %8.4fs\n' % (
+                measure['name'], measure['phase'], measure['seconds']))
+        else:
+            stream.write('%-10s size=%-6s %8.4fs %10.1f art/s %8.2f MiB/s %8.1f MiB peak\n' % (
+                measure['name'], measure['size'], measure['seconds'],
+                measure['articles_per_second'], measure['mib_per_second'],
+                measure['peak_rss_mib']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+            help='number of references and citations of each article')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-compile', action='store_true',
+            help='do not measure the compilation of each phase')
+    parser.add_argument('--json', action='store_true',
+            help='write the results as JSON')
+    parser.add_argument('--baseline',
+            help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+            help='accepted slowdown relative to the baseline '
+                 '(default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    results = []
+    if not args.skip_compile:
+        results.extend(bench_compile(args.repeat))
+    results.extend(bench_validation(sorted(args.sizes), args.repeat))
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print_report(results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = list(compare(results, baseline, args.tolerance))
+        for measure, before in regressions:
+            sys.stderr.write('regression: %s took %.4fs (baseline %.4fs)\n' % (
+                measure_key(measure), measure['seconds'], before))
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,10 @@ catalog = {
         'eps-0.1': os.path.join(_CWD, 'erudit-style-0.1.sch'),
     },
 
+    # Directory where compiled Schematron validators (XSLT) are cached.
+    'SCH_CACHE_DIR': os.environ.get('ERUDIT_CATALOG_CACHE_DIR',
+        os.path.join(os.path.expanduser('~'), '.cache', 'erudit_catalog')),
+
     'DTDS': {
         'JATS-journalpublishing1.dtd': os.path.join(
             _CWD, 'jats-publishing-dtd-1.1/JATS-journalpublishing1.dtd'),
@@ -23,13 +27,18 @@ catalog = {
     # XML Catalog - OASIS Standard.
     'XML_CATALOG': os.path.join(_CWD, 'erudit-publishing-schema.xml'),
 
+    # ISO 3166 alpha-2 country codes.
+    'ISO3166_CODES': os.path.join(_CWD, 'iso3166-codes.json'),
+
     'HTML_GEN_XSLTS': {
         'root-html-1.0.xslt': os.path.join(_CWD, 'htmlgenerator/root-html-1.0.xslt'),
     },
 
+    # sources of the static assets, see ``erudit_catalog.assets.bundle_path``
+    # for their built bundles.
     'HTML_GEN_DEFAULT_PRINT_CSS_PATH': os.path.join(_CWD, 'htmlgenerator/static/bundle-print.css'),
     'HTML_GEN_DEFAULT_CSS_PATH': os.path.join(_CWD, 'htmlgenerator/static/article-standalone.css'),
-    'HTML_GEN_DEFAULT_JS_PATH': os.path.join(_CWD, 'htmlgenerator/static/article-standalone-min.js'),
+    'HTML_GEN_DEFAULT_JS_PATH': os.path.join(_CWD, 'htmlgenerator/static/article-standalone.js'),
 
     # As a general rule, only the latest 2 versions are supported simultaneously.
     'CURRENTLY_SUPPORTED_VERSIONS': os.environ.get('PACKTOOLS_SUPPORTED_SPS_VERSIONS', 'eps-0.1').split(':'),
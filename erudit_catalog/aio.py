@@ -0,0 +1,151 @@
+#coding: utf-8
+"""Asyncio API of the validation.
+
+Parsing and validating an article runs lxml for a long time without
+returning to the event loop. :class:`AsyncValidator` offloads these steps
+to a bounded pool of threads, each with its own warm
+:class:`erudit_catalog.validator.Validator`, so that the event loop keeps
+serving other tasks meanwhile. lxml releases the GIL while it parses and
+runs XSLT, so validations in distinct threads overlap.
+
+At most `max_pending` articles are submitted to the pool at once; further
+calls wait for a slot, which applies backpressure to the producers.
+Cancelling a call that is still waiting, or whose article is queued in the
+pool, prevents its validation. Validations already running complete in the
+background, and their results are discarded.
+
+Usage::
+
+    result = await validate_async(xml_bytes, profile='metadata-only')
+"""
+from __future__ import unicode_literals
+import os
+import asyncio
+import logging
+import weakref
+import threading
+from concurrent import futures
+
+from erudit_catalog import validator
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncValidator(object):
+    """Validates articles in a pool of threads, from coroutines.
+
+    :param schema_name: (optional) the schema name in ``catalog['SCH_SCHEMAS']``.
+    :param phase: (optional) the Schematron phase id. All patterns are active
+                  by default.
+    :param profile: (optional) the profile name in
+                    :data:`erudit_catalog.profiles.PROFILES`.
+    :param max_workers: (optional) number of threads. Defaults to the number
+                        of CPUs.
+    :param max_pending: (optional) maximum number of articles submitted to
+                        the pool at once. Defaults to twice `max_workers`.
+    :param cache: (optional) a :class:`erudit_catalog.resultcache.ResultCache`
+                  instance.
+    :param fail_fast: (optional) stop validating each article at its first
+                      error.
+    """
+    def __init__(self, schema_name=validator.DEFAULT_SCHEMA, phase=None,
+            profile=None, max_workers=None, max_pending=None, cache=None,
+            fail_fast=False):
+        if phase is not None and profile is not None:
+            raise ValueError('phase and profile are mutually exclusive')
+
+        self.schema_name = schema_name
+        self.phase = phase
+        self.profile = profile
+        self.cache = cache
+        self.fail_fast = fail_fast
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.max_workers
+
+        self._executor = futures.ThreadPoolExecutor(
+                max_workers=self.max_workers)
+        self._local = threading.local()
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._semaphores_lock = threading.Lock()
+
+    def _validator(self):
+        # runs in the pool threads, that live as long as the pool.
+        try:
+            return self._local.validator
+        except AttributeError:
+            LOGGER.info('building validator for thread "%s"',
+                    threading.current_thread().name)
+            article_validator = self._local.validator = validator.Validator(
+                    self.schema_name, phase=self.phase, profile=self.profile,
+                    cache=self.cache, fail_fast=self.fail_fast)
+            return article_validator
+
+    def _validate_bytes(self, data):
+        return self._validator().validate_bytes(data)
+
+    def _semaphore(self, loop):
+        # asyncio primitives are bound to the loop they are first used in.
+        with self._semaphores_lock:
+            try:
+                return self._semaphores[loop]
+            except KeyError:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(
+                        self.max_pending)
+                return semaphore
+
+    async def validate(self, data):
+        """Validates `data`, the bytes of an article.
+
+        Returns the same dict as
+        :meth:`erudit_catalog.validator.Validator.validate_bytes`.
+        """
+        # the running loop, since Python 3.5.3.
+        loop = asyncio.get_event_loop()
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(self._executor,
+                    self._validate_bytes, data)
+
+    async def validate_many(self, datas):
+        """Validates each of `datas` concurrently.
+
+        Returns the list of results, in the same order as `datas`.
+        """
+        return await asyncio.gather(*[self.validate(data) for data in datas])
+
+    def close(self, wait=True):
+        """Shuts the pool down.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_async_validator(schema_name=validator.DEFAULT_SCHEMA, phase=None,
+        profile=None):
+    """Returns the process-wide :class:`AsyncValidator` for `schema_name` and
+    `phase` or `profile`.
+    """
+    with _VALIDATORS_LOCK:
+        key = (schema_name, phase, profile)
+        if key not in _VALIDATORS:
+            _VALIDATORS[key] = AsyncValidator(schema_name, phase=phase,
+                    profile=profile)
+
+        return _VALIDATORS[key]
+
+
+async def validate_async(data, schema_name=validator.DEFAULT_SCHEMA,
+        phase=None, profile=None):
+    """Validates `data`, the bytes of an article, with the process-wide
+    :class:`AsyncValidator` for `schema_name` and `phase` or `profile`.
+    """
+    return await get_async_validator(schema_name, phase=phase,
+            profile=profile).validate(data)
+
+
+_VALIDATORS = {}
+_VALIDATORS_LOCK = threading.Lock()
@@ -0,0 +1,235 @@
+#coding: utf-8
+"""Build step of the static assets of the HTML generator.
+
+:func:`build` bundles the CSS and JS sources of ``htmlgenerator/static``,
+minifying the CSS ones. It names each bundle after the digest of its
+contents, writes a gzip precompressed variant next to it, and records the
+bundle of each source in a manifest. The catalog points to the sources, and
+:func:`bundle_path` resolves them to their bundles, reading the manifest on
+first use, so that importing the package reads no file. Since the name of a
+bundle changes with its contents, bundles can be served with far-future
+cache headers.
+
+The build runs along with ``setup.py build_py``, or on its own with::
+
+    python -m erudit_catalog.assets
+
+The CSS minifier only removes comments and insignificant whitespace. JS
+sources are bundled as they are: telling regular expression literals from
+divisions takes a full JS parser, so they are only hashed and compressed.
+"""
+from __future__ import unicode_literals
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import hashlib
+import logging
+import argparse
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+_CWD = os.path.dirname(os.path.abspath(__file__))
+
+STATIC_DIR = os.path.join(_CWD, 'htmlgenerator', 'static')
+
+BUILD_DIRNAME = 'dist'
+
+MANIFEST_NAME = 'manifest.json'
+
+# the sources bundled by :func:`build`, relative to the static directory.
+SOURCES = (
+    'article-standalone.css',
+    'bundle-print.css',
+    'article-standalone.js',
+)
+
+# length of the digests in the names of the bundles.
+DIGEST_LENGTH = 12
+
+_CSS_TOKENS_REGEX = re.compile(r'''
+    (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<comment>/\*.*?\*/)
+  | (?P<space>\s+)
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+# whitespace around these characters is not significant in CSS. Whitespace
+# before colons is, as in ``div :first-child``.
+_CSS_PUNCTUATION = '{};,>'
+
+def minify_css(text):
+    """Removes the comments and the insignificant whitespace of the CSS
+    `text`.
+    """
+    parts = []
+    pending_space = False
+    for match in _CSS_TOKENS_REGEX.finditer(text):
+        kind = match.lastgroup
+        if kind in ('space', 'comment'):
+            pending_space = True
+            continue
+
+        token = match.group(0)
+        if pending_space and parts and not (token in _CSS_PUNCTUATION or
+                parts[-1] in _CSS_PUNCTUATION + ':'):
+            parts.append(' ')
+        pending_space = False
+
+        if token == '}' and parts and parts[-1] == ';':
+            parts.pop()
+        parts.append(token)
+
+    return ''.join(parts)
+
+
+# maps the extensions of the sources to their minifiers, or ``None`` if
+# they are bundled as they are.
+_MINIFIERS = {
+    '.css': minify_css,
+    '.js': None,
+}
+
+
+def digest(data):
+    """The hex digest of `data` used in the names of the bundles.
+    """
+    return hashlib.sha256(data).hexdigest()[:DIGEST_LENGTH]
+
+
+def bundle_name(source_name, data, minified=True):
+    """The name of the bundle of `source_name` whose contents are `data`,
+    e.g. ``article-standalone.0123456789ab.min.css``.
+    """
+    root, ext = os.path.splitext(source_name)
+    return '%s.%s%s%s' % (root, digest(data), '.min' if minified else '', ext)
+
+
+def gzip_bytes(data):
+    """Compresses `data`, with a zeroed timestamp so that builds are
+    reproducible.
+    """
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(data)
+
+    return buf.getvalue()
+
+
+def _write(filepath, data):
+    with open(filepath, 'wb') as f:
+        f.write(data)
+
+
+def build(static_dir=STATIC_DIR, sources=SOURCES):
+    """Builds the bundles of `sources` into the ``dist`` directory of
+    `static_dir`, and writes its manifest.
+
+    Bundles of earlier builds are removed. Returns the manifest: a dict
+    mapping the name of each source to the path of its bundle, relative to
+    `static_dir`.
+    """
+    build_dir = os.path.join(static_dir, BUILD_DIRNAME)
+    if not os.path.isdir(build_dir):
+        os.makedirs(build_dir)
+
+    manifest = {}
+    for source_name in sources:
+        try:
+            minify = _MINIFIERS[os.path.splitext(source_name)[1]]
+        except KeyError:
+            raise ValueError('unrecognized asset type: "%s"' % source_name)
+
+        source_path = os.path.join(static_dir, source_name)
+        if minify is None:
+            with open(source_path, 'rb') as f:
+                data = f.read()
+        else:
+            with io.open(source_path, encoding='utf-8') as f:
+                data = minify(f.read()).encode('utf-8')
+
+        name = bundle_name(source_name, data, minified=minify is not None)
+        _write(os.path.join(build_dir, name), data)
+        _write(os.path.join(build_dir, name + '.gz'), gzip_bytes(data))
+        manifest[source_name] = '%s/%s' % (BUILD_DIRNAME, name)
+        LOGGER.info('bundled "%s" as "%s"', source_name, name)
+
+    bundles = set(os.path.basename(path) for path in manifest.values())
+    for filename in os.listdir(build_dir):
+        if (filename != MANIFEST_NAME and
+                filename not in bundles and filename[:-3] not in bundles):
+            os.unlink(os.path.join(build_dir, filename))
+
+    _write(os.path.join(build_dir, MANIFEST_NAME), json.dumps(manifest,
+        indent=2, sort_keys=True).encode('utf-8'))
+    with _MANIFESTS_LOCK:
+        _MANIFESTS.pop(static_dir, None)
+    return manifest
+
+
+def read_manifest(static_dir=STATIC_DIR):
+    """Returns the manifest of the last build in `static_dir`, or an empty
+    dict if the assets were not built.
+    """
+    try:
+        with io.open(os.path.join(static_dir, BUILD_DIRNAME, MANIFEST_NAME),
+                encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, OSError):
+        return {}
+
+
+def _cached_manifest(static_dir):
+    with _MANIFESTS_LOCK:
+        if static_dir not in _MANIFESTS:
+            _MANIFESTS[static_dir] = read_manifest(static_dir)
+
+        return _MANIFESTS[static_dir]
+
+
+def static_path(source_name, static_dir=STATIC_DIR, manifest=None):
+    """The path of the bundle of `source_name`, or of the source itself if
+    it was not built.
+
+    :param manifest: (optional) defaults to the manifest of `static_dir`,
+                     read once.
+    """
+    if manifest is None:
+        manifest = _cached_manifest(static_dir)
+
+    return os.path.join(static_dir, manifest.get(source_name, source_name))
+
+
+def bundle_path(path, static_dir=STATIC_DIR):
+    """The path of the bundle of the source at `path`, e.g.
+    ``catalog['HTML_GEN_DEFAULT_CSS_PATH']``, or `path` itself if it is not a
+    built source of `static_dir`.
+    """
+    if os.path.dirname(os.path.abspath(path)) != os.path.abspath(static_dir):
+        return path
+
+    return static_path(os.path.basename(path), static_dir)
+
+
+_MANIFESTS = {}
+_MANIFESTS_LOCK = threading.Lock()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Build the static assets of the HTML generator.')
+    parser.add_argument('--static-dir', default=STATIC_DIR,
+            help='directory of the sources (default: %(default)s)')
+    parser.add_argument('--loglevel', default='INFO')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper()))
+    build(args.static_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,16 +3,45 @@ from __future__ import unicode_literals
 import logging
 import itertools
 import json
+import collections.abc
 
 import plumber
+from lxml import etree
 
-from packtools.style_errors import StyleError
-from packtools.catalogs import catalog
+from erudit_catalog import catalog
+from erudit_catalog.errors import ErrorRecord, to_style_errors
 
 LOGGER = logging.getLogger(__name__)
 
-with open(catalog.ISO3166_CODES) as f:
-    ISO3166_CODES_SET = set(json.load(f))
+
+def iso3166_codes():
+    """The set of ISO 3166 alpha-2 codes, loaded on first use.
+    """
+    global _ISO3166_CODES
+    if _ISO3166_CODES is None:
+        with open(catalog['ISO3166_CODES']) as f:
+            _ISO3166_CODES = frozenset(json.load(f))
+
+    return _ISO3166_CODES
+
+
+_ISO3166_CODES = None
+
+
+class _ISO3166CodesSet(collections.abc.Set):
+    """Read-only set of the ISO 3166 alpha-2 codes, loaded on first use.
+    """
+    def __contains__(self, code):
+        return code in iso3166_codes()
+
+    def __iter__(self):
+        return iter(iso3166_codes())
+
+    def __len__(self):
+        return len(iso3166_codes())
+
+
+ISO3166_CODES_SET = _ISO3166CodesSet()
 
 
 # --------------------------------
@@ -37,21 +66,48 @@ def teardown(message):
     return err_list
 
 
+@plumber.filter
+def as_style_errors(err_list):
+    """Convert the error records to packtools' style errors.
+    """
+    return to_style_errors(err_list)
+
+
 def StyleCheckingPipeline():
     """Factory for style checking pipelines.
     """
+    return plumber.Pipeline(setup, doctype, country_code, teardown,
+            as_style_errors)
+
+
+def StyleCheckingRecordsPipeline():
+    """Factory for style checking pipelines returning
+    :class:`erudit_catalog.errors.ErrorRecord` instances instead of
+    packtools' style errors.
+    """
     return plumber.Pipeline(setup, doctype, country_code, teardown)
 
 
+def StreamingStyleCheckingPipeline():
+    """Factory for style checking pipelines that consume the document as a
+    stream of ``etree.iterparse`` events.
+
+    The input message is a filename or file-like object instead of an `etree`.
+    Processed subtrees are discarded as the parsing goes, so the memory
+    footprint does not depend on the size of the document.
+    """
+    return plumber.Pipeline(setup, streaming_checks, teardown,
+            as_style_errors)
+
+
 @plumber.filter
 def doctype(message):
     """Make sure the DOCTYPE declaration is present.
     """
     et, err_list = message
 
-    if not et.docinfo.doctype:
-        err = StyleError()
-        err.message = "Missing DOCTYPE declaration."
+    err = _check_doctype(et)
+    if err is not None:
         err_list.append(err)
 
     return message
@@ -63,13 +119,78 @@ def country_code(message):
     """
     et, err_list = message
 
-    elements = et.findall('//*[@country]')
-    for elem in elements:
-        value = elem.attrib['country']
-        if value not in ISO3166_CODES_SET:
-            err = StyleError()
-            err.line = elem.sourceline
-            err.message = "Element '%s', attribute country: Invalid country code \"%s\"." % (elem.tag, value)
+    for elem in _country_elements(et):
+        err = _check_country_code(elem)
+        if err is not None:
             err_list.append(err)
 
     return message
+
+
+def _check_doctype(et):
+    if not et.docinfo.doctype:
+        return ErrorRecord("Missing DOCTYPE declaration.")
+
+
+def _country_elements(et):
+    # every element, the root included, as the streaming checks see them.
+    return (elem for elem in et.iter(etree.Element)
+            if elem.get('country') is not None)
+
+
+def _check_country_code(elem):
+    value = elem.get('country')
+    if value is not None and value not in ISO3166_CODES_SET:
+        return ErrorRecord(
+                "Element '%s', attribute country: Invalid country code \"%s\".",
+                (elem.tag, value), line=elem.sourceline)
+
+
+def first_style_error(et):
+    """Runs the checks of `StyleCheckingPipeline` on `et`, cheapest first,
+    and returns the record of the first error found, or ``None``.
+    """
+    err = _check_doctype(et)
+    if err is not None:
+        return err
+
+    for elem in _country_elements(et):
+        err = _check_country_code(elem)
+        if err is not None:
+            return err
+
+
+# --------------------------------
+# Streaming functionality
+# --------------------------------
+@plumber.filter
+def streaming_checks(message):
+    """Run the checks of `doctype` and `country_code` while the document is
+    parsed.
+
+    Elements are checked as their start tags arrive, and cleared, together
+    with their preceding siblings, once their end tags are consumed.
+    """
+    source, err_list = message
+
+    events = etree.iterparse(source, events=('start', 'end'))
+    is_root = True
+    for event, elem in events:
+        if event == 'start':
+            if is_root:
+                is_root = False
+                err = _check_doctype(elem.getroottree())
+                if err is not None:
+                    err_list.append(err)
+
+            err = _check_country_code(elem)
+            if err is not None:
+                err_list.append(err)
+
+        else:
+            elem.clear()
+            while (elem.getprevious() is not None and
+                    elem.getparent() is not None):
+                del elem.getparent()[0]
+
+    return message
@@ -0,0 +1,134 @@
+#coding: utf-8
+"""Command line utilities.
+
+``erudit-validate`` validates batches of articles, given as files,
+directories or glob patterns, and writes one JSON object per file to the
+standard output as soon as its result is available.
+"""
+from __future__ import unicode_literals
+import os
+import sys
+import glob
+import json
+import fnmatch
+import logging
+import itertools
+import argparse
+from concurrent import futures
+
+from erudit_catalog import catalog, profiles, resultcache, validator
+
+LOGGER = logging.getLogger(__name__)
+
+
+def iter_filenames(paths, pattern='*.xml'):
+    """Expands `paths` to the files they refer to.
+
+    Each path may be a file, a directory, whose files matching `pattern` are
+    searched recursively, or a glob pattern.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(fnmatch.filter(filenames, pattern)):
+                    yield os.path.join(dirpath, filename)
+
+        elif glob.has_magic(path):
+            for filename in sorted(glob.glob(path, recursive=True)):
+                if os.path.isfile(filename):
+                    yield filename
+
+        else:
+            yield path
+
+
+# the validator of the current process, built by its first task, so that
+# pool workers pay for compiling the schemas only once.
+_VALIDATOR = None
+_VALIDATOR_ARGS = None
+
+
+def _validate_file(filename, schema_name=validator.DEFAULT_SCHEMA,
+        cache_path=None, profile=None, fail_fast=False):
+    global _VALIDATOR, _VALIDATOR_ARGS
+    if _VALIDATOR_ARGS != (schema_name, cache_path, profile, fail_fast):
+        cache = resultcache.ResultCache(cache_path) if cache_path else None
+        _VALIDATOR = validator.Validator(schema_name, profile=profile,
+                cache=cache, fail_fast=fail_fast)
+        _VALIDATOR_ARGS = (schema_name, cache_path, profile, fail_fast)
+
+    return _VALIDATOR.validate_file(filename)
+
+
+def validate_files(filenames, schema_name=validator.DEFAULT_SCHEMA,
+        max_workers=None, chunksize=4, cache_path=None, profile=None,
+        fail_fast=False):
+    """Validates `filenames` in a pool of `max_workers` processes.
+
+    Returns an iterator of results, as produced by
+    :meth:`erudit_catalog.validator.Validator.validate_file`, in the same
+    order as `filenames`. With ``max_workers=1`` files are validated in the
+    current process. Results are cached at `cache_path`, a SQLite database,
+    if given. Only the patterns of `profile` are run, if given, and the
+    validation of each file stops at its first error if `fail_fast` is true.
+    """
+    if max_workers == 1:
+        for filename in filenames:
+            yield _validate_file(filename, schema_name, cache_path, profile,
+                    fail_fast)
+        return
+
+    with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(_validate_file, filenames,
+                itertools.repeat(schema_name),
+                itertools.repeat(cache_path),
+                itertools.repeat(profile),
+                itertools.repeat(fail_fast), chunksize=chunksize)
+        for result in results:
+            yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Validate articles against the Érudit Publishing '
+                        'Schema. Results are written as JSON lines.')
+    parser.add_argument('paths', nargs='+',
+            help='files, directories or glob patterns')
+    parser.add_argument('--pattern', default='*.xml',
+            help='file name pattern used to search directories '
+                 '(default: %(default)s)')
+    parser.add_argument('--schema', default=validator.DEFAULT_SCHEMA,
+            help='the schema used for style validation '
+                 '(default: %(default)s)')
+    parser.add_argument('--profile', choices=list(profiles.PROFILES),
+            default=None, help='validate only the patterns of a profile '
+                               '(default: all patterns)')
+    parser.add_argument('--fail-fast', action='store_true',
+            help='stop validating each file at its first error')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+            help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--cache', nargs='?', metavar='PATH',
+            const=os.path.join(catalog['SCH_CACHE_DIR'], 'results.sqlite'),
+            help='reuse the results of unchanged articles, stored at PATH '
+                 '(default: %(const)s)')
+    parser.add_argument('--loglevel', default='WARNING')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper()))
+
+    filenames = list(iter_filenames(args.paths, pattern=args.pattern))
+    LOGGER.info('validating %s files', len(filenames))
+
+    all_valid = True
+    for result in validate_files(filenames, schema_name=args.schema,
+            max_workers=args.jobs, cache_path=args.cache,
+            profile=args.profile, fail_fast=args.fail_fast):
+        all_valid = all_valid and result['is_valid']
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+
+    return 0 if all_valid else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,359 @@
+#coding: utf-8
+"""Synthetic eps-0.1 articles for benchmarks and load tests.
+
+:func:`build_article` produces an article with the given numbers of
+references, citations, figures, tables, contributors, affiliations and
+equations, and consistent ``<counts>``. The article is valid against the
+eps-0.1 style rules and the JATS Publishing 1.1 DTD unless defects, from
+:data:`DEFECTS`, are introduced on purpose. Everything that varies between
+articles is drawn from a ``random.Random`` seeded by the caller, so a corpus
+is reproduced exactly by the same parameters.
+
+A corpus can be written to disk with::
+
+    python -m erudit_catalog.corpus /tmp/corpus --count 100 --refs 50
+"""
+from __future__ import unicode_literals
+import os
+import sys
+import random
+import logging
+import argparse
+import collections
+
+from lxml import etree
+from lxml.builder import E
+
+from erudit_catalog import catalog
+
+LOGGER = logging.getLogger(__name__)
+
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+XML_NS = 'http://www.w3.org/XML/1998/namespace'
+
+SYSTEM_IDS = {
+    '-//NLM//DTD JATS (Z39.96) Journal Publishing DTD v1.1 20151215//EN':
+        'JATS-journalpublishing1.dtd',
+}
+
+SURNAMES = ['Tremblay', 'Gagnon', 'Roy', 'Côté', 'Bouchard', 'Gauthier',
+            'Morin', 'Lavoie', 'Fortin', 'Gagné', 'Ouellet', 'Pelletier']
+GIVEN_NAMES = ['Marie', 'Jean', 'Louise', 'Pierre', 'Anne', 'Michel',
+               'Sophie', 'François', 'Julie', 'André']
+INSTITUTIONS = ['Université de Montréal', 'Université Laval',
+                'Université du Québec à Montréal', 'McGill University',
+                'Université de Sherbrooke', 'Concordia University']
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur',
+         'adipiscing', 'elit', 'sed', 'do', 'eiusmod', 'tempor',
+         'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna', 'aliqua']
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def _attrs(**kwargs):
+    """Attributes dict where `_` stands for `-` in names, and `xml_` and
+    `xlink_` prefixes for the namespaces.
+
+    Attributes are ordered by name, since the order of keyword arguments is
+    not preserved before Python 3.6, so that articles serialize to the same
+    bytes in every process.
+    """
+    attrs = collections.OrderedDict()
+    for name, value in sorted(kwargs.items()):
+        if name.startswith('xml_'):
+            name = '{%s}%s' % (XML_NS, name[4:])
+        elif name.startswith('xlink_'):
+            name = '{%s}%s' % (XLINK_NS, name[6:])
+        attrs[name.replace('_', '-')] = str(value)
+    return attrs
+
+
+def _journal_meta(rng):
+    return E('journal-meta',
+        E('journal-id', _attrs(journal_id_type='erudit'), 'foo%s' % rng.randint(1, 99)),
+        E('journal-title-group', E('journal-title', _words(rng, 3).title())),
+        E('issn', _attrs(pub_type='epub'), '%04d-%04d' % (
+            rng.randint(0, 9999), rng.randint(0, 9999))),
+        E('publisher', E('publisher-name', 'Érudit')),
+    )
+
+
+def _article_meta(rng, contribs, affs, pages, counts):
+    contrib_group = E('contrib-group', _attrs(content_type='author'))
+    for i in range(contribs):
+        contrib = E('contrib', _attrs(contrib_type='person'),
+            E('name',
+                E('surname', rng.choice(SURNAMES)),
+                E('given-names', rng.choice(GIVEN_NAMES))),
+        )
+        if affs:
+            contrib.append(E('xref', _attrs(ref_type='aff',
+                rid='aff%s' % (i % affs + 1))))
+        contrib_group.append(contrib)
+
+    meta = E('article-meta',
+        E('article-id', _attrs(pub_id_type='doi'),
+            '10.7202/%07dar' % rng.randint(0, 9999999)),
+        E('title-group', E('article-title', _words(rng, 6).capitalize())),
+    )
+    # empty contrib-groups are not valid against the DTD.
+    if contribs:
+        meta.append(contrib_group)
+    for i in range(affs):
+        meta.append(E('aff', _attrs(id='aff%s' % (i + 1)),
+            E('institution', _attrs(content_type='orgname'),
+                rng.choice(INSTITUTIONS))))
+
+    year = str(rng.randint(1990, 2018))
+    meta.extend([
+        E('pub-date', _attrs(date_type='pub', publication_format='epub'),
+            E('day', str(rng.randint(1, 28))),
+            E('month', str(rng.randint(1, 12))),
+            E('year', year)),
+        E('pub-date', _attrs(date_type='collection'), E('year', year)),
+        E('fpage', '1'),
+        E('lpage', str(pages)),
+        E('permissions'),
+        E('abstract', _attrs(xml_lang='fr'), E('p', _words(rng, 40))),
+        E('counts',
+            E('fig-count', _attrs(count=counts['fig'])),
+            E('table-count', _attrs(count=counts['table-wrap'])),
+            E('equation-count', _attrs(count=counts['disp-formula'])),
+            E('ref-count', _attrs(count=counts['ref'])),
+            E('page-count', _attrs(count=pages))),
+    ])
+    return meta
+
+
+def _body(rng, refs, xrefs, figs, tables, formulas):
+    sec = E('sec', _attrs(id='s1'), E('label', '1'),
+            E('title', _words(rng, 4).capitalize()))
+
+    # citations are spread over the paragraphs, around 5 per paragraph.
+    paragraphs = max(xrefs // 5, 1)
+    targets = [rng.randint(1, refs) for _ in range(xrefs)] if refs else []
+    for i in range(paragraphs):
+        p = E('p', _words(rng, 20))
+        for rid in targets[i::paragraphs]:
+            xref = E('xref', _attrs(ref_type='bibr', rid='B%s' % rid), str(rid))
+            xref.tail = ' ' + _words(rng, 5)
+            p.append(xref)
+        sec.append(p)
+
+    for i in range(1, figs + 1):
+        sec.append(E('p', _words(rng, 5) + ' ',
+            E('xref', _attrs(ref_type='fig', rid='f%s' % i), 'Figure %s' % i)))
+        sec.append(E('fig', _attrs(id='f%s' % i),
+            E('label', 'Figure %s' % i),
+            E('caption', E('title', _words(rng, 5).capitalize())),
+            E('graphic', _attrs(xlink_href='f%s.png' % i))))
+
+    for i in range(1, tables + 1):
+        sec.append(E('p', _words(rng, 5) + ' ',
+            E('xref', _attrs(ref_type='table', rid='t%s' % i), 'Tableau %s' % i)))
+        sec.append(E('table-wrap', _attrs(id='t%s' % i),
+            E('label', 'Tableau %s' % i),
+            E('table',
+                E('thead', E('tr', E('th', 'A'), E('th', 'B'))),
+                E('tbody', *[E('tr', E('td', str(rng.randint(0, 999))),
+                                     E('td', str(rng.randint(0, 999))))
+                             for _ in range(3)]))))
+
+    for i in range(1, formulas + 1):
+        sec.append(E('disp-formula', _attrs(id='e%s' % i),
+            E('label', '(%s)' % i),
+            E('tex-math', 'x_{%s} = %s' % (i, rng.randint(0, 99)))))
+
+    return E('body', sec)
+
+
+def _back(rng, refs):
+    ref_list = E('ref-list')
+    for i in range(1, refs + 1):
+        citation = E('element-citation', _attrs(publication_type='journal'),
+            E('styled-content', '%s, %s (%s). %s.' % (
+                rng.choice(SURNAMES), rng.choice(GIVEN_NAMES)[0],
+                rng.randint(1950, 2018), _words(rng, 8).capitalize())),
+            E('pub-id', _attrs(pub_id_type='doi'),
+                '10.%04d/%s' % (rng.randint(1000, 9999), rng.randint(0, 99999))))
+        ref_list.append(E('ref', _attrs(id='B%s' % i), citation))
+
+    return E('back', ref_list)
+
+
+#----------------------------------
+# defects
+#
+# each defect breaks one of the
+# style rules of an article.
+#----------------------------------
+def _first(root, path):
+    elem = root.find(path)
+    if elem is None:
+        raise ValueError('cannot introduce defect: missing "%s"' % path)
+    return elem
+
+
+def _wrong_ref_count(root):
+    count = _first(root, 'front/article-meta/counts/ref-count')
+    count.set('count', str(int(count.get('count')) + 1))
+
+
+def _dangling_xref(root):
+    _first(root, './/xref[@ref-type="bibr"]').set('rid', 'B0')
+
+
+def _fig_without_id(root):
+    fig = _first(root, './/fig')
+    del fig.attrib['id']
+
+
+def _table_wrap_without_id(root):
+    table_wrap = _first(root, './/table-wrap')
+    del table_wrap.attrib['id']
+
+
+def _invalid_contrib_type(root):
+    _first(root, 'front/article-meta/contrib-group/contrib').set(
+            'contrib-type', 'foo')
+
+
+def _aff_without_orgname(root):
+    _first(root, 'front/article-meta/aff/institution').set(
+            'content-type', 'orgdiv1')
+
+
+def _invalid_doi(root):
+    doi = _first(root, 'front/article-meta/article-id[@pub-id-type="doi"]')
+    doi.text = 'doi:' + doi.text
+
+
+def _invalid_issn(root):
+    _first(root, 'front/journal-meta/issn').text = '123-45678'
+
+
+def _invalid_month(root):
+    _first(root, 'front/article-meta/pub-date/month').text = '13'
+
+
+DEFECTS = collections.OrderedDict([
+    ('wrong-ref-count', _wrong_ref_count),
+    ('dangling-xref', _dangling_xref),
+    ('fig-without-id', _fig_without_id),
+    ('table-wrap-without-id', _table_wrap_without_id),
+    ('invalid-contrib-type', _invalid_contrib_type),
+    ('aff-without-orgname', _aff_without_orgname),
+    ('invalid-doi', _invalid_doi),
+    ('invalid-issn', _invalid_issn),
+    ('invalid-month', _invalid_month),
+])
+
+
+def build_article(refs=20, xrefs=None, figs=2, tables=2, contribs=2, affs=1,
+        formulas=1, pages=10, defects=(), seed=0):
+    """Returns a synthetic article as an ``etree._ElementTree``.
+
+    :param refs: number of references.
+    :param xrefs: (optional) number of citations of references. Defaults to
+                  `refs`.
+    :param figs: number of figures.
+    :param tables: number of tables.
+    :param contribs: number of contributors.
+    :param affs: number of affiliations.
+    :param formulas: number of equations.
+    :param pages: number of pages.
+    :param defects: names in :data:`DEFECTS` to be introduced.
+    :param seed: seed of the pseudo-random generator.
+    """
+    rng = random.Random(seed)
+    if xrefs is None:
+        xrefs = refs
+
+    counts = {'ref': refs, 'fig': figs, 'table-wrap': tables,
+              'disp-formula': formulas}
+    root = etree.Element('article', _attrs(
+                article_type='research-article', dtd_version='1.1',
+                specific_use='eps-0.1', xml_lang='fr'),
+            nsmap={'xlink': XLINK_NS})
+    root.extend([
+        E('front', _journal_meta(rng),
+            _article_meta(rng, contribs, affs, pages, counts)),
+        _body(rng, refs, xrefs, figs, tables, formulas),
+        _back(rng, refs),
+    ])
+    etree.cleanup_namespaces(root, top_nsmap={'xlink': XLINK_NS})
+
+    for defect in defects:
+        try:
+            DEFECTS[defect](root)
+        except KeyError:
+            raise ValueError('unrecognized defect: "%s"' % defect)
+
+    return etree.ElementTree(root)
+
+
+def tostring(xmlfile, public_id=None):
+    """Serializes `xmlfile` with the DOCTYPE of `public_id`, or without
+    DOCTYPE if `public_id` is ``None``.
+    """
+    doctype = None
+    if public_id is not None:
+        doctype = '<!DOCTYPE article PUBLIC "%s" "%s">' % (
+                public_id, SYSTEM_IDS[public_id])
+
+    return etree.tostring(xmlfile, doctype=doctype, xml_declaration=True,
+            encoding='utf-8', pretty_print=True)
+
+
+def generate(count, invalid_ratio=0.0, seed=0, **sizes):
+    """Yields `count` tuples of ``(name, defects, data)``, where `data` is a
+    serialized article.
+
+    Articles are invalid with probability `invalid_ratio`, presenting one of
+    :data:`DEFECTS`. `sizes` are passed to :func:`build_article`.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        defects = ()
+        if rng.random() < invalid_ratio:
+            defects = (rng.choice(list(DEFECTS)),)
+
+        et = build_article(defects=defects, seed=rng.getrandbits(32), **sizes)
+        public_id = rng.choice(catalog['ALLOWED_PUBLIC_IDS'])
+        yield 'article-%05d.xml' % i, defects, tostring(et, public_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Generate a corpus of synthetic eps-0.1 articles.')
+    parser.add_argument('directory')
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--invalid-ratio', type=float, default=0.0,
+            help='probability of an article presenting a defect')
+    for name, default in [('refs', 20), ('xrefs', None), ('figs', 2),
+                          ('tables', 2), ('contribs', 2), ('affs', 1),
+                          ('formulas', 1), ('pages', 10)]:
+        parser.add_argument('--' + name, type=int, default=default)
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        os.makedirs(args.directory)
+
+    sizes = dict(refs=args.refs, xrefs=args.xrefs, figs=args.figs,
+                 tables=args.tables, contribs=args.contribs, affs=args.affs,
+                 formulas=args.formulas, pages=args.pages)
+    for name, defects, data in generate(args.count, seed=args.seed,
+            invalid_ratio=args.invalid_ratio, **sizes):
+        with open(os.path.join(args.directory, name), 'wb') as f:
+            f.write(data)
+        if defects:
+            LOGGER.info('%s: %s', name, ', '.join(defects))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
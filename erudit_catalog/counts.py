@@ -0,0 +1,193 @@
+#coding: utf-8
+"""One-pass verification of ``article-meta/counts``.
+
+The Python counterpart of the ``phase.counts`` patterns of eps-0.1: the
+elements accounted in ``<counts>`` (tables, references, figures and
+equations), the declared counts and the page range are all collected in a
+single pass, either over a parsed tree or streaming over a file with
+``etree.iterparse``, and then checked once.
+"""
+from __future__ import unicode_literals
+import re
+import logging
+import collections
+
+from lxml import etree
+
+from packtools.style_errors import StyleError
+
+LOGGER = logging.getLogger(__name__)
+
+# maps the elements of article-meta/counts to the element they account for.
+COUNTED_ELEMENTS = collections.OrderedDict([
+    ('table-count', 'table-wrap'),
+    ('ref-count', 'ref'),
+    ('fig-count', 'fig'),
+    ('equation-count', 'disp-formula'),
+])
+
+PAGE_ELEMENTS = ('fpage', 'lpage', 'elocation-id')
+
+_COUNTS_PATH = ('article', 'front', 'article-meta', 'counts')
+_ARTICLE_META_PATH = ('article', 'front', 'article-meta')
+_XPATH_NUMBER = re.compile(r'^[ \t\r\n]*(-?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+))[ \t\r\n]*$')
+
+
+def xpath_number(value):
+    """XPath 1.0 ``number()`` of a string, where invalid values are NaN.
+    """
+    match = _XPATH_NUMBER.match(value or '')
+    if match is None:
+        return float('nan')
+    return float(match.group(1))
+
+
+def page_count_is_valid(count, fpages, lpages, elocation_ids):
+    """The test of the pattern ``counts_pages``.
+
+    :param count: the value of ``page-count/@count``.
+    :param fpages: string values of ``/article/front/article-meta/fpage``.
+    :param lpages: string values of ``/article/front/article-meta/lpage``.
+    :param elocation_ids: string values of
+                          ``/article/front/article-meta/elocation-id``.
+    """
+    count = xpath_number(count)
+    if (any(xpath_number(lpage) == 0 for lpage in lpages) and
+            any(xpath_number(fpage) == 0 for fpage in fpages) and count == 0):
+        return True
+
+    fpage = fpages[0] if fpages else ''
+    lpage = lpages[0] if lpages else ''
+    if re.search(r'\D', fpage, re.I) or re.search(r'\D', lpage, re.I):
+        return True
+
+    if elocation_ids and len(elocation_ids[0]) > 0:
+        return True
+
+    return count == (xpath_number(lpage) - xpath_number(fpage)) + 1
+
+
+class Tally(object):
+    """The facts collected by :func:`tally`.
+
+    :attr elements: number of occurrences of each counted element.
+    :attr declared: list of ``(tag, count, line)`` for each element in
+                    ``article/front/article-meta/counts``.
+    :attr pages: mapping of ``fpage``, ``lpage`` and ``elocation-id`` to the
+                 string values of ``/article/front/article-meta/*``.
+    """
+    def __init__(self):
+        self.elements = collections.Counter()
+        self.declared = []
+        self.pages = dict((tag, []) for tag in PAGE_ELEMENTS)
+
+    def _add(self, elem, path):
+        """`path` is the tuple of tag names from the root up to `elem`.
+        """
+        tag = elem.tag
+        if tag in COUNTED_ELEMENTS.values():
+            self.elements[tag] += 1
+
+        if ((tag in COUNTED_ELEMENTS or tag == 'page-count') and
+                path[-5:-1] == _COUNTS_PATH):
+            self.declared.append((tag, elem.get('count'), elem.sourceline))
+
+        elif tag in PAGE_ELEMENTS and path[:-1] == _ARTICLE_META_PATH:
+            self.pages[tag].append(''.join(elem.itertext()))
+
+
+def _tally_tree(root):
+    result = Tally()
+    interesting = (set(COUNTED_ELEMENTS) | set(COUNTED_ELEMENTS.values()) |
+                   set(PAGE_ELEMENTS) | set(['page-count']))
+    for elem in root.iter(*interesting):
+        path = [elem.tag] + [ancestor.tag for ancestor in elem.iterancestors()]
+        result._add(elem, tuple(reversed(path)))
+
+    return result
+
+
+def _tally_stream(source):
+    result = Tally()
+    path = []
+    for event, elem in etree.iterparse(source, events=('start', 'end'),
+                                       remove_comments=True):
+        if event == 'start':
+            path.append(elem.tag)
+            continue
+
+        result._add(elem, tuple(path))
+        path.pop()
+
+        # only the page elements need their subtrees, and they are done.
+        elem.clear()
+        while (elem.getprevious() is not None and
+                elem.getparent() is not None):
+            del elem.getparent()[0]
+
+    return result
+
+
+def tally(source):
+    """Collects the facts needed to verify the counts in a single pass.
+
+    :param source: ``etree._ElementTree``, element, or anything accepted by
+                   ``etree.iterparse``, in which case the document is
+                   processed as a stream and never fully built in memory.
+    """
+    if isinstance(source, etree._ElementTree):
+        return _tally_tree(source.getroot())
+    elif etree.iselement(source):
+        return _tally_tree(source)
+    else:
+        return _tally_stream(source)
+
+
+def iter_failures(facts):
+    """Yields ``(tag, line, message)`` for each wrong value in `facts`, a
+    :class:`Tally` instance.
+    """
+    for tag, count, line in facts.declared:
+        if tag == 'page-count':
+            is_valid = page_count_is_valid(count, facts.pages['fpage'],
+                    facts.pages['lpage'], facts.pages['elocation-id'])
+        else:
+            expected = facts.elements[COUNTED_ELEMENTS[tag]]
+            is_valid = xpath_number(count) == expected
+
+        if not is_valid:
+            yield tag, line, "Element '%s': Wrong value in %s." % (tag, tag)
+
+
+def check_counts(source):
+    """Verifies the values of ``article-meta/counts`` in `source`.
+
+    Returns the list of ``(tag, line, message)`` for each wrong value.
+    See :func:`tally` for the accepted values of `source`.
+    """
+    return list(iter_failures(tally(source)))
+
+
+class CountsValidator(object):
+    """Implements the protocol of packtools' validators for the
+    ``phase.counts`` rules.
+
+    :param label: (optional) the label set on each error.
+    """
+    def __init__(self, label=''):
+        self.label = label
+
+    def validate(self, xmlfile):
+        """Validate the counts of xmlfile.
+
+        Returns a tuple comprising the validation status and the errors list.
+        """
+        errors = []
+        for _, line, message in check_counts(xmlfile):
+            err = StyleError()
+            err.line = line
+            err.message = message
+            err.label = self.label
+            errors.append(err)
+
+        return not errors, errors
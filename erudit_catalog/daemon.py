@@ -0,0 +1,230 @@
+#coding: utf-8
+"""Local validation daemon and its client.
+
+The daemon is an HTTP server bound to the loopback interface by default,
+that keeps a pool of warm :class:`erudit_catalog.validator.Validator`
+instances and validates the articles posted to it::
+
+    POST /validate      the article bytes as the request body.
+    GET  /health        liveness check.
+
+Responses are JSON: the result dict of ``Validator.validate_bytes`` for
+``/validate``. Requests are handled concurrently, each one holding a
+validator of the pool while it runs, so that at most ``workers`` articles
+are validated at the same time and further requests wait for their turn.
+
+Usage::
+
+    erudit-validate-daemon --port 8765 --workers 4
+
+    >>> Client(port=8765).validate(xml_bytes)
+"""
+from __future__ import unicode_literals
+import os
+import sys
+import json
+import queue
+import logging
+import argparse
+import http.client
+import http.server
+import socketserver
+
+from erudit_catalog import catalog, profiles, resultcache, validator
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+class DaemonError(Exception):
+    """Raised by :class:`Client` when the daemon cannot fulfill a request.
+    """
+
+
+class ValidationRequestHandler(http.server.BaseHTTPRequestHandler):
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        self._send_json(200, {'status': 'ok',
+                              'schema': self.server.schema_name,
+                              'profile': self.server.profile})
+
+    def do_POST(self):
+        if self.path != '/validate':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers['Content-Length'])
+        except (TypeError, ValueError):
+            length = -1
+
+        if length < 0:
+            self._send_json(400, {'error': 'missing or invalid Content-Length'})
+            return
+
+        if length > self.server.max_body_size:
+            self._send_json(413, {'error': 'article too large'})
+            return
+
+        data = self.rfile.read(length)
+        self._send_json(200, self.server.validate(data))
+
+    def log_message(self, format, *args):
+        LOGGER.info('%s - %s', self.address_string(), format % args)
+
+
+class ValidationServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """HTTP server validating the articles posted to ``/validate``.
+
+    :param server_address: tuple of host and port.
+    :param schema_name: (optional) the schema name in ``catalog['SCH_SCHEMAS']``.
+    :param profile: (optional) the profile name in
+                    :data:`erudit_catalog.profiles.PROFILES`.
+    :param workers: (optional) number of validators, i.e. of articles
+                    validated concurrently. Defaults to the number of CPUs.
+    :param cache: (optional) a :class:`erudit_catalog.resultcache.ResultCache`
+                  instance shared by the validators.
+    :param max_body_size: (optional) size limit of the posted articles.
+    :param fail_fast: (optional) stop validating each article at its first
+                      error.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address, schema_name=validator.DEFAULT_SCHEMA,
+            profile=None, workers=None, cache=None,
+            max_body_size=DEFAULT_MAX_BODY_SIZE, fail_fast=False):
+        self.schema_name = schema_name
+        self.profile = profile
+        self.max_body_size = max_body_size
+
+        workers = workers or os.cpu_count() or 1
+        self._validators = queue.Queue()
+        for _ in range(workers):
+            self._validators.put(validator.Validator(schema_name,
+                profile=profile, cache=cache, fail_fast=fail_fast))
+
+        http.server.HTTPServer.__init__(self, server_address,
+                ValidationRequestHandler)
+
+    def validate(self, data):
+        """Validates `data` with the next available validator, waiting for
+        one if all are busy.
+        """
+        article_validator = self._validators.get()
+        try:
+            return article_validator.validate_bytes(data)
+        finally:
+            self._validators.put(article_validator)
+
+
+class Client(object):
+    """Client of the validation daemon.
+
+    :param host: (optional) the daemon host.
+    :param port: (optional) the daemon port.
+    :param timeout: (optional) timeout in seconds of each request.
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=60):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None):
+        conn = http.client.HTTPConnection(self.host, self.port,
+                timeout=self.timeout)
+        try:
+            headers = {'Content-Type': 'application/xml'} if body is not None else {}
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            payload = json.loads(response.read().decode('utf-8'))
+        except (IOError, OSError, http.client.HTTPException, ValueError) as exc:
+            raise DaemonError('cannot reach the daemon at %s:%s: %s' % (
+                self.host, self.port, exc))
+        finally:
+            conn.close()
+
+        if response.status != 200:
+            raise DaemonError('daemon replied %s: %s' % (
+                response.status, payload.get('error')))
+
+        return payload
+
+    def health(self):
+        return self._request('GET', '/health')
+
+    def validate(self, data):
+        """Validates `data`, the bytes of an article.
+
+        Returns the same dict as
+        :meth:`erudit_catalog.validator.Validator.validate_bytes`.
+        """
+        return self._request('POST', '/validate', body=data)
+
+    def validate_file(self, filename):
+        """Validates the article at `filename`, read by the client.
+        """
+        with open(filename, 'rb') as f:
+            result = self.validate(f.read())
+
+        output = {'filename': filename}
+        output.update(result)
+        return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Run a local daemon validating articles against the '
+                        'Érudit Publishing Schema.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--schema', default=validator.DEFAULT_SCHEMA)
+    parser.add_argument('--profile', choices=list(profiles.PROFILES),
+            default=None, help='validate only the patterns of a profile '
+                               '(default: all patterns)')
+    parser.add_argument('--fail-fast', action='store_true',
+            help='stop validating each article at its first error')
+    parser.add_argument('--workers', type=int, default=None,
+            help='number of concurrent validations '
+                 '(default: number of CPUs)')
+    parser.add_argument('--cache', nargs='?', metavar='PATH',
+            const=os.path.join(catalog['SCH_CACHE_DIR'], 'results.sqlite'),
+            help='reuse the results of unchanged articles, stored at PATH '
+                 '(default: %(const)s)')
+    parser.add_argument('--loglevel', default='WARNING')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper()))
+
+    cache = resultcache.ResultCache(args.cache) if args.cache else None
+    server = ValidationServer((args.host, args.port), schema_name=args.schema,
+            profile=args.profile, workers=args.workers, cache=cache,
+            fail_fast=args.fail_fast)
+    LOGGER.info('listening on %s:%s', args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#coding: utf-8
+"""Process-wide cache of parsed DTDs.
+
+Parsing the JATS 1.1 and PMC 3.0 DTDs means reading and resolving a few
+dozen modules. :func:`get_dtd` parses each of them once, on first use, and
+returns the same ``etree.DTD`` instance afterwards.
+
+``etree.DTD`` instances keep the error log of their last validation, so
+concurrent threads should validate through :func:`validate`, which
+serializes the validations against each DTD.
+"""
+from __future__ import unicode_literals
+import logging
+import threading
+
+from lxml import etree
+
+from erudit_catalog import catalog
+
+LOGGER = logging.getLogger(__name__)
+
+# maps doctype public ids to DTD names in ``catalog['DTDS']``.
+PUBLIC_IDS = {
+    '-//NLM//DTD JATS (Z39.96) Journal Publishing DTD v1.1 20151215//EN':
+        'JATS-journalpublishing1.dtd',
+    '-//NLM//DTD Journal Publishing DTD v3.0 20080202//EN':
+        'journalpublishing3.dtd',
+}
+
+DEFAULT_PUBLIC_ID = catalog['ALLOWED_PUBLIC_IDS'][0]
+
+
+def get_dtd(public_id=DEFAULT_PUBLIC_ID):
+    """Returns the ``etree.DTD`` identified by `public_id`, parsing it if
+    needed.
+
+    :param public_id: (optional) the public id of the DTD, as declared in the
+                      DOCTYPE. Defaults to JATS Publishing 1.1.
+    """
+    try:
+        dtd_name = PUBLIC_IDS[public_id]
+    except KeyError:
+        raise ValueError('unrecognized public id: "%s"' % public_id)
+
+    with _DTDS_LOCK:
+        try:
+            return _DTDS[public_id]
+        except KeyError:
+            LOGGER.info('parsing DTD "%s"', dtd_name)
+            dtd = _DTDS[public_id] = etree.DTD(catalog['DTDS'][dtd_name])
+            return dtd
+
+
+def get_dtd_for(xmlfile, default=DEFAULT_PUBLIC_ID):
+    """Returns the ``etree.DTD`` declared by the DOCTYPE of `xmlfile`, an
+    ``etree._ElementTree`` instance, or the one identified by `default` if
+    the DOCTYPE is missing.
+    """
+    return get_dtd(xmlfile.docinfo.public_id or default)
+
+
+def validate(xmlfile, default=DEFAULT_PUBLIC_ID):
+    """Validates `xmlfile`, an ``etree._ElementTree`` instance, against the
+    DTD declared by its DOCTYPE, or the one identified by `default` if the
+    DOCTYPE is missing.
+
+    Returns a tuple comprising the validation status and the list of error
+    log entries. Safe to call from concurrent threads.
+    """
+    public_id = xmlfile.docinfo.public_id or default
+    dtd = get_dtd(public_id)
+    with _VALIDATION_LOCKS[public_id]:
+        is_valid = dtd.validate(xmlfile)
+        return is_valid, list(dtd.error_log)
+
+
+def clear():
+    """Discards all parsed DTDs.
+    """
+    with _DTDS_LOCK:
+        _DTDS.clear()
+
+
+_DTDS = {}
+_DTDS_LOCK = threading.Lock()
+_VALIDATION_LOCKS = dict((public_id, threading.Lock()) for public_id in PUBLIC_IDS)
@@ -0,0 +1,123 @@
+#coding: utf-8
+"""Compact error records.
+
+Validations of badly broken articles report up to hundreds of thousands of
+errors. The records defined here keep only the fields identifying each error
+in slots, and format their messages when they are read. They provide the
+``line``, ``message``, ``level`` and ``label`` attributes of packtools' style
+errors, and are converted to them with ``to_style_error`` only when they are
+handed over to packtools.
+
+packtools is only imported by ``to_style_error``. Importing packtools loads
+:mod:`erudit_catalog.checks` through its entry points, and ``checks`` imports
+this module, so importing packtools here would make the import circular.
+"""
+from __future__ import unicode_literals
+import re
+import collections
+
+# the levels of packtools' ``StyleError``, ``SchematronStyleError`` and
+# ``SchemaStyleError``.
+STYLE_ERROR_LEVEL = 'Style Error'
+DTD_ERROR_LEVEL = 'DTD Error'
+
+# stands for the lxml error log entries wrapped by packtools' style errors.
+_LogEntry = collections.namedtuple('_LogEntry', 'message line')
+
+_SVRL_TEXT_REGEX = re.compile(r'<svrl:text>(.*)</svrl:text>', re.DOTALL)
+_SVRL_LOCATION_REGEX = re.compile(r'\slocation="([^"]*)"')
+
+
+class ErrorRecord(object):
+    """An error found by the style checks in Python.
+
+    The message is `template` formatted with `args`.
+    """
+    __slots__ = ('line', 'label', 'template', 'args')
+    level = STYLE_ERROR_LEVEL
+
+    def __init__(self, template, args=(), line=None, label=''):
+        self.template = template
+        self.args = args
+        self.line = line
+        self.label = label
+
+    @property
+    def message(self):
+        return self.template % self.args if self.args else self.template
+
+    def to_style_error(self):
+        from packtools.style_errors import StyleError
+
+        err = StyleError()
+        err.line = self.line
+        err.message = self.message
+        err.label = self.label
+        return err
+
+    def __repr__(self):
+        return '<%s line=%r message=%r>' % (self.__class__.__name__,
+                self.line, self.message)
+
+
+class SchematronRecord(object):
+    """A failed assertion reported by a Schematron validation, kept as the
+    serialized ``svrl:failed-assert`` element of the error log.
+    """
+    __slots__ = ('svrl', 'label')
+    level = STYLE_ERROR_LEVEL
+    line = None
+
+    def __init__(self, svrl, label=''):
+        self.svrl = svrl
+        self.label = label
+
+    @property
+    def message(self):
+        match = _SVRL_TEXT_REGEX.search(self.svrl)
+        if match is None:
+            raise ValueError('cannot get message')
+
+        return match.group(1).strip()
+
+    @property
+    def location(self):
+        match = _SVRL_LOCATION_REGEX.search(self.svrl)
+        return match.group(1) if match else None
+
+    def to_style_error(self):
+        from packtools.style_errors import SchematronStyleError
+
+        return SchematronStyleError(_LogEntry(self.svrl, None), label=self.label)
+
+    def __repr__(self):
+        return '<%s location=%r message=%r>' % (self.__class__.__name__,
+                self.location, self.message)
+
+
+class DTDRecord(object):
+    """An error reported by a DTD validation.
+    """
+    __slots__ = ('line', 'message', 'label')
+    level = DTD_ERROR_LEVEL
+
+    def __init__(self, message, line=None, label=''):
+        self.message = message
+        self.line = line
+        self.label = label
+
+    def to_style_error(self):
+        from packtools.style_errors import SchemaStyleError
+
+        return SchemaStyleError(_LogEntry(self.message, self.line),
+                label=self.label)
+
+    def __repr__(self):
+        return '<%s line=%r message=%r>' % (self.__class__.__name__,
+                self.line, self.message)
+
+
+def to_style_errors(records):
+    """Converts `records` to packtools' style errors.
+    """
+    return [record.to_style_error() for record in records]
@@ -0,0 +1,140 @@
+#coding: utf-8
+"""Compiled transforms of the HTML generator.
+
+``catalog['HTML_GEN_XSLTS']`` maps the names of the HTML generator
+stylesheets to their paths, so that each consumer has to parse them,
+resolve their ``xsl:include`` and compile them again. :func:`get_transform`
+instead returns a process-wide :class:`HTMLTransform` for each version of
+the stylesheets and set of default parameters. Each stylesheet is parsed and
+compiled once, and each thread renders with its own copy of the compiled
+stylesheet, since ``etree.XSLT`` instances keep the error log of their last
+run.
+
+Transforms are called like ``etree.XSLT`` instances, and may thus be given
+to ``packtools.domain.HTMLGenerator``. Parameters given as strings are
+quoted.
+
+Usage::
+
+    >>> transform = get_transform('1.0', css='/static/article.css')
+    >>> html = transform(et, article_lang='fr')
+"""
+from __future__ import unicode_literals
+import copy
+import logging
+import threading
+
+from lxml import etree
+
+from erudit_catalog import catalog
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_VERSION = '1.0'
+
+
+def xslt_name(version):
+    """The name of the root stylesheet of `version` in
+    ``catalog['HTML_GEN_XSLTS']``.
+    """
+    return 'root-html-%s.xslt' % version
+
+
+def compile_xslt(version=DEFAULT_VERSION):
+    """Parses and compiles the root stylesheet of `version`, along with the
+    stylesheets it includes. Returns an ``etree.XSLT`` instance.
+    """
+    try:
+        xslt_path = catalog['HTML_GEN_XSLTS'][xslt_name(version)]
+    except KeyError:
+        raise ValueError('unrecognized xslt version: "%s"' % version)
+
+    LOGGER.info('compiling html generator xslt "%s"', xslt_path)
+    return etree.XSLT(etree.parse(xslt_path))
+
+
+def _quote(value):
+    if isinstance(value, str):
+        return etree.XSLT.strparam(value)
+    else:
+        return value
+
+
+class HTMLTransform(object):
+    """Renders articles to HTML with the stylesheets of `version`.
+
+    Instances are thread-safe: each thread renders with its own copy of the
+    compiled stylesheet.
+
+    :param version: (optional) the version of the stylesheets.
+    :param params: (optional) the default parameters of the stylesheets.
+    """
+    def __init__(self, version=DEFAULT_VERSION, **params):
+        self.version = version
+        self.params = params
+        self._xslt = _compiled_xslt(version)
+        self._local = threading.local()
+
+    def _thread_xslt(self):
+        try:
+            return self._local.xslt
+        except AttributeError:
+            # copies share the parsed stylesheets, and do not resolve their
+            # includes again.
+            with _COMPILED_LOCK:
+                xslt = self._local.xslt = copy.deepcopy(self._xslt)
+            return xslt
+
+    @property
+    def error_log(self):
+        """The error log of the last rendering of the current thread.
+        """
+        return self._thread_xslt().error_log
+
+    def __call__(self, xmlfile, **params):
+        """Renders `xmlfile`, an ``etree._ElementTree`` instance, with the
+        default parameters updated with `params`.
+
+        Returns an ``etree._XSLTResultTree`` instance.
+        """
+        merged = dict(self.params)
+        merged.update(params)
+        return self._thread_xslt()(xmlfile, **dict(
+            (name, _quote(value)) for name, value in merged.items()))
+
+
+def _compiled_xslt(version):
+    with _COMPILED_LOCK:
+        if version not in _COMPILED:
+            _COMPILED[version] = compile_xslt(version)
+
+        return _COMPILED[version]
+
+
+def get_transform(version=DEFAULT_VERSION, **params):
+    """Returns the process-wide :class:`HTMLTransform` for `version` and the
+    default parameters `params`.
+    """
+    key = (version, tuple(sorted(params.items())))
+    with _TRANSFORMS_LOCK:
+        if key not in _TRANSFORMS:
+            _TRANSFORMS[key] = HTMLTransform(version, **params)
+
+        return _TRANSFORMS[key]
+
+
+def clear():
+    """Forgets the compiled stylesheets and transforms, e.g. once the
+    stylesheets are edited.
+    """
+    with _TRANSFORMS_LOCK:
+        _TRANSFORMS.clear()
+    with _COMPILED_LOCK:
+        _COMPILED.clear()
+
+
+_COMPILED = {}
+_COMPILED_LOCK = threading.Lock()
+
+_TRANSFORMS = {}
+_TRANSFORMS_LOCK = threading.Lock()
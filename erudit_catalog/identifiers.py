@@ -0,0 +1,159 @@
+#coding: utf-8
+"""Batch checking of the ISSNs and DOIs of many articles.
+
+The ``issn_isvalid``, ``article-id_doi_value`` and ``pub-id_doi_value``
+patterns check the identifiers of one article at a time, inside the
+validator XSLT. For audits of a whole catalog, :func:`check_identifiers`
+extracts the identifiers of many articles with a single compiled XPath per
+article and checks each distinct value once, with the regular expressions of
+the patterns. ISSNs are also checked for their check digit, which the
+patterns do not verify.
+
+Usage::
+
+    python -m erudit_catalog.identifiers /path/to/articles > failures.jsonl
+"""
+from __future__ import unicode_literals
+import re
+import sys
+import json
+import logging
+import argparse
+import collections
+
+from lxml import etree
+
+from erudit_catalog import cli, native
+
+LOGGER = logging.getLogger(__name__)
+
+ISSN_REGEX = re.compile(native.ISSN)
+DOI_IN_ARTICLE_ID_REGEX = re.compile(native.DOI_IN_ARTICLE_ID)
+DOI_IN_PUB_ID_REGEX = re.compile(native.DOI_IN_PUB_ID)
+
+# kinds of identifiers, by the pattern that checks them.
+ISSN = 'issn'
+ARTICLE_DOI = 'article-id_doi'
+REF_DOI = 'pub-id_doi'
+
+_IDENTIFIERS_XPATH = etree.XPath(
+        "//issn"
+        " | /article/front/article-meta/article-id[@pub-id-type='doi']"
+        " | /article/back/ref-list/ref/element-citation/pub-id[@pub-id-type='doi']")
+
+_KINDS = {'issn': ISSN, 'article-id': ARTICLE_DOI, 'pub-id': REF_DOI}
+
+XMLPARSER = etree.XMLParser(load_dtd=False, no_network=True,
+        resolve_entities=False)
+
+Identifier = collections.namedtuple('Identifier', 'source kind value line')
+
+Failure = collections.namedtuple('Failure', 'source kind value line reason')
+
+
+def issn_check_digit(issn):
+    """The check digit of the ISSN whose first seven digits are those of
+    `issn`, i.e. ``'0'`` to ``'9'`` or ``'X'``.
+    """
+    digits = issn.replace('-', '')[:7]
+    total = sum(int(digit) * weight for digit, weight in zip(digits, range(8, 1, -1)))
+    check = (11 - total % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def check_value(kind, value, check_digit=True):
+    """Returns ``None`` if `value`, an identifier of `kind`, is valid, or the
+    reason it is not: ``'format'`` or ``'check-digit'``.
+    """
+    if kind == ISSN:
+        match = ISSN_REGEX.search(value)
+        if match is None:
+            return 'format'
+        issn = match.group(0)
+        if check_digit and issn_check_digit(issn) != issn[-1].upper():
+            return 'check-digit'
+
+    elif kind == ARTICLE_DOI:
+        if DOI_IN_ARTICLE_ID_REGEX.search(value) is None:
+            return 'format'
+
+    elif kind == REF_DOI:
+        if DOI_IN_PUB_ID_REGEX.search(value) is None:
+            return 'format'
+
+    else:
+        raise ValueError('unrecognized kind of identifier: "%s"' % kind)
+
+
+def iter_identifiers(sources):
+    """Yields an :data:`Identifier` for each ISSN and DOI of `sources`.
+
+    Each source is a filename, a file object or an ``etree._ElementTree``
+    instance, and is identified in the results by itself. Sources that
+    cannot be parsed are logged and skipped.
+    """
+    for source in sources:
+        if isinstance(source, etree._ElementTree):
+            et = source
+        else:
+            try:
+                et = etree.parse(source, XMLPARSER)
+            except (etree.XMLSyntaxError, IOError, OSError) as exc:
+                LOGGER.warning('cannot parse "%s": %s', source, exc)
+                continue
+
+        for elem in _IDENTIFIERS_XPATH(et):
+            yield Identifier(source, _KINDS[elem.tag],
+                    ''.join(elem.itertext()), elem.sourceline)
+
+
+def check_identifiers(sources, check_digit=True, maxsize=65536):
+    """Checks the ISSNs and DOIs of `sources`, as :func:`iter_identifiers`
+    extracts them.
+
+    Yields a :data:`Failure` for each invalid identifier, as soon as it is
+    found, in the order of `sources`. The reasons of the `maxsize` most
+    recently seen values are kept, so that repeated values, such as the ISSNs
+    of a journal, are checked once.
+    """
+    reasons = collections.OrderedDict()
+    for identifier in iter_identifiers(sources):
+        key = (identifier.kind, identifier.value)
+        try:
+            reason = reasons[key]
+            reasons.move_to_end(key)
+        except KeyError:
+            reason = reasons[key] = check_value(identifier.kind,
+                    identifier.value, check_digit=check_digit)
+            if len(reasons) > maxsize:
+                reasons.popitem(last=False)
+
+        if reason is not None:
+            yield Failure(*(identifier + (reason,)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Check the ISSNs and DOIs of articles. Failures are '
+                        'written as JSON lines.')
+    parser.add_argument('paths', nargs='+',
+            help='files, directories or glob patterns')
+    parser.add_argument('--pattern', default='*.xml',
+            help='file name pattern used to search directories '
+                 '(default: %(default)s)')
+    parser.add_argument('--no-check-digit', action='store_true',
+            help='do not verify the check digit of ISSNs')
+    args = parser.parse_args(argv)
+
+    failures = check_identifiers(cli.iter_filenames(args.paths,
+        pattern=args.pattern), check_digit=not args.no_check_digit)
+    has_failures = False
+    for failure in failures:
+        has_failures = True
+        print(json.dumps(failure._asdict(), ensure_ascii=False), flush=True)
+
+    return 1 if has_failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
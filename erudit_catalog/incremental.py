@@ -0,0 +1,352 @@
+#coding: utf-8
+"""Incremental revalidation of edited articles.
+
+Editors fix an article a few elements at a time, and revalidate it after
+each edit. :class:`IncrementalValidator` compares a snapshot of the new tree
+with the one taken by the previous validation, and runs only the Schematron
+patterns whose results may have changed, reusing the errors of the others:
+
+* patterns whose rule contexts are elements inside an edited subtree, or one
+  of its ancestors;
+* patterns whose assertions look beyond their context, through keys, global
+  parameters or absolute paths, if one of the elements they refer to was
+  edited.
+
+The DTD validation and the style checks in Python are cheap, and are always
+run on the whole tree.
+
+Snapshots are made of Python hashes, so they are only comparable within the
+process that took them.
+
+Usage::
+
+    >>> validator = IncrementalValidator()
+    >>> result = validator.validate(et)
+    >>> # ... edit et ...
+    >>> result = validator.validate(et, previous=result)
+"""
+from __future__ import unicode_literals
+import re
+import logging
+import collections
+
+from lxml import etree
+
+from erudit_catalog import checks, dtd, profiles, schematron, svrl
+from erudit_catalog.errors import DTDRecord
+from erudit_catalog.validator import DEFAULT_SCHEMA, error_to_dict
+
+LOGGER = logging.getLogger(__name__)
+
+WILDCARD = schematron.WILDCARD
+
+_KEY_REGEX = re.compile(r"""key\(\s*['"]([^'"]+)['"]""")
+_PARAM_REGEX = re.compile(r'\$([A-Za-z_][\w.-]*)')
+_LITERAL_REGEX = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+# assertions matching any of these look beyond the subtree of their context.
+_GLOBAL_TESTS_REGEX = re.compile(
+        r'//|key\(|\$|\.\.|ancestor|parent::|preceding|following|'
+        r'(^|[\s(,=<>!|])/')
+
+
+class _Node(collections.namedtuple('_Node', 'tag own subtree children')):
+    """The snapshot of an element: the hash of its own tag, attributes and
+    text, the hash of its whole subtree and the snapshots of its child
+    elements.
+    """
+    __slots__ = ()
+
+
+def _localname(elem):
+    return etree.QName(elem).localname
+
+
+def snapshot(elem):
+    """Takes the snapshot of `elem`, an ``etree`` element or tree, as a tree
+    of :class:`_Node` instances.
+    """
+    try:
+        elem = elem.getroot()
+    except AttributeError:
+        pass
+
+    children = []
+    tails = []
+    for child in elem:
+        tails.append(child.tail)
+        if isinstance(child.tag, str):
+            children.append(snapshot(child))
+
+    tag = _localname(elem)
+    own = hash((tag, tuple(sorted(elem.attrib.items())), elem.text,
+        tuple(tails)))
+    subtree = hash((own, tuple(child.subtree for child in children)))
+    return _Node(tag, own, subtree, tuple(children))
+
+
+def _subtree_tags(node, tags):
+    tags.add(node.tag)
+    for child in node.children:
+        _subtree_tags(child, tags)
+
+
+def diff(old, new):
+    """Compares the snapshots `old` and `new`.
+
+    Returns a tuple comprising the set of the names of the edited elements
+    and the set of the names of the elements whose subtree was edited, i.e.
+    the edited elements and their ancestors. Inserting, removing or moving a
+    child element counts as editing every element of the subtree of its
+    parent, since it shifts the locations reported inside it.
+    """
+    changed = set()
+    affected = set()
+    _diff(old, new, (), changed, affected)
+    affected.update(changed)
+    return changed, affected
+
+
+def _diff(old, new, path, changed, affected):
+    if old.subtree == new.subtree:
+        return
+
+    path = path + (new.tag,)
+    if (old.tag != new.tag or
+            [child.tag for child in old.children] !=
+            [child.tag for child in new.children]):
+        _subtree_tags(old, changed)
+        _subtree_tags(new, changed)
+        affected.update(path)
+        return
+
+    if old.own != new.own:
+        changed.add(new.tag)
+        affected.update(path)
+
+    for old_child, new_child in zip(old.children, new.children):
+        _diff(old_child, new_child, path, changed, affected)
+
+
+def _names(expression):
+    return set(schematron._NAME_REGEX.findall(expression))
+
+
+class PatternDependencies(object):
+    """The elements the results of a pattern depend on.
+
+    :param contexts: the names of the elements its rules fire on, or
+                     :data:`WILDCARD`.
+    :param names: the names referred to by its assertions that look beyond
+                  their context, or ``None`` if they do not.
+    """
+    __slots__ = ('contexts', 'names')
+
+    def __init__(self, contexts, names=None):
+        self.contexts = frozenset(contexts)
+        self.names = None if names is None else frozenset(names)
+
+    @property
+    def is_global(self):
+        return self.names is not None
+
+    def must_rerun(self, changed, affected):
+        """Whether the pattern may report other errors once the elements
+        in `changed` are edited, and the subtrees of those in `affected`.
+        """
+        if not (changed or affected):
+            return False
+
+        if WILDCARD in self.contexts or not self.contexts.isdisjoint(affected):
+            return True
+
+        return self.is_global and not self.names.isdisjoint(changed)
+
+    def __repr__(self):
+        return '<%s contexts=%r names=%r>' % (self.__class__.__name__,
+                sorted(self.contexts),
+                None if self.names is None else sorted(self.names))
+
+
+def pattern_dependencies(xslt_doc):
+    """Maps the ids of the patterns run by the validator XSLT `xslt_doc` to
+    their :class:`PatternDependencies`, in order.
+    """
+    root = xslt_doc.getroot()
+    keys = {}
+    for key in root.iterchildren('{%s}key' % schematron.XSL_NS):
+        keys[key.get('name')] = (_names(key.get('match', '')) |
+                _names(key.get('use', '')))
+
+    params = {}
+    for param in root.iterchildren('{%s}param' % schematron.XSL_NS,
+            '{%s}variable' % schematron.XSL_NS):
+        params[param.get('name')] = _names(param.get('select', ''))
+
+    dependencies = collections.OrderedDict()
+    for pattern_id, templates in schematron.pattern_rules(xslt_doc):
+        contexts = set()
+        names = None
+        for template in templates:
+            contexts.update(schematron.context_names(template.get('match', '')))
+            for elem in template.iter('{%s}when' % schematron.XSL_NS,
+                    '{%s}if' % schematron.XSL_NS,
+                    '{%s}variable' % schematron.XSL_NS):
+                test = elem.get('test') or elem.get('select') or ''
+                expression = _LITERAL_REGEX.sub("''", test)
+                if not _GLOBAL_TESTS_REGEX.search(expression):
+                    continue
+
+                names = (names or set()) | _names(expression)
+                for key_name in _KEY_REGEX.findall(test):
+                    names |= keys.get(key_name, set([WILDCARD]))
+                for param_name in _PARAM_REGEX.findall(test):
+                    names |= params.get(param_name, set())
+
+        if names is not None and WILDCARD in names:
+            contexts.add(WILDCARD)
+        dependencies[pattern_id] = PatternDependencies(contexts, names)
+
+    return dependencies
+
+
+class IncrementalResult(object):
+    """The result of a validation by :class:`IncrementalValidator`.
+
+    :param snapshot: the snapshot of the validated tree.
+    :param dtd_errors: the list of DTD error records.
+    :param pattern_errors: ordered dict mapping the id of each pattern to the
+                           list of its error records.
+    :param check_errors: the list of error records of the style checks in
+                         Python.
+    :param revalidated: the set of the ids of the patterns that were run.
+    """
+    def __init__(self, snapshot, dtd_errors, pattern_errors, check_errors,
+            revalidated):
+        self.snapshot = snapshot
+        self.dtd_errors = dtd_errors
+        self.pattern_errors = pattern_errors
+        self.check_errors = check_errors
+        self.revalidated = revalidated
+
+    @property
+    def style_errors(self):
+        """The style errors, in the order :class:`erudit_catalog.validator.Validator`
+        reports them.
+        """
+        seen = set()
+        errors = []
+        for records in self.pattern_errors.values():
+            for record in records:
+                key = (record.location, record.message)
+                if key not in seen:
+                    seen.add(key)
+                    errors.append(record)
+
+        errors.extend(self.check_errors)
+        return errors
+
+    @property
+    def is_valid(self):
+        return not (self.dtd_errors or self.check_errors or
+                any(self.pattern_errors.values()))
+
+    def to_dict(self):
+        """Returns the same dict as
+        :meth:`erudit_catalog.validator.Validator.validate_bytes`.
+        """
+        return {
+            'is_valid': self.is_valid,
+            'dtd_errors': [error_to_dict(err) for err in self.dtd_errors],
+            'style_errors': [error_to_dict(err) for err in self.style_errors],
+        }
+
+
+class IncrementalValidator(object):
+    """Validates articles, revalidating only what their edits may affect.
+
+    Instances keep the `maxsize` most recently used validators of sets of
+    patterns, and must not be shared between threads.
+
+    :param schema_name: (optional) the schema name in ``catalog['SCH_SCHEMAS']``.
+    :param phase: (optional) the Schematron phase id. All patterns are active
+                  by default.
+    :param profile: (optional) the profile name in
+                    :data:`erudit_catalog.profiles.PROFILES`, exclusive of
+                    `phase`.
+    :param maxsize: (optional) maximum number of validators of sets of
+                    patterns kept.
+    """
+    def __init__(self, schema_name=DEFAULT_SCHEMA, phase=None, profile=None,
+            maxsize=32):
+        if phase is not None and profile is not None:
+            raise ValueError('phase and profile are mutually exclusive')
+
+        self.schema_name = schema_name
+        self.phase = phase
+        self.profile = profile
+        self.maxsize = maxsize
+        self.label = '@' + schema_name
+
+        if profile is None:
+            self.xslt_doc = schematron.schema_xslt(schema_name, phase=phase)
+        else:
+            self.xslt_doc = profiles.profile_xslt(schema_name, profile)
+
+        self.dependencies = pattern_dependencies(self.xslt_doc)
+        self._all_patterns = frozenset(self.dependencies)
+        self._selections = schematron.PatternSelections(self.xslt_doc,
+                maxsize=maxsize)
+        # parse the default DTD ahead of the first validation.
+        dtd.get_dtd()
+        self.pipeline = checks.StyleCheckingRecordsPipeline()
+
+    def patterns_to_rerun(self, old, new):
+        """The ids of the patterns to be run once the tree of snapshot `old`
+        is edited to that of snapshot `new`.
+        """
+        changed, affected = diff(old, new)
+        return frozenset(pattern_id
+                for pattern_id, dependencies in self.dependencies.items()
+                if dependencies.must_rerun(changed, affected))
+
+    def validate(self, xmlfile, previous=None):
+        """Validates `xmlfile`, an ``etree._ElementTree`` instance.
+
+        :param previous: (optional) the :class:`IncrementalResult` of the
+                         validation of an earlier version of `xmlfile`, by
+                         this validator. All patterns are run by default.
+
+        Raises ``ValueError`` if the DOCTYPE declares an unrecognized DTD.
+        """
+        new_snapshot = snapshot(xmlfile)
+        if previous is None or set(previous.pattern_errors) != self._all_patterns:
+            rerun = self._all_patterns
+        else:
+            rerun = self.patterns_to_rerun(previous.snapshot, new_snapshot)
+        LOGGER.debug('revalidating %s of %s patterns', len(rerun),
+                len(self._all_patterns))
+
+        _, error_log = dtd.validate(xmlfile)
+        dtd_errors = [DTDRecord(err.message, err.line) for err in error_log]
+
+        rerun_errors = {}
+        if rerun:
+            report = self._selections.get(rerun)(xmlfile)
+            rerun_errors.update(svrl.iter_pattern_records(report,
+                label=self.label))
+
+        pattern_errors = collections.OrderedDict()
+        for pattern_id in self.dependencies:
+            if pattern_id in rerun:
+                pattern_errors[pattern_id] = rerun_errors.get(pattern_id, [])
+            else:
+                pattern_errors[pattern_id] = previous.pattern_errors[pattern_id]
+
+        check_errors = []
+        for err in next(self.pipeline.run(xmlfile, rewrap=True)):
+            err.label = self.label
+            check_errors.append(err)
+
+        return IncrementalResult(new_snapshot, dtd_errors, pattern_errors,
+                check_errors, rerun)
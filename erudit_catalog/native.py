@@ -0,0 +1,755 @@
+#coding: utf-8
+"""Native implementation of the eps-0.1 Schematron rule set.
+
+The validator XSLT generated from ``erudit-style-0.1.sch`` scans the whole
+document once per pattern. :class:`NativeValidator` walks the lxml tree a
+single time, dispatching each element by tag name to the rules whose context
+may match it, and produces the same messages as the Schematron. Rules that
+depend on the document as a whole (``counts_*`` and the xref rid integrity
+patterns) are evaluated after the walk, from tallies collected along the way.
+"""
+from __future__ import unicode_literals
+import re
+import logging
+import collections
+
+from lxml import etree
+
+from packtools.style_errors import StyleError
+
+from erudit_catalog import catalog, schematron
+from erudit_catalog.counts import xpath_number as _number, page_count_is_valid
+
+LOGGER = logging.getLogger(__name__)
+
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+XML_NS = 'http://www.w3.org/XML/1998/namespace'
+
+_NAMESPACES = {'xlink': XLINK_NS, 'xml': XML_NS}
+
+_STEP = re.compile(r"^([\w.-]+)(?:\[@([\w:.-]+)(?:='([^']*)')?\])?$")
+
+
+def _qname(name):
+    """Converts prefixed attribute names, e.g. ``xlink:href``, to Clark's
+    notation.
+    """
+    prefix, sep, localname = name.rpartition(':')
+    if sep:
+        return '{%s}%s' % (_NAMESPACES[prefix], localname)
+    return name
+
+
+def _first_text(elem):
+    """The string value of ``text()`` at `elem`, i.e. its first text node.
+    """
+    if elem.text:
+        return elem.text
+
+    for child in elem:
+        if child.tail:
+            return child.tail
+
+    return ''
+
+
+def _string(elem):
+    """The XPath string value of `elem`.
+    """
+    return ''.join(elem.itertext())
+
+
+def _is_blank(value):
+    return not value.strip(' \t\r\n')
+
+
+class Context(object):
+    """A compiled rule context, e.g. ``article/front/article-meta//aff``.
+
+    Only the subset of XSLT patterns used by eps-0.1 is supported: element
+    names joined by ``/`` or ``//``, each optionally filtered by the presence
+    or the value of an attribute.
+    """
+    def __init__(self, expression):
+        self.expression = expression
+        tokens = re.split(r'(//?)', expression)
+        if tokens[0] == '':
+            tokens = tokens[1:]
+        else:
+            tokens.insert(0, '//')
+
+        steps = []
+        for axis, step in zip(tokens[0::2], tokens[1::2]):
+            match = _STEP.match(step)
+            if match is None:
+                raise ValueError('unsupported rule context: "%s"' % expression)
+            name, attr, value = match.groups()
+            steps.append((axis, name, attr and _qname(attr), value))
+
+        # matching happens from the context element up to its ancestors.
+        self.steps = list(reversed(steps))
+
+    @property
+    def tag(self):
+        return self.steps[0][1]
+
+    @property
+    def names(self):
+        return [step[1] for step in self.steps]
+
+    def _match_step(self, index, elem):
+        axis, name, attr, value = self.steps[index]
+        if elem.tag != name:
+            return False
+        if attr is not None:
+            attr_value = elem.get(attr)
+            if attr_value is None or (value is not None and attr_value != value):
+                return False
+
+        parent = elem.getparent()
+        if index == len(self.steps) - 1:
+            return axis == '//' or parent is None
+        elif axis == '/':
+            return parent is not None and self._match_step(index + 1, parent)
+        else:
+            while parent is not None:
+                if self._match_step(index + 1, parent):
+                    return True
+                parent = parent.getparent()
+            return False
+
+    def matches(self, elem):
+        return self._match_step(0, elem)
+
+
+class Assert(object):
+    """An assertion made on the rule context.
+
+    :param test: callable with the signature ``test(elem, document) -> bool``.
+    :param message: the message or a callable ``message(elem) -> str``.
+    """
+    def __init__(self, test, message):
+        self.test = test
+        self.message = message
+
+    def format(self, elem):
+        if callable(self.message):
+            return self.message(elem)
+        return self.message
+
+
+class Pattern(object):
+    """A Schematron pattern with a single rule.
+
+    :param deferred: the assertions depend on the whole document and are
+                     tested only after it has been walked.
+    """
+    def __init__(self, id, context, asserts, deferred=False):
+        self.id = id
+        self.context = Context(context)
+        self.asserts = asserts
+        self.deferred = deferred
+
+
+class Document(object):
+    """Facts about the document collected during the walk.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.tag_counts = collections.Counter()
+        self.ids = collections.defaultdict(set)
+
+    def collect(self, elem):
+        self.tag_counts[elem.tag] += 1
+        elem_id = elem.get('id')
+        if elem_id is not None:
+            self.ids[elem.tag].add(elem_id)
+            parent = elem.getparent()
+            if parent is not None and parent.tag == 'table-wrap-foot':
+                self.ids[parent.tag + '/' + elem.tag].add(elem_id)
+
+    def has_id(self, tags, value):
+        return value is not None and any(value in self.ids[tag] for tag in tags)
+
+    def findall(self, path):
+        """Elements at ``/article/`` + `path`."""
+        if self.root.tag != 'article':
+            return []
+        return self.root.findall(path)
+
+
+#----------------------------------
+# assertion factories
+#----------------------------------
+def has_attr(name):
+    name = _qname(name)
+    return lambda elem, doc: elem.get(name) is not None
+
+
+def lacks_attr(name):
+    name = _qname(name)
+    return lambda elem, doc: elem.get(name) is None
+
+
+def attr_in(name, values):
+    name, values = _qname(name), frozenset(values)
+    return lambda elem, doc: elem.get(name) in values
+
+
+def has_child(*names, **attrs):
+    """At least one child element named after one of `names`, optionally
+    having the attribute values given as keyword args (with ``-`` spelled
+    as ``_``).
+    """
+    attrs = [(key.replace('_', '-'), value) for key, value in attrs.items()]
+
+    def test(elem, doc):
+        for child in elem.iterchildren(*names):
+            if all(child.get(key) == value for key, value in attrs):
+                return True
+        return False
+    return test
+
+
+def lacks_child(name):
+    return lambda elem, doc: next(elem.iterchildren(name), None) is None
+
+
+def lacks_descendant(child, descendant):
+    def test(elem, doc):
+        for elem_child in elem.iterchildren(child):
+            if next(elem_child.iterdescendants(descendant), None) is not None:
+                return False
+        return True
+    return test
+
+
+def notempty(elem, doc):
+    return not _is_blank(_first_text(elem))
+
+
+def searches(pattern, flags=0):
+    regex = re.compile(pattern, flags)
+    return lambda elem, doc: regex.search(_string(elem)) is not None
+
+
+def lacks_match(pattern):
+    regex = re.compile(pattern)
+    return lambda elem, doc: regex.search(_string(elem)) is None
+
+
+def counts(*tags):
+    def test(elem, doc):
+        return _number(elem.get('count')) == sum(doc.tag_counts[tag] for tag in tags)
+    return test
+
+
+def rid_in(*tags):
+    return lambda elem, doc: doc.has_id(tags, elem.get('rid'))
+
+
+def page_count(elem, doc):
+    """The test of the pattern ``counts_pages``.
+    """
+    return page_count_is_valid(elem.get('count'),
+            [_string(e) for e in doc.findall('front/article-meta/fpage')],
+            [_string(e) for e in doc.findall('front/article-meta/lpage')],
+            [_string(e) for e in doc.findall('front/article-meta/elocation-id')])
+
+
+#----------------------------------
+# message factories
+#----------------------------------
+def with_attr(template, name):
+    name = _qname(name)
+    return lambda elem: template % elem.get(name, '')
+
+
+def with_string(template):
+    return lambda elem: template % _string(elem)
+
+
+#----------------------------------
+# abstract patterns
+#----------------------------------
+def occurs_once(id, context, name):
+    def message(elem):
+        first = next(elem.iterchildren(name), None)
+        return "Element '%s': There must be one element %s." % (
+                elem.tag, '' if first is None else name)
+
+    test = lambda elem, doc: len(list(elem.iterchildren(name))) == 1
+    return Pattern(id, context, [Assert(test, message)])
+
+
+def occurs_zero_or_once(id, context, name):
+    def message(elem):
+        return "Element '%s': There must be zero or one element %s." % (
+                elem.tag, name)
+
+    test = lambda elem, doc: len(list(elem.iterchildren(name))) < 2
+    return Pattern(id, context, [Assert(test, message)])
+
+
+def assert_not_empty(id, context):
+    def message(elem):
+        return "Element '%s': Element cannot be empty." % elem.tag
+
+    return Pattern(id, context, [Assert(notempty, message)])
+
+
+def xref_reftype_integrity(ref_type, *tags):
+    message = lambda elem: (
+            "Element 'xref', attribute rid: Mismatching id value '%s' of "
+            "type '%s'." % (elem.get('rid', ''), elem.get('ref-type')))
+
+    return Pattern('xref-reftype-integrity-' + ref_type,
+            "//xref[@ref-type='%s']" % ref_type,
+            [Assert(rid_in(*tags), message)], deferred=True)
+
+
+#----------------------------------
+# eps-0.1 patterns, in the order they
+# are declared in the schema
+#----------------------------------
+ARTICLE_TYPES = (
+    'addendum', 'research-article', 'review-article', 'letter',
+    'article-commentary', 'brief-report', 'rapid-communication', 'oration',
+    'discussion', 'editorial', 'interview', 'correction', 'guidelines',
+    'other', 'obituary', 'case-report', 'book-review', 'reply', 'retraction',
+    'partial-retraction', 'clinical-trial', 'announcement', 'calendar',
+    'in-brief', 'book-received', 'news', 'reprint', 'meeting-report',
+    'abstract', 'product-review', 'dissertation', 'translation',
+)
+
+XREF_REF_TYPES = (
+    'aff', 'app', 'author-notes', 'bibr', 'contrib', 'corresp',
+    'disp-formula', 'fig', 'fn', 'sec', 'supplementary-material', 'table',
+    'table-fn', 'boxed-text',
+)
+
+HISTORY_DATE_TYPES = (
+    'received', 'accepted', 'corrected', 'published', 'preprint',
+    'retracted', 'review-requested', 'review-received',
+)
+
+DOI_IN_ARTICLE_ID = r'(\s+|^)10.(\d{4}|\d{5}|\d{6}|\d{7}|\d{8}|\d{9})/[-._;()/:a-zA-Z0-9]+(\s+|$)'
+DOI_IN_PUB_ID = r'^10.(\d{4}|\d{5}|\d{6}|\d{7}|\d{8}|\d{9})/[-._;()/:a-zA-Z0-9]+$'
+ISSN = r'[0-9]{4}-[0-9]{3}[0-9xX]'
+MONTH = r'^(0?[1-9]{1}|[10-12]{2})$'
+
+ARTICLE_META = 'article/front/article-meta'
+JOURNAL_META = 'article/front/journal-meta'
+ELEMENT_CITATION = 'article/back/ref-list/ref/element-citation'
+
+PATTERNS = [
+    Pattern('list_attributes', '//list', [
+        Assert(has_attr('list-type'),
+            "Element 'list': Missing attribute list-type."),
+    ]),
+    Pattern('list_list-type-values', '//list[@list-type]', [
+        Assert(attr_in('list-type', ['order', 'bullet', 'alpha', 'roman', 'simple']),
+            with_attr("Element 'list', attribute list-type: Invalid value '%s'.", 'list-type')),
+    ]),
+    Pattern('issue-title_has_lang', ARTICLE_META + '/issue-title', [
+        Assert(has_attr('xml:lang'),
+            "Element 'issue-title': Missing attribute xml:lang."),
+    ]),
+    Pattern('table-wrap_has_one_of_table_or_graphic', '//table-wrap', [
+        Assert(has_child('table', 'graphic'),
+            "Element 'table-wrap': Must have one of table or graphic elements."),
+    ]),
+    Pattern('self-uri_has_xlinkhref', '//self-uri', [
+        Assert(has_attr('xlink:href'),
+            "Element 'self-uri': Missing attribute xlink:href."),
+    ]),
+    Pattern('ext-link_has_xlinkhref', '//ext-link', [
+        Assert(has_attr('xlink:href'),
+            "Element 'ext-link': Missing attribute xlink:href."),
+    ]),
+    occurs_once('table-wrap_has_label', '//table-wrap', 'label'),
+    Pattern('table-wrap_has_id', '//table-wrap', [
+        Assert(has_attr('id'), "Element 'table-wrap': Missing Attribute @id."),
+    ]),
+    Pattern('xhtml-table', '//table', [
+        Assert(lacks_child('tr'), "Element 'table': Unexpected element tr."),
+        Assert(lacks_descendant('tbody', 'th'),
+            "Element 'table': Unexpected element th inside tbody."),
+        Assert(lacks_descendant('thead', 'td'),
+            "Element 'table': Unexpected element td inside thead."),
+    ]),
+    Pattern('fig_has_id', '//fig', [
+        Assert(has_attr('id'), "Element 'fig': Missing Attribute @id."),
+    ]),
+    occurs_once('fig_has_graphic', '//fig', 'graphic'),
+    occurs_once('fig_has_label', '//fig', 'label'),
+    occurs_once('seclabel_has_once', '//sec', 'label'),
+    assert_not_empty('seclabel_notempty', '//sec/label'),
+    Pattern('counts_tables', ARTICLE_META + '/counts/table-count', [
+        Assert(counts('table-wrap'),
+            "Element 'table-count': Wrong value in table-count."),
+    ], deferred=True),
+    Pattern('counts_refs', ARTICLE_META + '/counts/ref-count', [
+        Assert(counts('ref'), "Element 'ref-count': Wrong value in ref-count."),
+    ], deferred=True),
+    Pattern('counts_figs', ARTICLE_META + '/counts/fig-count', [
+        Assert(counts('fig'), "Element 'fig-count': Wrong value in fig-count."),
+    ], deferred=True),
+    Pattern('counts_equations', ARTICLE_META + '/counts/equation-count', [
+        Assert(counts('disp-formula'),
+            "Element 'equation-count': Wrong value in equation-count."),
+    ], deferred=True),
+    Pattern('counts_pages', ARTICLE_META + '/counts/page-count', [
+        Assert(page_count, "Element 'page-count': Wrong value in page-count."),
+    ], deferred=True),
+    Pattern('institution_content-type_values',
+            ARTICLE_META + '/aff/institution[@content-type]', [
+        Assert(attr_in('content-type', ['orgname', 'orgdiv1', 'orgdiv2', 'orgdiv3', 'original']),
+            with_attr('Element \'institution\', attribute content-type: Invalid value "%s".', 'content-type')),
+    ]),
+    Pattern('institution_must_have_content-type', ARTICLE_META + '/aff/institution', [
+        Assert(has_attr('content-type'),
+            "Element 'institution': Missing Attribute @content-type."),
+    ]),
+    Pattern('aff_must_have_id', ARTICLE_META + '/aff', [
+        Assert(has_attr('id'), "Element 'aff': Missing Attribute @id."),
+    ]),
+    Pattern('aff_must_have_institution_with_content-type_orgname', ARTICLE_META + '//aff', [
+        Assert(has_child('institution', content_type='orgname'),
+            "Element 'aff': Missing Element institution with @content-type=orgname."),
+    ]),
+    xref_reftype_integrity('aff', 'aff'),
+    xref_reftype_integrity('app', 'app'),
+    xref_reftype_integrity('author-notes', 'author-notes'),
+    xref_reftype_integrity('bibr', 'ref', 'element-citation', 'mixed-citation'),
+    xref_reftype_integrity('contrib', 'contrib'),
+    xref_reftype_integrity('corresp', 'corresp'),
+    xref_reftype_integrity('disp-formula', 'disp-formula'),
+    xref_reftype_integrity('fig', 'fig', 'fig-group'),
+    xref_reftype_integrity('fn', 'fn'),
+    xref_reftype_integrity('sec', 'sec'),
+    xref_reftype_integrity('supplementary-material', 'supplementary-material'),
+    xref_reftype_integrity('table', 'table-wrap', 'table-wrap-group'),
+    xref_reftype_integrity('table-fn', 'table-wrap-foot/fn'),
+    Pattern('xref-reftype-values', '//xref[@ref-type]', [
+        Assert(attr_in('ref-type', XREF_REF_TYPES),
+            with_attr('Element \'xref\', attribute ref-type: Invalid value "%s".', 'ref-type')),
+    ]),
+    Pattern('collab_must_have_named-content', '//collab', [
+        Assert(has_child('named-content', content_type='name'),
+            "Element 'collab': Missing Element named-content with @content-type=name."),
+    ]),
+    assert_not_empty('collab_must_have_named-content_notempty', '//collab/named-content'),
+    Pattern('contrib-id_must_have_contrib-id-type', '//contrib-id', [
+        Assert(has_attr('contrib-id-type'),
+            "Element 'contrib-id': Missing attribute contrib-id-type."),
+    ]),
+    Pattern('contrib-id_avoid_url_in_value', '//contrib-id', [
+        Assert(lacks_match('http'),
+            with_string("Element 'contrib-id': Invalid value '%s'. Value can not be a URL.")),
+    ]),
+    Pattern('contrib-id_contrib-id-type_values',
+            ARTICLE_META + '/contrib-group/contrib[@contrib-id-type]', [
+        Assert(attr_in('contrib-id-type', ['orcid', 'researchid', 'scopus']),
+            with_attr('Element \'contrib-id\', attribute contrib-id-type: Invalid value "%s".', 'contrib-id-type')),
+    ]),
+    assert_not_empty('contrib-id_notempty', '//contrib-id'),
+    Pattern('contrib-group_cannot_have_aff-alternatives', '//contrib-group', [
+        Assert(lacks_child('aff-alternatives'),
+            "Element 'contrib-group': Unexpected element aff-laternatives."),
+    ]),
+    Pattern('contrib-group_cannot_have_aff', '//contrib-group', [
+        Assert(lacks_child('aff'), "Element 'contrib-group': Unexpected element aff."),
+    ]),
+    Pattern('contrib_cannot_have_aff-alternatives', '//contrib', [
+        Assert(lacks_child('aff-alternatives'),
+            "Element 'contrib': Unexpected element aff-laternatives."),
+    ]),
+    Pattern('contrib_cannot_have_aff', '//contrib', [
+        Assert(lacks_child('aff'), "Element 'contrib': Unexpected element aff."),
+    ]),
+    Pattern('contrib_contrib-type_group_must_have_collab',
+            ARTICLE_META + "/contrib-group/contrib[@contrib-type='group']", [
+        Assert(has_child('collab'),
+            'Element \'contrib[@contrib-group="group"]\': Missing element collab.'),
+    ]),
+    Pattern('contrib_contrib-type_values',
+            ARTICLE_META + '/contrib-group/contrib[@contrib-type]', [
+        Assert(attr_in('contrib-type', ['person', 'group']),
+            with_attr('Element \'contrib\', attribute contrib-type: Invalid value "%s".', 'contrib-type')),
+    ]),
+    Pattern('contrib-group_content-type_values_in_journal-meta',
+            JOURNAL_META + '/contrib-group[@content-type]', [
+        Assert(attr_in('content-type', ['manager', 'editor']),
+            with_attr('Element \'contrib-group\', attribute content-type: Invalid value "%s".', 'content-type')),
+    ]),
+    Pattern('contrib-group_content-type_values_in_article-meta',
+            ARTICLE_META + '/contrib-group[@content-type]', [
+        Assert(attr_in('content-type', ['author', 'editor']),
+            with_attr('Element \'contrib-group\', attribute content-type: Invalid value "%s".', 'content-type')),
+    ]),
+    assert_not_empty('prefix_notempty', '//prefix'),
+    assert_not_empty('suffix_notempty', '//suffix'),
+    assert_not_empty('surname_notempty', '//surname'),
+    assert_not_empty('given-names_notempty', '//given-names'),
+    Pattern('permissions_must_exists', ARTICLE_META, [
+        Assert(has_child('permissions'),
+            "Element 'article-meta': Missing element permissions."),
+    ]),
+    Pattern('trans-abstract_has_p_or_sec', ARTICLE_META + '/trans-abstract', [
+        Assert(has_child('p', 'sec'), "Element 'trans-abstract': Missing element p or sec."),
+    ]),
+    Pattern('trans-abstract_lang', ARTICLE_META + '/trans-abstract', [
+        Assert(has_attr('xml:lang'), "Element 'trans-abstract': Missing attribute xml:lang."),
+    ]),
+    Pattern('abstract_has_p_or_sec', ARTICLE_META + '/abstract', [
+        Assert(has_child('p', 'sec'), "Element 'abstract': Missing element p or sec."),
+    ]),
+    Pattern('abstract_lang', ARTICLE_META + '/abstract', [
+        Assert(has_attr('xml:lang'), "Element 'abstract': Missing attribute xml:lang."),
+    ]),
+    Pattern('kwd-group_cannot_have_nested-kwd', ARTICLE_META + '/kwd-group', [
+        Assert(lacks_child('nested-kwd'), "Element 'kwd-group': Unexpected element nested-kwd."),
+    ]),
+    Pattern('kwd-group_cannot_have_compounded-kwd', ARTICLE_META + '/kwd-group', [
+        Assert(lacks_child('compounded-kwd'),
+            "Element 'kwd-group': Unexpected element compounded-kwd."),
+    ]),
+    Pattern('kwd-group_lang', ARTICLE_META + '/kwd-group', [
+        Assert(has_attr('xml:lang'), "Element 'kwd-group': Missing attribute xml:lang."),
+    ]),
+    Pattern('article-id_doi_value', ARTICLE_META + "/article-id[@pub-id-type='doi']", [
+        Assert(searches(DOI_IN_ARTICLE_ID),
+            with_string('Element \'article-id[@pub-id-type="doi"]\': Invalid value \'%s\'.')),
+    ]),
+    assert_not_empty('article-id_notempty', ARTICLE_META + '/article-id'),
+    Pattern('article-id_attributes', ARTICLE_META + '/article-id', [
+        Assert(has_attr('pub-id-type'), "Element 'article-id': Missing attribute @pub-id-type."),
+    ]),
+    Pattern('article-id_pub-id-type_values', ARTICLE_META + '/article-id[@pub-id-type]', [
+        Assert(attr_in('pub-id-type', ['doi', 'publisher-id']),
+            with_attr('Element \'article-id\', attribute pub-id-type: Invalid value "%s".', 'pub-id-type')),
+    ]),
+    Pattern('history_has_date', ARTICLE_META + '/history', [
+        Assert(has_child('date'), "Element 'history': Missing elements date."),
+    ]),
+    Pattern('history', ARTICLE_META + '/history/date', [
+        Assert(attr_in('date-type', HISTORY_DATE_TYPES),
+            with_attr('Element \'date\', attribute date-type: Invalid value "%s".', 'date-type')),
+    ]),
+    assert_not_empty('fpage_notempty', ARTICLE_META + '/fpage'),
+    assert_not_empty('lpage_notempty', ARTICLE_META + '/lpage'),
+    assert_not_empty('elocation-id_notempty', ARTICLE_META + '/elocation-id'),
+    Pattern('month', '//month', [
+        Assert(searches(MONTH), with_string("Element 'month': Invalid value '%s'.")),
+    ]),
+    occurs_zero_or_once('month_cardinality_element-citation', ELEMENT_CITATION, 'month'),
+    occurs_zero_or_once('month_cardinality_article-meta', ARTICLE_META + '/pub-date', 'month'),
+    Pattern('pub-date_with_date-type_pub_must_have_day_month_year',
+            ARTICLE_META + "/pub-date[@date-type='pub']", [
+        Assert(has_child('day'),
+            "Element 'pub-date' with @date-type='pub': Expected element day."),
+        Assert(has_child('month'),
+            "Element 'pub-date' with @date-type='pub': Expected element month."),
+        Assert(has_child('year'),
+            "Element 'pub-date' with @date-type='pub': Expected element year."),
+    ]),
+    Pattern('pub-date_must_have_date-type_collection', ARTICLE_META, [
+        Assert(has_child('pub-date', date_type='collection'),
+            "Element 'article-meta': Expected element pub-date with attribute date-type=collection."),
+    ]),
+    Pattern('pub-date_with_date-type_equal_pub_must_have_publication-format',
+            ARTICLE_META + "/pub-date[@date-type='pub']", [
+        Assert(has_attr('publication-format'),
+            "Element 'pub-date': Missing Attribute @publication-format."),
+    ]),
+    Pattern('pub-date_must_have_date-type', ARTICLE_META + '/pub-date', [
+        Assert(has_attr('date-type'), "Element 'pub-date': Missing Attribute @date-type."),
+    ]),
+    Pattern('pub-date_publication_format', ARTICLE_META + "/pub-date[@date-type='pub']", [
+        Assert(attr_in('publication-format', ['epub', 'ppub']),
+            with_attr('Element \'pub-date\', attribute publication-format: Invalid value "%s".', 'publication-format')),
+    ]),
+    Pattern('pub-date_date_type', ARTICLE_META + '/pub-date', [
+        Assert(attr_in('date-type', ['pub', 'collection']),
+            with_attr('Element \'pub-date\', attribute date-type: Invalid value "%s".', 'date-type')),
+    ]),
+    assert_not_empty('volume_notempty', ARTICLE_META + '/volume'),
+    occurs_zero_or_once('volume_cardinality_at_element-citation', ELEMENT_CITATION, 'volume'),
+    occurs_zero_or_once('volume_cardinality_at_article-meta', ARTICLE_META, 'volume'),
+    occurs_zero_or_once('volume_cardinality_at_product', ARTICLE_META + '/product', 'volume'),
+    assert_not_empty('issue_notempty', ARTICLE_META + '/issue'),
+    occurs_zero_or_once('issue_cardinality_at_element-citation', ELEMENT_CITATION, 'issue'),
+    occurs_zero_or_once('issue_cardinality_at_article-meta', ARTICLE_META, 'issue'),
+    occurs_zero_or_once('issue_cardinality_at_product', ARTICLE_META + '/product', 'issue'),
+    Pattern('fn-group_has_fn', 'article/back/fn-group', [
+        Assert(has_child('fn'), "Element 'fn-group': Missing element fn."),
+    ]),
+    Pattern('fn_has_id', 'article/back/fn-group/fn', [
+        Assert(has_attr('id'), "Element 'fn': Missing attribute @id."),
+    ]),
+    Pattern('app_has_id', 'article/back/app-group/app', [
+        Assert(has_attr('id'), "Element 'app': Missing attribute @id."),
+    ]),
+    Pattern('pub-id_doi_value', ELEMENT_CITATION + "/pub-id[@pub-id-type='doi']", [
+        Assert(searches(DOI_IN_PUB_ID),
+            with_string('Element \'pub-id[@pub-id-type="doi"]\': Invalid value \'%s\'.')),
+    ]),
+    Pattern('pub-id_has_pub-id-type', ELEMENT_CITATION + '/pub-id', [
+        Assert(has_attr('pub-id-type'), "Element 'pub-id': Missing attribute pub-id-type."),
+    ]),
+    assert_not_empty('pub-id_notempty', ELEMENT_CITATION + '/pub-id'),
+    Pattern('journal-meta_has_journal-id', JOURNAL_META, [
+        Assert(has_child('journal-id', journal_id_type='erudit'),
+            "Element 'journal-meta': Missing element journal_id with attribute journal-id-type=erudit"),
+    ]),
+    Pattern('journal-meta_has_journal-title-group', JOURNAL_META, [
+        Assert(has_child('journal-title-group'),
+            "Element 'journal-meta': Missing element journal-title-group."),
+    ]),
+    Pattern('has_journal-title', JOURNAL_META + '/journal-title-group', [
+        Assert(has_child('journal-title'),
+            "Element 'journal-title-group': Missing element journal-title."),
+    ]),
+    assert_not_empty('journal-title_notempty',
+            JOURNAL_META + '/journal-title-group/journal-title'),
+    assert_not_empty('abbrev-journal-title_notempty',
+            JOURNAL_META + '/journal-title-group/abbrev-journal-title'),
+    occurs_once('journal-id_cardinality', JOURNAL_META + '/journal-title-group',
+            'journal-title'),
+    occurs_once('element-citation_cardinality', 'article/back/ref-list/ref',
+            'element-citation'),
+    assert_not_empty('styled-content_notempty', ELEMENT_CITATION + '/styled-content'),
+    Pattern('ref_has_element-citation', 'article/back/ref-list/ref', [
+        Assert(has_child('element-citation'), "Element 'ref': Missing element element-citation."),
+    ]),
+    Pattern('element-citation_has_styled-content', ELEMENT_CITATION, [
+        Assert(has_child('styled-content'),
+            "Element 'element-citation': Missing element styled-content."),
+    ]),
+    Pattern('ack', 'article/back/ack', [
+        Assert(lacks_child('sec'), "Element 'ack': Unexpected element sec."),
+    ]),
+    Pattern('trans-title_lang',
+            JOURNAL_META + '/journal-title-group/trans-title-group/trans-title', [
+        Assert(lacks_attr('xml:lang'), "Element 'trans-title': Unexpected attribute xml:lang."),
+    ]),
+    Pattern('trans-title-group_lang', JOURNAL_META + '/journal-title-group/trans-title-group', [
+        Assert(has_attr('xml:lang'), "Element 'trans-title-group': Missing attribute xml:lang."),
+    ]),
+    Pattern('publisher', JOURNAL_META, [
+        Assert(has_child('publisher'), "Element 'journal-meta': Missing element publisher."),
+    ]),
+    assert_not_empty('publisher_notempty', JOURNAL_META + '/publisher/publisher-name'),
+    Pattern('article_attributes', 'article', [
+        Assert(has_attr('article-type'), "Element 'article': Missing attribute article-type."),
+        Assert(has_attr('xml:lang'), "Element 'article': Missing attribute xml:lang."),
+        Assert(has_attr('dtd-version'), "Element 'article': Missing attribute dtd-version."),
+        Assert(has_attr('specific-use'),
+            "Element 'article': Missing EPS version at the attribute specific-use."),
+    ]),
+    Pattern('article_article-type-values', 'article[@article-type]', [
+        Assert(attr_in('article-type', ARTICLE_TYPES),
+            with_attr("Element 'article', attribute article-type: Invalid value '%s'.", 'article-type')),
+    ]),
+    Pattern('article_specific-use-values', 'article[@specific-use]', [
+        Assert(attr_in('specific-use', ['eps-0.1']),
+            with_attr("Element 'article', attribute specific-use: Invalid value '%s'.", 'specific-use')),
+    ]),
+    assert_not_empty('journal-id_notempty', JOURNAL_META + '/journal-id'),
+    Pattern('journal-id_has_erudit-id', JOURNAL_META, [
+        Assert(has_child('journal-id', journal_id_type='erudit'),
+            'Element \'journal-meta\': Missing element journal-id with journal-id-type="erudit".'),
+    ]),
+    Pattern('journal-id_values', JOURNAL_META + '/journal-id[@journal-id-type]', [
+        Assert(attr_in('journal-id-type', ['erudit', 'publisher', 'ojs', 'doi']),
+            with_attr('Element \'journal-id\', attribute journal-id-type: Invalid value "%s".', 'journal-id-type')),
+    ]),
+    Pattern('issn_pub_type_epub_or_ppub', JOURNAL_META, [
+        Assert(lambda elem, doc: (has_child('issn', pub_type='epub')(elem, doc) or
+                                  has_child('issn', pub_type='ppub')(elem, doc)),
+            'Element \'journal-meta\': Missing element issn with pub-type=("epub" or "ppub").'),
+    ]),
+    assert_not_empty('issn_notempty', JOURNAL_META + '/issn'),
+    Pattern('issn_isvalid', '//issn', [
+        Assert(searches(ISSN), "Element 'issn': Invalid issn=([0-9]{4}-[0-9]{3}[0-9xX])."),
+    ]),
+]
+
+
+class NativeValidator(object):
+    """Validates documents against the eps-0.1 rules in a single traversal.
+
+    Implements the protocol of packtools' validators, i.e. the method
+    ``validate(xmlfile) -> Tuple(bool, list)``.
+
+    :param phase: (optional) restrict the validation to the patterns of a
+                  phase declared in ``erudit-style-0.1.sch``.
+    :param label: (optional) the label set on each error.
+    """
+    def __init__(self, phase=None, label=''):
+        if phase is None:
+            patterns = PATTERNS
+        else:
+            phases = schematron.schema_phases(catalog['SCH_SCHEMAS']['eps-0.1'])
+            try:
+                active = set(phases[phase])
+            except KeyError:
+                raise ValueError('unrecognized phase: "%s"' % phase)
+            patterns = [p for p in PATTERNS if p.id in active]
+
+        self.label = label
+        self.patterns = patterns
+        self._dispatch = collections.defaultdict(list)
+        for index, pattern in enumerate(patterns):
+            self._dispatch[pattern.context.tag].append((index, pattern))
+
+    def iter_failures(self, xmlfile):
+        """Yields ``(pattern_id, element, message)`` for each failed
+        assertion, ordered by pattern and then by document order.
+        """
+        try:
+            root = xmlfile.getroot()
+        except AttributeError:
+            root = xmlfile
+
+        doc = Document(root)
+        failures = collections.defaultdict(list)
+        deferred = []
+        for elem in root.iter(etree.Element):
+            doc.collect(elem)
+            for index, pattern in self._dispatch.get(elem.tag, ()):
+                if not pattern.context.matches(elem):
+                    continue
+                if pattern.deferred:
+                    deferred.append((index, pattern, elem))
+                else:
+                    self._run(index, pattern, elem, doc, failures)
+
+        for index, pattern, elem in deferred:
+            self._run(index, pattern, elem, doc, failures)
+
+        for index in sorted(failures):
+            for failure in failures[index]:
+                yield failure
+
+    def _run(self, index, pattern, elem, doc, failures):
+        for assertion in pattern.asserts:
+            if not assertion.test(elem, doc):
+                failures[index].append(
+                        (pattern.id, elem, assertion.format(elem)))
+
+    def validate(self, xmlfile):
+        """Validate xmlfile against the eps-0.1 rules.
+
+        Returns a tuple comprising the validation status and the errors list.
+        """
+        errors = []
+        for _, elem, message in self.iter_failures(xmlfile):
+            err = StyleError()
+            err.line = elem.sourceline
+            err.message = message
+            err.label = self.label
+            errors.append(err)
+
+        return not errors, errors
@@ -0,0 +1,80 @@
+#coding: utf-8
+"""Tag-presence prefilter of the Schematron patterns.
+
+Most patterns only fire on elements of a few names: ``xhtml-table`` on
+``table``, the ``fig_*`` patterns on ``fig``, the ``list_*`` patterns on
+``list``. The validator XSLT nevertheless matches the rule contexts of every
+pattern against every node of the document. :class:`PrefilteredXSLT`
+collects the names of the elements of each document in a single pass, and
+runs a validator built from the applicable patterns only, i.e. those with a
+rule context naming one of these elements. The other patterns could not
+report anything, so results are unchanged.
+
+Usage::
+
+    >>> xslt = PrefilteredXSLT(schematron.schema_xslt('eps-0.1'))
+    >>> report = xslt(et)
+"""
+from __future__ import unicode_literals
+import logging
+import collections
+
+from lxml import etree
+
+from erudit_catalog import schematron
+
+LOGGER = logging.getLogger(__name__)
+
+
+def required_elements(xslt_doc):
+    """Maps the ids of the patterns run by the validator XSLT `xslt_doc` to
+    the set of the names of the elements one of which must be present for
+    their rules to fire, or ``None`` if they may fire on any document.
+    """
+    required = collections.OrderedDict()
+    for pattern_id, names in schematron.rule_contexts(xslt_doc).items():
+        required[pattern_id] = (None if schematron.WILDCARD in names
+                else frozenset(names))
+
+    return required
+
+
+def element_names(xmlfile):
+    """The set of the names of the elements of `xmlfile`, an ``etree``
+    element or tree. Names of namespaced elements are in Clark notation,
+    which unprefixed rule contexts never match.
+    """
+    try:
+        root = xmlfile.getroot()
+    except AttributeError:
+        root = xmlfile
+
+    return set(elem.tag for elem in root.iter(etree.Element))
+
+
+class PrefilteredXSLT(object):
+    """Runs the validator XSLT `xslt_doc` with only the patterns applicable
+    to each document, and returns its SVRL report as ``etree.XSLT`` does.
+
+    The validators of the `maxsize` most recently used sets of applicable
+    patterns are kept compiled. Instances must not be shared between
+    threads.
+    """
+    def __init__(self, xslt_doc, maxsize=32):
+        self.required = required_elements(xslt_doc)
+        self._selections = schematron.PatternSelections(xslt_doc,
+                maxsize=maxsize)
+
+    def applicable_patterns(self, xmlfile):
+        """The set of the ids of the patterns that may fire on `xmlfile`.
+        """
+        names = element_names(xmlfile)
+        return frozenset(pattern_id
+                for pattern_id, required in self.required.items()
+                if required is None or not required.isdisjoint(names))
+
+    def __call__(self, xmlfile):
+        applicable = self.applicable_patterns(xmlfile)
+        LOGGER.debug('running %s of %s patterns', len(applicable),
+                len(self.required))
+        return self._selections.get(applicable)(xmlfile)
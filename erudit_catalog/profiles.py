@@ -0,0 +1,124 @@
+#coding: utf-8
+"""Named validation profiles.
+
+A profile is a set of Schematron phases, validated together by a single
+validator that runs the union of their active patterns. The patterns of
+other phases are left out of the validator XSLT, so that a profile such as
+``metadata-only`` skips the rules about the body and back matter entirely.
+
+Usage::
+
+    >>> sch = ProfileSchematron('eps-0.1', 'metadata-only')
+    >>> sch.validate(et)
+"""
+from __future__ import unicode_literals
+import collections
+
+from erudit_catalog import catalog, schematron
+
+# maps profile names to the phases they validate, or ``None`` for all the
+# patterns of the schema.
+PROFILES = collections.OrderedDict([
+    ('metadata-only', (
+        'phase.journal-meta',
+        'phase.journal-id',
+        'phase.issn',
+        'phase.article-attrs',
+        'phase.publisher',
+        'phase.journal-title-group',
+        'phase.trans-title-group',
+        'phase.trans-title',
+        'phase.volume',
+        'phase.issue',
+        'phase.issue-title',
+        'phase.pub-date',
+        'phase.month',
+        'phase.pages',
+        'phase.history',
+        'phase.article-id',
+        'phase.kwd-group',
+        'phase.abstract',
+        'phase.trans-abstract',
+        'phase.permissions',
+        'phase.name',
+        'phase.contrib-group',
+        'phase.contrib',
+        'phase.contrib-id',
+        'phase.collab',
+        'phase.aff',
+        'phase.institution',
+        'phase.self-uri',
+    )),
+    ('references', (
+        'phase.ref',
+        'phase.element-citation',
+        'phase.styled-content',
+        'phase.pub-id',
+        'phase.xref_reftype_integrity',
+        'phase.rid_integrity_all',
+    )),
+    ('full', None),
+])
+
+
+def phases_patterns(schema_path, phases):
+    """The union of the active patterns of `phases`, in the order they are
+    first activated.
+    """
+    schema_phases = schematron.schema_phases(schema_path)
+
+    patterns = []
+    for phase in phases:
+        try:
+            active = schema_phases[phase]
+        except KeyError:
+            raise ValueError('unrecognized phase: "%s"' % phase)
+
+        patterns.extend(p for p in active if p not in patterns)
+
+    return patterns
+
+
+def profile_patterns(schema_name, profile):
+    """The ids of the patterns run by `profile`, or ``None`` if it runs all
+    the patterns of `schema_name`.
+    """
+    try:
+        phases = PROFILES[profile]
+    except KeyError:
+        raise ValueError('unrecognized profile: "%s"' % profile)
+
+    try:
+        schema_path = catalog['SCH_SCHEMAS'][schema_name]
+    except KeyError:
+        raise ValueError('unrecognized schema: "%s"' % schema_name)
+
+    if phases is None:
+        return None
+
+    return phases_patterns(schema_path, phases)
+
+
+def profile_xslt(schema_name, profile, cache_dir=None):
+    """Returns the validator XSLT document running the patterns of
+    `profile`, derived from the one of `schema_name` in the on-disk cache of
+    :mod:`erudit_catalog.schematron`.
+    """
+    patterns = profile_patterns(schema_name, profile)
+    xslt_doc = schematron.schema_xslt(schema_name, cache_dir=cache_dir)
+    if patterns is not None:
+        xslt_doc = schematron.select_patterns(xslt_doc, patterns)
+
+    return xslt_doc
+
+
+def ProfileSchematron(schema_name, profile, cache_dir=None):
+    """Factory of ``isoschematron.Schematron`` instances running the patterns
+    of `profile`.
+
+    :param schema_name: the schema name, e.g. ``eps-0.1``.
+    :param profile: the profile name in :data:`PROFILES`.
+    :param cache_dir: (optional) defaults to ``catalog['SCH_CACHE_DIR']``.
+    """
+    return schematron.PrecompiledSchematron(profile_xslt(schema_name, profile,
+        cache_dir=cache_dir))
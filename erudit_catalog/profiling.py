@@ -0,0 +1,125 @@
+#coding: utf-8
+"""Per-pattern profiling of Schematron validations.
+
+The validator XSLT compiled from a Schematron schema runs each active pattern
+from its root template, as an ``svrl:active-pattern`` element followed by an
+``xsl:apply-templates`` in the pattern's own mode. :class:`PatternProfiler`
+derives from it one stylesheet per pattern, keeping only the instructions of
+that pattern in the root template, and runs them one at a time to measure
+the wall time, the number of fired rules and of failed assertions of each
+pattern for a given document.
+
+Usage::
+
+    python -m erudit_catalog.profiling article.xml --sort > profile.json
+"""
+from __future__ import unicode_literals
+import sys
+import json
+import time
+import logging
+import argparse
+
+from lxml import etree
+
+from erudit_catalog import catalog, schematron
+
+LOGGER = logging.getLogger(__name__)
+
+SVRL_NS = schematron.SVRL_NS
+
+
+def pattern_xslt(xslt_doc, pattern_id=None):
+    """A copy of the validator XSLT `xslt_doc` that runs only `pattern_id`,
+    or none of the patterns if `pattern_id` is ``None``.
+    """
+    if pattern_id is None:
+        return schematron.select_patterns(xslt_doc, [])
+
+    if pattern_id not in schematron.pattern_ids(xslt_doc):
+        raise ValueError('unrecognized pattern: "%s"' % pattern_id)
+
+    return schematron.select_patterns(xslt_doc, [pattern_id])
+
+
+class PatternProfiler(object):
+    """Measures each pattern of a Schematron schema on given documents.
+
+    :param schema_name: (optional) the schema name in ``catalog['SCH_SCHEMAS']``.
+    :param phase: (optional) the phase id. All patterns are profiled by
+                  default.
+    :param cache_dir: (optional) defaults to ``catalog['SCH_CACHE_DIR']``.
+    """
+    def __init__(self, schema_name='eps-0.1', phase=None, cache_dir=None):
+        try:
+            schema_path = catalog['SCH_SCHEMAS'][schema_name]
+        except KeyError:
+            raise ValueError('unrecognized schema: "%s"' % schema_name)
+
+        xslt_doc = schematron.validator_xslt(schema_path, phase=phase,
+                cache_dir=cache_dir)
+        self.pattern_ids = schematron.pattern_ids(xslt_doc)
+        self._baseline = etree.XSLT(pattern_xslt(xslt_doc))
+        self._transforms = [(pattern_id, etree.XSLT(pattern_xslt(xslt_doc, pattern_id)))
+                            for pattern_id in self.pattern_ids]
+
+    def _timed(self, transform, xmlfile, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            report = transform(xmlfile)
+            timings.append(time.perf_counter() - start)
+
+        return min(timings), report
+
+    def profile(self, xmlfile, repeat=1):
+        """Profiles the patterns on `xmlfile`, an ``etree._ElementTree``
+        instance.
+
+        Returns a dict with the keys ``overhead``, the time spent in the
+        validator XSLT when no pattern is run, and ``patterns``, a list of
+        dicts with the keys ``pattern``, ``seconds``, ``fired_rules`` and
+        ``failed_asserts``, in the order of the schema. Times are the best of
+        `repeat` runs and exclude the overhead.
+        """
+        overhead, _ = self._timed(self._baseline, xmlfile, repeat)
+
+        patterns = []
+        for pattern_id, transform in self._transforms:
+            seconds, report = self._timed(transform, xmlfile, repeat)
+            patterns.append({
+                'pattern': pattern_id,
+                'seconds': max(seconds - overhead, 0.0),
+                'fired_rules': int(report.xpath(
+                    'count(//svrl:fired-rule)', namespaces={'svrl': SVRL_NS})),
+                'failed_asserts': int(report.xpath(
+                    'count(//svrl:failed-assert)', namespaces={'svrl': SVRL_NS})),
+            })
+
+        return {'overhead': overhead, 'patterns': patterns}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Profile the Schematron patterns on an article. '
+                        'The results are written as JSON.')
+    parser.add_argument('xmlfile')
+    parser.add_argument('--schema', default='eps-0.1')
+    parser.add_argument('--phase', default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sort', action='store_true',
+            help='sort patterns by time, slowest first')
+    args = parser.parse_args(argv)
+
+    profiler = PatternProfiler(args.schema, phase=args.phase)
+    result = profiler.profile(etree.parse(args.xmlfile), repeat=args.repeat)
+    if args.sort:
+        result['patterns'].sort(key=lambda p: p['seconds'], reverse=True)
+
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
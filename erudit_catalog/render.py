@@ -0,0 +1,237 @@
+#coding: utf-8
+"""Batch rendering of articles to HTML.
+
+``erudit-render-html`` renders batches of articles, given as files,
+directories or glob patterns, in a pool of processes. Each worker renders
+with the compiled stylesheets of :func:`erudit_catalog.htmlgen.get_transform`,
+so that they are compiled once per process. The static assets of the HTML
+generator are copied once to the ``static`` directory of the output tree,
+and the pages link to them with relative paths.
+
+The output tree mirrors the input tree: the article at ``<root>/a/b.xml``,
+where ``<root>`` is the deepest directory common to all the articles, is
+rendered to ``a/b/<lang>.html``, one file per language. Packages, where each
+article is named ``document.xml``, are thus kept apart. One JSON object per
+article is written to the standard output as soon as it is rendered.
+"""
+from __future__ import unicode_literals
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+from concurrent import futures
+
+from lxml import etree
+from packtools import domain, exceptions
+
+from erudit_catalog import assets, catalog, cli, htmlgen
+
+LOGGER = logging.getLogger(__name__)
+
+STATIC_DIRNAME = 'static'
+
+# maps the parameters of packtools' ``HTMLGenerator`` to the catalog entries
+# of the static assets they link to.
+ASSETS = (
+    ('css', 'HTML_GEN_DEFAULT_CSS_PATH'),
+    ('print_css', 'HTML_GEN_DEFAULT_PRINT_CSS_PATH'),
+    ('js', 'HTML_GEN_DEFAULT_JS_PATH'),
+)
+
+XMLPARSER = etree.XMLParser(remove_blank_text=True, load_dtd=False,
+        no_network=True, resolve_entities=False)
+
+
+def write_assets(output_dir):
+    """Copies the static assets of the HTML generator, i.e. their bundles,
+    or their sources if they were not built, to the ``static`` directory of
+    `output_dir`.
+
+    Returns the dict of the keyword arguments of packtools' ``HTMLGenerator``
+    linking to them, relative to `output_dir`. The gzip precompressed
+    variants of built assets are copied along with them. Missing assets are
+    logged and not linked to.
+    """
+    static_dir = os.path.join(output_dir, STATIC_DIRNAME)
+    if not os.path.isdir(static_dir):
+        os.makedirs(static_dir)
+
+    links = {}
+    for param, catalog_key in ASSETS:
+        source = assets.bundle_path(catalog[catalog_key])
+        if not os.path.isfile(source):
+            LOGGER.warning('cannot find the static asset "%s"', source)
+            continue
+
+        basename = os.path.basename(source)
+        shutil.copyfile(source, os.path.join(static_dir, basename))
+        if os.path.isfile(source + '.gz'):
+            shutil.copyfile(source + '.gz',
+                    os.path.join(static_dir, basename + '.gz'))
+        links[param] = '%s/%s' % (STATIC_DIRNAME, basename)
+
+    return links
+
+
+def output_name(filename, root):
+    """The path of the directory where the article at `filename` is
+    rendered, relative to the output directory: its path relative to `root`,
+    without extension.
+    """
+    return os.path.splitext(os.path.relpath(filename, root))[0]
+
+
+def render_file(filename, output_dir, version=htmlgen.DEFAULT_VERSION,
+        links=None, name=None):
+    """Renders the article at `filename` to the directory `name` of
+    `output_dir`, one file per language.
+
+    Returns a dict with the keys ``filename`` and ``outputs``, the list of the
+    written files, or ``filename`` and ``error`` if the article cannot be
+    rendered.
+
+    :param links: (optional) keyword arguments of packtools' ``HTMLGenerator``
+                  linking to the static assets, as returned by
+                  :func:`write_assets`.
+    :param name: (optional) defaults to the name of `filename` without
+                 extension.
+    """
+    if name is None:
+        name = os.path.splitext(os.path.basename(filename))[0]
+    page_dir = os.path.join(output_dir, name)
+    # `links` are relative to the output directory, and those of the pages
+    # to their own directory.
+    prefix = os.path.relpath(output_dir, page_dir).replace(os.sep, '/')
+    page_links = dict((param, '%s/%s' % (prefix, link))
+            for param, link in (links or {}).items())
+
+    try:
+        et = etree.parse(filename, XMLPARSER)
+        generator = domain.HTMLGenerator.parse(et, valid_only=False,
+                xslt=htmlgen.get_transform(version), **page_links)
+
+        languages = generator.languages
+        if len(set(languages)) != len(languages):
+            raise ValueError('duplicated languages: "%s"' % '", "'.join(languages))
+
+        if not os.path.isdir(page_dir):
+            os.makedirs(page_dir)
+
+        outputs = []
+        for lang, html in generator:
+            output = os.path.join(page_dir, '%s.html' % lang)
+            html.write_output(output)
+            outputs.append(output)
+
+    except (etree.Error, exceptions.HTMLGenerationError, ValueError,
+            IOError, OSError) as exc:
+        LOGGER.info('cannot render "%s": %s', filename, exc)
+        return {'filename': filename, 'error': str(exc)}
+
+    return {'filename': filename, 'outputs': outputs}
+
+
+def render_files(filenames, output_dir, version=htmlgen.DEFAULT_VERSION,
+        max_workers=None, chunksize=4, root=None):
+    """Renders `filenames` to `output_dir` in a pool of `max_workers`
+    processes, after copying the static assets to it.
+
+    Returns an iterator of results, as produced by :func:`render_file`, in
+    the same order as `filenames`. With ``max_workers=1`` files are rendered
+    in the current process. Files that would be rendered to the same
+    directory as an earlier one, such as repeated files, are not rendered,
+    and their results hold an error.
+
+    :param root: (optional) the directory the output tree mirrors. Defaults
+                 to the deepest directory common to `filenames`.
+    """
+    filenames = [os.path.abspath(filename) for filename in filenames]
+    if root is None and filenames:
+        root = os.path.commonpath([os.path.dirname(filename)
+            for filename in filenames])
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    links = write_assets(output_dir)
+
+    # the index of the first file rendered to the directory of each file.
+    owners = []
+    first = {}
+    tasks = []
+    for i, filename in enumerate(filenames):
+        name = output_name(filename, root)
+        # case-insensitive file systems would merge names differing in case.
+        owners.append(first.setdefault(name.lower(), i))
+        if owners[i] == i:
+            tasks.append((filename, name))
+
+    if max_workers == 1:
+        results = (render_file(filename, output_dir, version, links, name)
+                for filename, name in tasks)
+        for result in _with_skipped(filenames, owners, results):
+            yield result
+        return
+
+    with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(render_file,
+                [filename for filename, _ in tasks],
+                [output_dir] * len(tasks),
+                [version] * len(tasks),
+                [links] * len(tasks),
+                [name for _, name in tasks], chunksize=chunksize)
+        for result in _with_skipped(filenames, owners, results):
+            yield result
+
+
+def _with_skipped(filenames, owners, results):
+    # interleaves the results of the files that were not rendered.
+    for i, filename in enumerate(filenames):
+        if owners[i] == i:
+            yield next(results)
+        else:
+            owner = filenames[owners[i]]
+            LOGGER.info('not rendering "%s" over "%s"', filename, owner)
+            yield {'filename': filename,
+                   'error': 'would overwrite the output of "%s"' % owner}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description='Render articles to HTML. Results are written as '
+                        'JSON lines.')
+    parser.add_argument('paths', nargs='+',
+            help='files, directories or glob patterns')
+    parser.add_argument('-o', '--output-dir', required=True,
+            help='directory where the HTML files and static assets are '
+                 'written')
+    parser.add_argument('--pattern', default='*.xml',
+            help='file name pattern used to search directories '
+                 '(default: %(default)s)')
+    parser.add_argument('--version', default=htmlgen.DEFAULT_VERSION,
+            help='version of the HTML generator stylesheets '
+                 '(default: %(default)s)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+            help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--loglevel', default='WARNING')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper()))
+
+    filenames = list(cli.iter_filenames(args.paths, pattern=args.pattern))
+    LOGGER.info('rendering %s files', len(filenames))
+
+    all_rendered = True
+    results = render_files(filenames, args.output_dir, version=args.version,
+            max_workers=args.jobs)
+    for count, result in enumerate(results, 1):
+        all_rendered = all_rendered and 'error' not in result
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+        LOGGER.info('rendered %s of %s files', count, len(filenames))
+
+    return 0 if all_rendered else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
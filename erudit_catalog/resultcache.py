@@ -0,0 +1,249 @@
+#coding: utf-8
+"""Cache of validation results keyed by the contents of the articles.
+
+Results are stored in a SQLite database under a key derived from the
+SHA-256 digest of the article bytes and the fingerprint of the rules they
+were validated against: the schema name, the digests of its Schematron file,
+of the DTD files and of the modules of the package, and the versions
+of packtools, lxml, libxml2 and libxslt. Changing any of them invalidates
+the results computed before. The database is bounded in size by evicting
+the least recently used results.
+"""
+from __future__ import unicode_literals
+import os
+import glob
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+import packtools
+from lxml import etree
+
+from erudit_catalog import catalog, schematron
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_CWD = os.path.dirname(os.path.abspath(__file__))
+
+# the files, besides the Schematron schemas, whose contents the results
+# depend on: every module of the package, so that none can be left out, and
+# the ISO 3166 codes.
+SOURCE_PATHS = tuple(sorted(glob.glob(os.path.join(_CWD, '*.py')))) + (
+    os.path.join(_CWD, 'iso3166-codes.json'),
+)
+
+LIBRARY_VERSIONS = (
+    ('packtools', packtools.__version__),
+    ('lxml', etree.LXML_VERSION),
+    ('libxml2', etree.LIBXML_VERSION),
+    ('libxslt', etree.LIBXSLT_VERSION),
+)
+
+
+def dtds_digest():
+    """Digest of the files of the DTDs of ``catalog['DTDS']``, along with the
+    modules and entity sets they include.
+    """
+    sha = hashlib.sha256()
+    dirnames = sorted(set(os.path.dirname(path)
+        for path in catalog['DTDS'].values()))
+    for dirname in dirnames:
+        for dirpath, subdirnames, filenames in os.walk(dirname):
+            subdirnames.sort()
+            for filename in sorted(filenames):
+                filepath = os.path.join(dirpath, filename)
+                sha.update(('%s %s\n' % (os.path.relpath(filepath, dirname),
+                    schematron.file_digest(filepath))).encode('utf-8'))
+
+    return sha.hexdigest()
+
+
+def rules_fingerprint(schema_name):
+    """Digest identifying the style rules of `schema_name`.
+    """
+    with _FINGERPRINTS_LOCK:
+        try:
+            return _FINGERPRINTS[schema_name]
+        except KeyError:
+            pass
+
+        try:
+            schema_path = catalog['SCH_SCHEMAS'][schema_name]
+        except KeyError:
+            raise ValueError('unrecognized schema: "%s"' % schema_name)
+
+        parts = [schema_name, schematron.file_digest(schema_path),
+                 dtds_digest()]
+        parts.extend(schematron.file_digest(path) for path in SOURCE_PATHS)
+        parts.extend('%s %s' % (name, version)
+                for name, version in LIBRARY_VERSIONS)
+        fingerprint = hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+        _FINGERPRINTS[schema_name] = fingerprint
+        return fingerprint
+
+
+def result_key(data, schema_name, phase=None, profile=None, fail_fast=False,
+        max_errors=None):
+    """The key of the results of validating `data`, the bytes of an article,
+    against `schema_name`, or only its `phase` or `profile` if given, in
+    fail-fast mode if `fail_fast` is true, reporting up to `max_errors`.
+    """
+    sha = hashlib.sha256(data)
+    sha.update(rules_fingerprint(schema_name).encode('ascii'))
+    if phase is not None:
+        sha.update(('\nphase:' + phase).encode('utf-8'))
+    if profile is not None:
+        sha.update(('\nprofile:' + profile).encode('utf-8'))
+    if fail_fast:
+        sha.update(b'\nfail-fast')
+    if max_errors is not None:
+        sha.update(('\nmax-errors:%s' % max_errors).encode('ascii'))
+    return sha.hexdigest()
+
+
+_FINGERPRINTS = {}
+_FINGERPRINTS_LOCK = threading.Lock()
+
+
+class ResultCache(object):
+    """A SQLite store of JSON-serializable results, bounded by `max_bytes`.
+
+    Instances can be shared between threads, and many processes can use the
+    same database.
+
+    :param path: (optional) path to the database. Defaults to
+                 ``results.sqlite`` at ``catalog['SCH_CACHE_DIR']``.
+    :param max_bytes: (optional) maximum size of the stored results.
+    """
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(catalog['SCH_CACHE_DIR'], 'results.sqlite')
+        self.max_bytes = max_bytes
+
+        dirname = os.path.dirname(self.path)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30,
+                check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                '  key TEXT PRIMARY KEY,'
+                '  value TEXT NOT NULL,'
+                '  size INTEGER NOT NULL,'
+                '  accessed REAL NOT NULL)')
+        self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        # the total size of the results, kept up to date by triggers so that
+        # puts do not sum the sizes of all of them.
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS totals ('
+                    '  id INTEGER PRIMARY KEY CHECK (id = 0),'
+                    '  size INTEGER NOT NULL)')
+            self._conn.execute(
+                    'INSERT OR IGNORE INTO totals (id, size) '
+                    'SELECT 0, coalesce(sum(size), 0) FROM results')
+            self._conn.execute(
+                    'CREATE TRIGGER IF NOT EXISTS results_insert '
+                    'AFTER INSERT ON results BEGIN '
+                    '  UPDATE totals SET size = size + new.size WHERE id = 0; '
+                    'END')
+            self._conn.execute(
+                    'CREATE TRIGGER IF NOT EXISTS results_delete '
+                    'AFTER DELETE ON results BEGIN '
+                    '  UPDATE totals SET size = size - old.size WHERE id = 0; '
+                    'END')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        else:
+            self._conn.execute('COMMIT')
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT count(*) FROM results').fetchone()[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM results WHERE key = ?',
+                    (key,)).fetchone() is not None
+
+    def size(self):
+        """Total size in bytes of the stored results.
+        """
+        with self._lock:
+            return self._total()
+
+    def _total(self):
+        return self._conn.execute(
+                'SELECT size FROM totals WHERE id = 0').fetchone()[0]
+
+    def get(self, key, default=None):
+        """Returns the result stored under `key`, or `default`.
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM results WHERE key = ?',
+                    (key,)).fetchone()
+            if row is None:
+                return default
+
+            self._conn.execute('UPDATE results SET accessed = ? WHERE key = ?',
+                    (time.time(), key))
+
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        """Stores `result` under `key`, evicting the least recently used
+        results if the size limit is exceeded.
+        """
+        value = json.dumps(result, ensure_ascii=False)
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            LOGGER.info('result of %s bytes exceeds the cache size', size)
+            return
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                # replacing rows does not fire the delete trigger.
+                self._conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                self._conn.execute(
+                        'INSERT INTO results (key, value, size, accessed) '
+                        'VALUES (?, ?, ?, ?)', (key, value, size, time.time()))
+                self._evict()
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            else:
+                self._conn.execute('COMMIT')
+
+    def _evict(self):
+        total = self._total()
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self._conn.execute(
+                'SELECT key, size FROM results ORDER BY accessed'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+
+        self._conn.executemany('DELETE FROM results WHERE key = ?', evicted)
+        LOGGER.info('evicted %s results from the cache', len(evicted))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM results')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,522 @@
+#coding: utf-8
+"""Compiled Schematron validators backed by an on-disk cache.
+
+Building an ``isoschematron.Schematron`` means running the ISO include,
+abstract expansion and SVRL compilation steps before the resulting validator
+XSLT can be parsed. The validator XSLT produced by these steps is stored at
+``catalog['SCH_CACHE_DIR']``, keyed by the digest of the schema file and the
+versions of lxml and libxslt, so that other processes only pay for parsing it.
+
+Within a process, :class:`PhaseRegistry` keeps the most recently used phases
+compiled.
+
+The validator XSLT runs each active pattern from its root template, as an
+``svrl:active-pattern`` element followed by an ``xsl:apply-templates`` in the
+pattern's own mode. :func:`select_patterns` derives from it validators that
+run only some of the patterns, and :class:`FailFastSchematron` validators
+that run them in a given order and stop at the first failed assertion.
+"""
+from __future__ import unicode_literals
+import os
+import re
+import copy
+import logging
+import hashlib
+import tempfile
+import threading
+import collections
+
+from lxml import etree, isoschematron
+
+from erudit_catalog import catalog
+
+LOGGER = logging.getLogger(__name__)
+
+NOIDS_XMLPARSER = etree.XMLParser(collect_ids=False)
+
+SCH_NS = 'http://purl.oclc.org/dsdl/schematron'
+XSL_NS = 'http://www.w3.org/1999/XSL/Transform'
+SVRL_NS = 'http://purl.oclc.org/dsdl/svrl'
+
+# stands for the rule contexts that may match elements of any name.
+WILDCARD = '*'
+
+# the default templates of the mode of each pattern.
+_DEFAULT_MATCHES = ('text()', '@*|node()')
+
+_PREDICATE_REGEX = re.compile(r'\[[^\[\]]*\]')
+_NAME_REGEX = re.compile(r'[A-Za-z_][\w.-]*')
+
+
+def file_digest(filepath):
+    """SHA-256 hex digest of the contents of `filepath`.
+    """
+    sha = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+
+
+def cache_key(schema_path, phase=None):
+    """The key under which the validator XSLT of `schema_path` is cached.
+    """
+    parts = [
+        file_digest(schema_path),
+        'lxml-' + '.'.join(str(i) for i in etree.LXML_VERSION),
+        'libxslt-' + '.'.join(str(i) for i in etree.LIBXSLT_VERSION),
+        phase or '#ALL',
+    ]
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _write_atomically(filepath, data):
+    dirname = os.path.dirname(filepath)
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.rename(tmp_path, filepath)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def compile_validator_xslt(schema_path, phase=None):
+    """Run the ISO Schematron pipeline on `schema_path` and return the
+    validator XSLT document.
+    """
+    sch_doc = etree.parse(schema_path, NOIDS_XMLPARSER)
+    schematron = isoschematron.Schematron(sch_doc, phase=phase,
+            store_xslt=True)
+    return schematron.validator_xslt
+
+
+def validator_xslt(schema_path, phase=None, cache_dir=None):
+    """Returns the validator XSLT document for `schema_path`.
+
+    The document is read from the cache if present, otherwise it is compiled
+    and stored for later use. Failing to write the cache is not an error.
+
+    :param schema_path: path to the Schematron schema.
+    :param phase: (optional) the phase id. All patterns are active by default.
+    :param cache_dir: (optional) defaults to ``catalog['SCH_CACHE_DIR']``.
+    """
+    cache_dir = cache_dir or catalog['SCH_CACHE_DIR']
+    cached_path = os.path.join(cache_dir,
+            cache_key(schema_path, phase) + '.xsl')
+
+    try:
+        with open(cached_path, 'rb') as f:
+            return etree.parse(f, NOIDS_XMLPARSER)
+    except (IOError, OSError):
+        LOGGER.info('cache miss for schema "%s" phase "%s"', schema_path, phase)
+    except etree.XMLSyntaxError:
+        LOGGER.warning('ignoring corrupted cache file "%s"', cached_path)
+
+    xslt_doc = compile_validator_xslt(schema_path, phase=phase)
+    try:
+        _write_atomically(cached_path, etree.tostring(xslt_doc))
+    except (IOError, OSError) as exc:
+        LOGGER.warning('cannot write cache file "%s": %s', cached_path, exc)
+
+    return xslt_doc
+
+
+def _root_template(xslt_doc):
+    for template in xslt_doc.getroot().iterchildren('{%s}template' % XSL_NS):
+        if template.get('match') == '/' and template.get('mode') is None:
+            return template
+
+    raise ValueError('cannot find the root template')
+
+
+def _active_patterns(xslt_doc):
+    """Yields ``(pattern_id, elements)`` for each pattern run by the root
+    template of `xslt_doc`.
+    """
+    output = _root_template(xslt_doc)[0]
+    for elem in output.iterchildren('{%s}active-pattern' % SVRL_NS):
+        pattern_id = elem.findtext('{%s}attribute[@name="id"]' % XSL_NS)
+        apply_templates = elem.getnext()
+        yield pattern_id.strip(), (elem, apply_templates)
+
+
+def pattern_ids(xslt_doc):
+    """The ids of the patterns run by the validator XSLT `xslt_doc`, in
+    order.
+    """
+    return [pattern_id for pattern_id, _ in _active_patterns(xslt_doc)]
+
+
+def pattern_rules(xslt_doc):
+    """Yields ``(pattern_id, templates)`` for each pattern run by the
+    validator XSLT `xslt_doc`, where `templates` is the list of the templates
+    compiled from its rules.
+    """
+    templates = collections.defaultdict(list)
+    for template in xslt_doc.getroot().iterchildren('{%s}template' % XSL_NS):
+        if (template.get('mode') is not None and
+                template.get('match') not in _DEFAULT_MATCHES):
+            templates[template.get('mode')].append(template)
+
+    for pattern_id, (_, apply_templates) in _active_patterns(xslt_doc):
+        yield pattern_id, templates[apply_templates.get('mode')]
+
+
+def context_names(context):
+    """The names of the elements the rule `context` may fire on, or
+    :data:`WILDCARD`.
+    """
+    # predicates only test the matched element, so the last step of each
+    # alternative is enough.
+    previous = None
+    while previous != context:
+        previous, context = context, _PREDICATE_REGEX.sub('', context)
+
+    names = set()
+    for alternative in context.split('|'):
+        steps = alternative.strip().split('/')
+        step = steps[-1].split('::')[-1]
+        if step.startswith('@') and len(steps) > 1:
+            # attribute contexts are checked along with their element.
+            step = steps[-2].split('::')[-1]
+
+        names.add(step if _NAME_REGEX.fullmatch(step) else WILDCARD)
+
+    return names
+
+
+def rule_contexts(xslt_doc):
+    """Maps the ids of the patterns run by the validator XSLT `xslt_doc` to
+    the set of the names of the elements their rules fire on, in order.
+    """
+    contexts = collections.OrderedDict()
+    for pattern_id, templates in pattern_rules(xslt_doc):
+        contexts[pattern_id] = set()
+        for template in templates:
+            contexts[pattern_id].update(context_names(template.get('match', '')))
+
+    return contexts
+
+
+def select_patterns(xslt_doc, selected_ids):
+    """A copy of the validator XSLT `xslt_doc` that runs only the patterns
+    in `selected_ids`, without the templates of the others.
+    """
+    selected_ids = set(selected_ids)
+    xslt_doc = copy.deepcopy(xslt_doc)
+    root = xslt_doc.getroot()
+
+    unknown = selected_ids.difference(pattern_ids(xslt_doc))
+    if unknown:
+        raise ValueError('unrecognized patterns: "%s"' % '", "'.join(sorted(unknown)))
+
+    dropped_modes = set()
+    for pattern_id, elements in list(_active_patterns(xslt_doc)):
+        if pattern_id in selected_ids:
+            continue
+
+        active_pattern, apply_templates = elements
+        dropped_modes.add(apply_templates.get('mode'))
+        for elem in elements:
+            elem.getparent().remove(elem)
+
+    for template in list(root.iterchildren('{%s}template' % XSL_NS)):
+        if template.get('mode') in dropped_modes:
+            root.remove(template)
+
+    return xslt_doc
+
+
+class PatternSelections(object):
+    """Compiles the validators of subsets of the patterns of the validator
+    XSLT `xslt_doc` on demand, with :func:`select_patterns`, and keeps the
+    `maxsize` most recently used ones.
+
+    The returned ``etree.XSLT`` instances keep the error log of their last
+    run, so instances must not be shared between threads.
+    """
+    def __init__(self, xslt_doc, maxsize=32):
+        self.xslt_doc = xslt_doc
+        self.maxsize = maxsize
+        self.pattern_ids = frozenset(pattern_ids(xslt_doc))
+        self._compiled = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._compiled)
+
+    def get(self, selected_ids):
+        """Returns the ``etree.XSLT`` validator running the patterns in
+        `selected_ids`.
+        """
+        selected_ids = frozenset(selected_ids)
+        try:
+            xslt = self._compiled.pop(selected_ids)
+        except KeyError:
+            if selected_ids == self.pattern_ids:
+                xslt = etree.XSLT(self.xslt_doc)
+            else:
+                xslt = etree.XSLT(select_patterns(self.xslt_doc, selected_ids))
+
+        self._compiled[selected_ids] = xslt
+        while len(self._compiled) > self.maxsize:
+            self._compiled.popitem(last=False)
+
+        return xslt
+
+
+def reorder_patterns(xslt_doc, ordered_ids):
+    """A copy of the validator XSLT `xslt_doc` that runs its patterns in the
+    order of `ordered_ids`, and the patterns not listed after them, in their
+    original order.
+    """
+    xslt_doc = copy.deepcopy(xslt_doc)
+    active_patterns = list(_active_patterns(xslt_doc))
+    if not active_patterns:
+        return xslt_doc
+
+    rank = dict((pattern_id, i) for i, pattern_id in enumerate(ordered_ids))
+    ordered = sorted(active_patterns,
+            key=lambda item: rank.get(item[0], len(rank)))
+
+    output = _root_template(xslt_doc)[0]
+    index = output.index(active_patterns[0][1][0])
+    for _, elements in active_patterns:
+        for elem in elements:
+            output.remove(elem)
+
+    for _, elements in reversed(ordered):
+        for elem in reversed(elements):
+            output.insert(index, elem)
+
+    return xslt_doc
+
+
+# prefixes the messages of the failed assertions of fail-fast validators.
+_FAIL_FAST_MARKER = 'erudit-fail-fast:'
+
+
+class FailedAssert(object):
+    """An ``svrl:failed-assert`` reported by :class:`FailFastSchematron`,
+    standing for the error log entries of ``isoschematron.Schematron``.
+    """
+    line = None
+
+    def __init__(self, test, location, text):
+        self.test = test
+        self.location = location
+        self.text = text
+
+    @property
+    def message(self):
+        elem = etree.Element('{%s}failed-assert' % SVRL_NS,
+                nsmap={'svrl': SVRL_NS}, test=self.test, location=self.location)
+        etree.SubElement(elem, '{%s}text' % SVRL_NS).text = self.text
+        return etree.tostring(elem, encoding='unicode')
+
+
+class FailFastSchematron(object):
+    """Validates documents against a validator XSLT, stopping at the first
+    failed assertion.
+
+    Each ``svrl:failed-assert`` of `xslt_doc` is followed by an
+    ``xsl:message`` that terminates the transformation, so that the patterns
+    and rules after the first failure are not run. Provides the ``validate``
+    method and the ``error_log`` attribute of ``isoschematron.Schematron``.
+
+    :param xslt_doc: the validator XSLT document.
+    :param order: (optional) the ids of the patterns to run first.
+    """
+    def __init__(self, xslt_doc, order=()):
+        xslt_doc = reorder_patterns(xslt_doc, order)
+
+        self._tests = []
+        for failed_assert in xslt_doc.getroot().iter('{%s}failed-assert' % SVRL_NS):
+            location = failed_assert.find('{%s}attribute[@name="location"]' % XSL_NS)
+            text = failed_assert.find('{%s}text' % SVRL_NS)
+
+            message = etree.Element('{%s}message' % XSL_NS, terminate='yes')
+            message.text = '%s%s\n' % (_FAIL_FAST_MARKER, len(self._tests))
+            for child in location:
+                message.append(copy.deepcopy(child))
+            # text nodes of the message, separated from the location, which
+            # never contains newlines.
+            newline = etree.SubElement(message, '{%s}text' % XSL_NS)
+            newline.text = '\n'
+            for child in list(copy.deepcopy(text)):
+                message.append(child)
+            if text.text:
+                newline.text += text.text
+
+            failed_assert.addnext(message)
+            self._tests.append(failed_assert.get('test'))
+
+        self._transform = etree.XSLT(xslt_doc)
+        self.error_log = []
+
+    def validate(self, xmlfile):
+        """Validates `xmlfile`, an ``etree._ElementTree`` instance.
+
+        Returns ``True`` if no assertion failed. Otherwise, ``error_log``
+        holds the :class:`FailedAssert` of the first failure.
+        """
+        self.error_log = []
+        try:
+            self._transform(xmlfile)
+        except etree.XSLTApplyError:
+            for entry in self._transform.error_log:
+                if entry.message.startswith(_FAIL_FAST_MARKER):
+                    break
+            else:
+                raise
+
+            header, location, text = entry.message.split('\n', 2)
+            index = int(header[len(_FAIL_FAST_MARKER):])
+            self.error_log = [FailedAssert(self._tests[index], location, text)]
+            return False
+
+        return True
+
+
+class PrecompiledSchematron(isoschematron.Schematron):
+    """An ``isoschematron.Schematron`` built from an already compiled
+    validator XSLT document, skipping the include, expand and compile steps.
+    """
+    def __init__(self, xslt_doc, **kwargs):
+        kwargs.update(include=False, expand=False, validate_schema=False)
+        super(PrecompiledSchematron, self).__init__(xslt_doc, **kwargs)
+
+    def _extract(self, element):
+        return element
+
+    def _compile(self, validator_xslt, **params):
+        return validator_xslt
+
+
+def schema_xslt(schema_name, phase=None, cache_dir=None):
+    """Returns the validator XSLT document for a schema in
+    ``catalog['SCH_SCHEMAS']``, using the on-disk cache.
+
+    :param schema_name: the schema name, e.g. ``eps-0.1``.
+    :param phase: (optional) the phase id.
+    :param cache_dir: (optional) defaults to ``catalog['SCH_CACHE_DIR']``.
+    """
+    try:
+        schema_path = catalog['SCH_SCHEMAS'][schema_name]
+    except KeyError:
+        raise ValueError('unrecognized schema: "%s"' % schema_name)
+
+    return validator_xslt(schema_path, phase=phase, cache_dir=cache_dir)
+
+
+def CompiledSchematron(schema_name, phase=None, cache_dir=None):
+    """Factory of ``isoschematron.Schematron`` instances for schemas in
+    ``catalog['SCH_SCHEMAS']``, using the on-disk cache.
+
+    :param schema_name: the schema name, e.g. ``eps-0.1``.
+    :param phase: (optional) the phase id.
+    :param cache_dir: (optional) defaults to ``catalog['SCH_CACHE_DIR']``.
+    """
+    return PrecompiledSchematron(schema_xslt(schema_name, phase=phase,
+        cache_dir=cache_dir))
+
+
+def schema_phases(schema_path):
+    """Returns an ordered mapping of phase ids to their active pattern ids.
+    """
+    sch_doc = etree.parse(schema_path, NOIDS_XMLPARSER)
+    phases = collections.OrderedDict()
+    for phase in sch_doc.iterfind('{%s}phase' % SCH_NS):
+        phases[phase.attrib['id']] = [active.attrib['pattern']
+                for active in phase.iterfind('{%s}active' % SCH_NS)]
+
+    return phases
+
+
+class PhaseRegistry(object):
+    """Compiles the phases of a Schematron schema on demand and keeps the
+    `maxsize` most recently used ones.
+
+    Lookups are thread-safe. The returned ``isoschematron.Schematron``
+    instances keep the error log of their last validation, so concurrent
+    threads should not validate with the same instance.
+
+    :param schema_name: the schema name in ``catalog['SCH_SCHEMAS']``.
+    :param maxsize: (optional) maximum number of compiled phases kept.
+    :param cache_dir: (optional) defaults to ``catalog['SCH_CACHE_DIR']``.
+    """
+    def __init__(self, schema_name, maxsize=32, cache_dir=None):
+        try:
+            self.schema_path = catalog['SCH_SCHEMAS'][schema_name]
+        except KeyError:
+            raise ValueError('unrecognized schema: "%s"' % schema_name)
+
+        self.schema_name = schema_name
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.phases = schema_phases(self.schema_path)
+        self._compiled = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._compiled)
+
+    def __contains__(self, phase):
+        with self._lock:
+            return phase in self._compiled
+
+    def get(self, phase=None):
+        """Returns the compiled schematron for `phase`, compiling it if needed.
+
+        :param phase: (optional) the phase id. All patterns are active by
+                      default.
+        """
+        if phase is not None and phase not in self.phases:
+            raise ValueError('unrecognized phase: "%s"' % phase)
+
+        with self._lock:
+            try:
+                schematron = self._compiled.pop(phase)
+            except KeyError:
+                pass
+            else:
+                self._compiled[phase] = schematron
+                return schematron
+
+        # compilation happens outside the lock so that lookups of other
+        # phases are not blocked meanwhile.
+        xslt_doc = validator_xslt(self.schema_path, phase=phase,
+                cache_dir=self.cache_dir)
+        schematron = PrecompiledSchematron(xslt_doc)
+
+        with self._lock:
+            schematron = self._compiled.setdefault(phase, schematron)
+            while len(self._compiled) > self.maxsize:
+                evicted, _ = self._compiled.popitem(last=False)
+                LOGGER.info('evicting phase "%s" from the registry', evicted)
+
+        return schematron
+
+    def clear(self):
+        with self._lock:
+            self._compiled.clear()
+
+
+def phase_registry(schema_name):
+    """Returns the process-wide :class:`PhaseRegistry` for `schema_name`.
+    """
+    with _REGISTRIES_LOCK:
+        if schema_name not in _REGISTRIES:
+            _REGISTRIES[schema_name] = PhaseRegistry(schema_name)
+
+        return _REGISTRIES[schema_name]
+
+
+_REGISTRIES = {}
+_REGISTRIES_LOCK = threading.Lock()
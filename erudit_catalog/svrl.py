@@ -0,0 +1,130 @@
+#coding: utf-8
+"""Streaming conversion of SVRL reports to error records.
+
+``isoschematron.Schematron`` keeps the whole SVRL report of a validation and
+adds one error log entry per failed assertion, so that documents with tens
+of thousands of failures are held twice in memory. :func:`iter_records`
+instead converts the failures one at a time, discarding each SVRL element as
+soon as it is converted, and skips the failures whose message and location
+were already reported.
+
+Reports may be given as ``etree`` result trees, such as those produced by
+running a validator XSLT, or as files, which are parsed incrementally.
+"""
+from __future__ import unicode_literals
+import logging
+
+from lxml import etree
+
+from erudit_catalog import schematron
+from erudit_catalog.errors import SchematronRecord
+
+LOGGER = logging.getLogger(__name__)
+
+FAILURE_TAGS = (
+    '{%s}failed-assert' % schematron.SVRL_NS,
+    '{%s}successful-report' % schematron.SVRL_NS,
+)
+
+ACTIVE_PATTERN_TAG = '{%s}active-pattern' % schematron.SVRL_NS
+
+_TEXT_TAG = '{%s}text' % schematron.SVRL_NS
+
+
+def _iter_tree(report, tags=FAILURE_TAGS):
+    try:
+        root = report.getroot()
+    except AttributeError:
+        root = report
+
+    elem = root[0] if len(root) else None
+    while elem is not None:
+        following = elem.getnext()
+        if elem.tag in tags:
+            yield elem
+        # unreferenced elements are freed as soon as they leave the tree.
+        root.remove(elem)
+        elem = following
+
+
+def _iter_file(report, tags=FAILURE_TAGS):
+    for _, elem in etree.iterparse(report, events=('end',), tag=tags):
+        yield elem
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def _iter_elements(report, tags=FAILURE_TAGS):
+    if isinstance(report, (etree._ElementTree, etree._Element)):
+        return _iter_tree(report, tags)
+    else:
+        return _iter_file(report, tags)
+
+
+def _dedup_key(elem):
+    return elem.get('location'), elem.findtext(_TEXT_TAG, '').strip()
+
+
+def _to_record(elem, label):
+    return SchematronRecord(etree.tostring(elem, encoding='unicode',
+        with_tail=False), label=label)
+
+
+def iter_records(report, label='', dedup=True, max_errors=None):
+    """Yields a :class:`erudit_catalog.errors.SchematronRecord` for each
+    failed assertion or successful report of the SVRL `report`.
+
+    :param report: an ``etree`` tree or element, which is consumed, or a
+                   filename or file object.
+    :param label: (optional) the label set on each record.
+    :param dedup: (optional) skip the failures whose message and location
+                  were already reported.
+    :param max_errors: (optional) stop after this many records.
+    """
+    seen = set()
+    count = 0
+    for elem in _iter_elements(report):
+        if max_errors is not None and count >= max_errors:
+            LOGGER.info('stopping after %s errors', max_errors)
+            break
+
+        if dedup:
+            key = _dedup_key(elem)
+            if key in seen:
+                continue
+            seen.add(key)
+
+        count += 1
+        yield _to_record(elem, label)
+
+
+def iter_pattern_records(report, label=''):
+    """Yields ``(pattern_id, records)`` for each pattern run by the SVRL
+    `report`, in order, where `records` is the list of
+    :class:`erudit_catalog.errors.SchematronRecord` instances of its
+    failures, without duplicates.
+
+    :param report: an ``etree`` tree or element, which is consumed, or a
+                   filename or file object.
+    :param label: (optional) the label set on each record.
+    """
+    pattern_id = None
+    records = []
+    seen = set()
+    for elem in _iter_elements(report, FAILURE_TAGS + (ACTIVE_PATTERN_TAG,)):
+        if elem.tag == ACTIVE_PATTERN_TAG:
+            if pattern_id is not None:
+                yield pattern_id, records
+            pattern_id = elem.get('id')
+            records = []
+            seen = set()
+            continue
+
+        key = _dedup_key(elem)
+        if key not in seen:
+            seen.add(key)
+            records.append(_to_record(elem, label))
+
+    if pattern_id is not None:
+        yield pattern_id, records
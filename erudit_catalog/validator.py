@@ -0,0 +1,232 @@
+#coding: utf-8
+"""Validation of article files with warm validators.
+
+A :class:`Validator` compiles the Schematron schema, parses the DTD and builds
+the style checking pipeline once, and then reuses them for every article.
+Results are plain dicts, ready to be serialized as JSON, and may be kept in
+a :class:`erudit_catalog.resultcache.ResultCache` so that articles already
+validated are not parsed again.
+"""
+from __future__ import unicode_literals
+import logging
+
+from lxml import etree
+
+from erudit_catalog import checks, dtd, profiles, resultcache, schematron, svrl
+from erudit_catalog.errors import DTDRecord, SchematronRecord
+from erudit_catalog.prefilter import PrefilteredXSLT
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SCHEMA = 'eps-0.1'
+
+# DTDs are preloaded and applied to the parsed document, so it is neither
+# loaded nor resolved at parse-time. Entities are not resolved either, so
+# that articles cannot read local files through external entities.
+XMLPARSER = etree.XMLParser(remove_blank_text=True, load_dtd=False,
+        no_network=True, resolve_entities=False)
+
+
+# patterns run first by fail-fast validators: cheap rules on the front matter
+# that reject most of the invalid uploads.
+FAIL_FAST_FIRST = (
+    'article_attributes',
+    'article_article-type-values',
+    'article_specific-use-values',
+    'journal-id_has_erudit-id',
+    'journal-meta_has_journal-id',
+    'journal-meta_has_journal-title-group',
+    'issn_pub_type_epub_or_ppub',
+    'issn_notempty',
+    'issn_isvalid',
+    'publisher',
+    'has_journal-title',
+    'permissions_must_exists',
+)
+
+# prefixes of the patterns run last by fail-fast validators: rules that
+# cross-reference element sets over the whole document.
+FAIL_FAST_LAST = (
+    'counts_',
+    'xref-reftype-',
+)
+
+
+def fail_fast_order(pattern_ids):
+    """Sorts `pattern_ids` in the order fail-fast validators run them.
+    """
+    def rank(pattern_id):
+        if pattern_id in FAIL_FAST_FIRST:
+            return 0, FAIL_FAST_FIRST.index(pattern_id)
+        elif pattern_id.startswith(FAIL_FAST_LAST):
+            return 2, 0
+        else:
+            return 1, 0
+
+    return sorted(pattern_ids, key=rank)
+
+
+def error_to_dict(error):
+    """Converts an error record, or a packtools' style error, to a dict.
+    """
+    return {
+        'line': error.line,
+        'message': error.message,
+        'level': error.level,
+        'label': error.label,
+    }
+
+
+class Validator(object):
+    """Validates articles against their DTD and the style rules of a schema.
+
+    The DTD is the one declared by the DOCTYPE of each article, taken from
+    :mod:`erudit_catalog.dtd`, or JATS Publishing 1.1 if it is missing.
+    Each instance has its own compiled Schematron, which keeps the error log
+    of its last validation, so instances must not be shared between threads.
+
+    :param schema_name: (optional) the schema name in ``catalog['SCH_SCHEMAS']``.
+    :param phase: (optional) the Schematron phase id. All patterns are active
+                  by default.
+    :param profile: (optional) the profile name in
+                    :data:`erudit_catalog.profiles.PROFILES`, exclusive of
+                    `phase`.
+    :param cache: (optional) a :class:`erudit_catalog.resultcache.ResultCache`
+                  instance.
+    :param fail_fast: (optional) stop at the first error, running the
+                      cheapest checks first. Results then comprise at most
+                      one error.
+    :param max_errors: (optional) maximum number of Schematron errors
+                       reported. Failures with the same message and location
+                       are reported once.
+    :param prefilter: (optional) run only the patterns whose rules may fire
+                      on the elements of each article, with
+                      :class:`erudit_catalog.prefilter.PrefilteredXSLT`.
+                      Results are the same either way. Fail-fast validators
+                      run all the patterns.
+    """
+    def __init__(self, schema_name=DEFAULT_SCHEMA, phase=None, profile=None,
+            cache=None, fail_fast=False, max_errors=None, prefilter=True):
+        if phase is not None and profile is not None:
+            raise ValueError('phase and profile are mutually exclusive')
+
+        self.schema_name = schema_name
+        self.phase = phase
+        self.profile = profile
+        self.cache = cache
+        self.fail_fast = fail_fast
+        self.max_errors = max_errors
+        self.label = label = '@' + schema_name
+
+        if profile is None:
+            xslt_doc = schematron.schema_xslt(schema_name, phase=phase)
+        else:
+            xslt_doc = profiles.profile_xslt(schema_name, profile)
+
+        if fail_fast:
+            self.schematron = schematron.FailFastSchematron(xslt_doc,
+                    order=fail_fast_order(schematron.pattern_ids(xslt_doc)))
+        elif prefilter:
+            self.schematron = PrefilteredXSLT(xslt_doc)
+        else:
+            self.schematron = etree.XSLT(xslt_doc)
+        # parse the default DTD ahead of the first validation.
+        dtd.get_dtd()
+        self.pipeline = checks.StyleCheckingRecordsPipeline()
+
+    def validate(self, xmlfile):
+        """Validates `xmlfile`, an ``etree._ElementTree`` instance.
+
+        Returns a tuple comprising the lists of DTD errors and of style
+        errors, as records of :mod:`erudit_catalog.errors`. Raises
+        ``ValueError`` if the DOCTYPE declares an unrecognized DTD.
+        """
+        if self.fail_fast:
+            return self._validate_fail_fast(xmlfile)
+
+        _, error_log = dtd.validate(xmlfile)
+        dtd_errors = [DTDRecord(err.message, err.line) for err in error_log]
+
+        errors = self._validate_schematron(xmlfile)
+        for err in next(self.pipeline.run(xmlfile, rewrap=True)):
+            err.label = self.label
+            errors.append(err)
+
+        return dtd_errors, errors
+
+    def _validate_schematron(self, xmlfile):
+        if self.fail_fast:
+            self.schematron.validate(xmlfile)
+            return [SchematronRecord(entry.message, label=self.label)
+                    for entry in self.schematron.error_log]
+
+        report = self.schematron(xmlfile)
+        return list(svrl.iter_records(report, label=self.label,
+            max_errors=self.max_errors))
+
+    def _validate_fail_fast(self, xmlfile):
+        err = checks.first_style_error(xmlfile)
+        if err is not None:
+            err.label = self.label
+            return [], [err]
+
+        is_valid, error_log = dtd.validate(xmlfile)
+        if not is_valid:
+            err = error_log[0]
+            return [DTDRecord(err.message, err.line)], []
+
+        return [], self._validate_schematron(xmlfile)
+
+    def validate_file(self, filename):
+        """Validates the article at `filename`.
+
+        Returns a dict with the keys ``filename``, ``is_valid``,
+        ``dtd_errors`` and ``style_errors``, or ``filename``, ``is_valid`` and
+        ``error`` if the file cannot be parsed or its DTD is unrecognized.
+        """
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError) as exc:
+            LOGGER.info('cannot read "%s": %s', filename, exc)
+            return {'filename': filename, 'is_valid': False, 'error': str(exc)}
+
+        output = {'filename': filename}
+        output.update(self.validate_bytes(data))
+        return output
+
+    def validate_bytes(self, data):
+        """Validates `data`, the bytes of an article.
+
+        Returns a dict as :meth:`validate_file` does, except for the
+        ``filename`` key.
+        """
+        if self.cache is None:
+            return self._validate_bytes(data)
+
+        key = resultcache.result_key(data, self.schema_name,
+                phase=self.phase, profile=self.profile,
+                fail_fast=self.fail_fast, max_errors=self.max_errors)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._validate_bytes(data)
+            self.cache.put(key, result)
+
+        return result
+
+    def _validate_bytes(self, data):
+        try:
+            et = etree.fromstring(data, XMLPARSER).getroottree()
+        except etree.XMLSyntaxError as exc:
+            return {'is_valid': False, 'error': str(exc)}
+
+        try:
+            dtd_errors, style_errors = self.validate(et)
+        except ValueError as exc:
+            return {'is_valid': False, 'error': str(exc)}
+
+        return {
+            'is_valid': not (dtd_errors or style_errors),
+            'dtd_errors': [error_to_dict(err) for err in dtd_errors],
+            'style_errors': [error_to_dict(err) for err in style_errors],
+        }
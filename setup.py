@@ -1,4 +1,9 @@
+import os
+import sys
+import subprocess
+
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 
 VERSION = '1.0'
 
@@ -11,6 +16,20 @@ DEPENDENCY_LINKS = [
 ]
 
 
+class BuildPyWithAssets(build_py):
+    """Builds the hashed and precompressed static assets of the HTML
+    generator along with the package, with the copy of
+    ``erudit_catalog.assets`` in the build tree.
+    """
+    def run(self):
+        build_py.run(self)
+        if not self.dry_run:
+            subprocess.check_call([sys.executable, '-m',
+                'erudit_catalog.assets', '--static-dir',
+                os.path.join('erudit_catalog', 'htmlgenerator', 'static')],
+                cwd=self.build_lib)
+
+
 setup(
     name='EruditCatalog',
     version=VERSION,
@@ -31,9 +50,15 @@ setup(
     test_suite='tests',
     install_requires=INSTALL_REQUIRES,
     dependency_links=DEPENDENCY_LINKS,
+    cmdclass={'build_py': BuildPyWithAssets},
     entry_points="""
     [packtools.catalog]
     packtools_catalog=erudit_catalog:catalog
     packtools_checks=erudit_catalog.checks:StyleCheckingPipeline
+
+    [console_scripts]
+    erudit-validate=erudit_catalog.cli:main
+    erudit-validate-daemon=erudit_catalog.daemon:main
+    erudit-render-html=erudit_catalog.render:main
     """,
 )
@@ -0,0 +1,150 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import asyncio
+import threading
+import os
+
+from erudit_catalog import aio, validator
+
+
+TEXTURE_SAMPLE = os.path.join(os.path.dirname(__file__),
+        'samples/texture/original_refs/document.xml')
+
+
+def read_sample():
+    with open(TEXTURE_SAMPLE, 'rb') as f:
+        return f.read()
+
+
+def run_until_complete(coro):
+    # ``asyncio.run`` requires Python 3.7.
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class AsyncValidatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = aio.AsyncValidator(max_workers=2, max_pending=2)
+
+    def tearDown(self):
+        self.validator.close()
+
+    def test_results_match_the_sync_validator(self):
+        data = read_sample()
+        expected = validator.Validator().validate_bytes(data)
+        self.assertEqual(run_until_complete(self.validator.validate(data)), expected)
+
+    def test_invalid_xml(self):
+        result = run_until_complete(self.validator.validate(b'<article><front></article>'))
+        self.assertFalse(result['is_valid'])
+        self.assertIn('error', result)
+
+    def test_validate_many_keeps_order(self):
+        data = read_sample()
+        broken = b'<article>'
+        results = run_until_complete(self.validator.validate_many(
+            [data, broken, data, broken, data]))
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(['error' in r for r in results],
+                [False, True, False, True, False])
+
+    def test_event_loop_is_not_blocked(self):
+        data = read_sample()
+        ticks = []
+
+        async def ticker(done):
+            while not done.is_set():
+                ticks.append(1)
+                await asyncio.sleep(0.001)
+
+        async def run():
+            done = asyncio.Event()
+            task = asyncio.ensure_future(ticker(done))
+            await self.validator.validate(data)
+            done.set()
+            await task
+
+        run_until_complete(run())
+        self.assertGreater(len(ticks), 1)
+
+    def test_backpressure(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+        original = self.validator._validate_bytes
+
+        def tracked(data):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            try:
+                return original(data)
+            finally:
+                with lock:
+                    running.pop()
+
+        self.validator._validate_bytes = tracked
+        run_until_complete(self.validator.validate_many([read_sample()] * 6))
+        self.assertLessEqual(max(peak), 2)
+
+    def test_cancelled_calls_are_not_validated(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def blocking(data):
+            calls.append(data)
+            started.set()
+            release.wait(5)
+            return {}
+
+        self.validator._validate_bytes = blocking
+
+        async def run():
+            first = asyncio.ensure_future(self.validator.validate(b'1'))
+            second = asyncio.ensure_future(self.validator.validate(b'2'))
+            third = asyncio.ensure_future(self.validator.validate(b'3'))
+            await asyncio.sleep(0.05)
+            third.cancel()
+            second.cancel()
+            release.set()
+            await first
+            return second, third
+
+        second, third = run_until_complete(run())
+        self.assertTrue(second.cancelled())
+        self.assertTrue(third.cancelled())
+        self.assertNotIn(b'3', calls)
+
+    def test_validators_are_not_shared_between_threads(self):
+        data = read_sample()
+        validators = set()
+        original = self.validator._validator
+
+        def tracked():
+            v = original()
+            validators.add((threading.get_ident(), id(v)))
+            return v
+
+        self.validator._validator = tracked
+        run_until_complete(self.validator.validate_many([data] * 4))
+        idents = dict(validators)
+        self.assertEqual(len(set(idents.values())), len(idents))
+
+
+class ValidateAsyncTests(unittest.TestCase):
+
+    def test_uses_a_process_wide_validator(self):
+        self.assertIs(aio.get_async_validator(), aio.get_async_validator())
+        self.assertIsNot(aio.get_async_validator(),
+                aio.get_async_validator(phase='phase.issn'))
+
+    def test_phase(self):
+        result = run_until_complete(aio.validate_async(read_sample(),
+            phase='phase.issn'))
+        self.assertEqual(result['style_errors'], [])
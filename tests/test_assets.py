@@ -0,0 +1,122 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import shutil
+import tempfile
+import gzip
+import io
+import os
+
+from erudit_catalog import assets, catalog
+
+
+class MinifyTests(unittest.TestCase):
+
+    def test_css(self):
+        css = '''/* header */
+        div :first-child , a > b {
+            color: red ;
+            content: "a  /* b */";
+        }
+        '''
+        self.assertEqual(assets.minify_css(css),
+                'div :first-child,a>b{color:red;content:"a  /* b */"}')
+
+    def test_css_media_queries(self):
+        self.assertEqual(assets.minify_css('@media screen and (max-width: 1px) { }'),
+                '@media screen and (max-width:1px){}')
+
+
+class BuildTests(unittest.TestCase):
+
+    def setUp(self):
+        self.static_dir = tempfile.mkdtemp()
+        for name, contents in [('a.css', 'a { color: red; }'),
+                ('b.js', '// b\nvar b = 1;\n')]:
+            with io.open(os.path.join(self.static_dir, name), 'w') as f:
+                f.write(contents)
+
+    def tearDown(self):
+        shutil.rmtree(self.static_dir)
+
+    def _build(self):
+        return assets.build(self.static_dir, sources=('a.css', 'b.js'))
+
+    def test_bundles_are_hashed(self):
+        manifest = self._build()
+        self.assertEqual(manifest['a.css'], 'dist/' + assets.bundle_name('a.css',
+            b'a{color:red}'))
+        self.assertRegex(manifest['b.js'], r'^dist/b\.[0-9a-f]{12}\.js$')
+
+    def test_bundles_are_precompressed(self):
+        manifest = self._build()
+        path = os.path.join(self.static_dir, manifest['b.js'])
+        with gzip.open(path + '.gz') as f:
+            self.assertEqual(f.read(), b'// b\nvar b = 1;\n')
+
+    def test_builds_are_reproducible(self):
+        manifest = self._build()
+        path = os.path.join(self.static_dir, manifest['a.css'] + '.gz')
+        with open(path, 'rb') as f:
+            expected = f.read()
+        self.assertEqual(self._build(), manifest)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_stale_bundles_are_removed(self):
+        stale = os.path.join(self.static_dir, self._build()['a.css'])
+        with io.open(os.path.join(self.static_dir, 'a.css'), 'w') as f:
+            f.write('a { color: blue; }')
+        self._build()
+        self.assertFalse(os.path.exists(stale))
+        self.assertFalse(os.path.exists(stale + '.gz'))
+
+    def test_manifest(self):
+        self.assertEqual(assets.read_manifest(self.static_dir), {})
+        self.assertEqual(assets.static_path('a.css', self.static_dir),
+                os.path.join(self.static_dir, 'a.css'))
+
+        manifest = self._build()
+        self.assertEqual(assets.read_manifest(self.static_dir), manifest)
+        self.assertEqual(assets.static_path('a.css', self.static_dir),
+                os.path.join(self.static_dir, manifest['a.css']))
+
+    def test_bundle_path(self):
+        source = os.path.join(self.static_dir, 'a.css')
+        self.assertEqual(assets.bundle_path(source, self.static_dir), source)
+
+        manifest = self._build()
+        self.assertEqual(assets.bundle_path(source, self.static_dir),
+                os.path.join(self.static_dir, manifest['a.css']))
+        # paths out of the static directory are left as they are.
+        other = os.path.join(os.path.dirname(self.static_dir), 'a.css')
+        self.assertEqual(assets.bundle_path(other, self.static_dir), other)
+
+    def test_js_is_bundled_as_it_is(self):
+        js = (
+            "/* header */\n"
+            "var html = `<p>\n"
+            "    indented\n"
+            "\n"
+            "</p>`;\n"
+            "var r = /a\\/*b/; var s = 'x // y /* z */';\n"
+            "var d = a / 2 /* c */ / b;\n"
+        )
+        with io.open(os.path.join(self.static_dir, 'c.js'), 'w') as f:
+            f.write(js)
+
+        manifest = assets.build(self.static_dir, sources=('c.js',))
+        with io.open(os.path.join(self.static_dir, manifest['c.js'])) as f:
+            self.assertEqual(f.read(), js)
+
+    def test_unrecognized_asset_type(self):
+        self.assertRaises(ValueError, assets.build, self.static_dir,
+                sources=('c.txt',))
+
+
+class CatalogTests(unittest.TestCase):
+
+    def test_default_assets_exist(self):
+        for key in ('HTML_GEN_DEFAULT_CSS_PATH', 'HTML_GEN_DEFAULT_PRINT_CSS_PATH',
+                'HTML_GEN_DEFAULT_JS_PATH'):
+            self.assertTrue(os.path.isfile(catalog[key]), key)
@@ -0,0 +1,45 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import os
+
+from packtools import catalogs
+
+import erudit_catalog
+from erudit_catalog import checks
+
+
+class CatalogTests(unittest.TestCase):
+
+    def test_catalog_is_a_dict(self):
+        self.assertIsInstance(erudit_catalog.catalog, dict)
+
+    def test_schemas_merge_sch_schemas_and_dtds(self):
+        catalog = erudit_catalog.catalog
+        self.assertEqual(set(catalog['SCHEMAS']),
+                set(catalog['SCH_SCHEMAS']) | set(catalog['DTDS']))
+
+    def test_paths_exist(self):
+        catalog = erudit_catalog.catalog
+        for key in ['XML_CATALOG', 'ISO3166_CODES']:
+            self.assertTrue(os.path.exists(catalog[key]), key)
+        for path in catalog['SCHEMAS'].values():
+            self.assertTrue(os.path.exists(path), path)
+
+    def test_plugin_is_loaded_by_packtools(self):
+        self.assertEqual(catalogs.catalog.NAME, erudit_catalog.catalog['NAME'])
+        self.assertIs(catalogs.StyleCheckingPipeline,
+                checks.StyleCheckingPipeline)
+
+
+class ISO3166CodesTests(unittest.TestCase):
+
+    def test_codes_are_loaded_once(self):
+        codes = checks.iso3166_codes()
+        self.assertIn('BR', codes)
+        self.assertIs(codes, checks.iso3166_codes())
+
+    def test_codes_set(self):
+        self.assertIn('BR', checks.ISO3166_CODES_SET)
+        self.assertNotIn('XX', checks.ISO3166_CODES_SET)
+        self.assertEqual(set(checks.ISO3166_CODES_SET), checks.iso3166_codes())
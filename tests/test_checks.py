@@ -0,0 +1,105 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import io
+
+from lxml import etree
+
+from erudit_catalog import checks
+
+
+DOCTYPE = ('<!DOCTYPE article PUBLIC "-//NLM//DTD JATS (Z39.96) Journal '
+           'Publishing DTD v1.1 20151215//EN" "JATS-journalpublishing1.dtd">')
+
+SAMPLE = """<?xml version="1.0" encoding="utf-8"?>
+%s
+<article>
+  <front>
+    <article-meta>
+      <aff><country country="BR">Brasil</country></aff>
+      <aff><country country="XX">Foo</country></aff>
+    </article-meta>
+  </front>
+  <back>
+    <ref-list>
+      <ref><element-citation><publisher-loc country="ca"/></element-citation></ref>
+    </ref-list>
+  </back>
+</article>
+"""
+
+
+def run(pipeline, data):
+    return next(pipeline.run(data, rewrap=True))
+
+
+def as_tuples(errors):
+    return [(err.line, err.message) for err in errors]
+
+
+class StreamingStyleCheckingPipelineTests(unittest.TestCase):
+
+    def _stream(self, doctype=DOCTYPE):
+        source = io.BytesIO((SAMPLE % doctype).encode('utf-8'))
+        return run(checks.StreamingStyleCheckingPipeline(), source)
+
+    def test_invalid_country_codes(self):
+        errors = self._stream()
+        self.assertEqual(as_tuples(errors), [
+            (7, "Element 'country', attribute country: Invalid country code \"XX\"."),
+            (12, "Element 'publisher-loc', attribute country: Invalid country code \"ca\"."),
+        ])
+
+    def test_missing_doctype(self):
+        errors = self._stream(doctype='')
+        self.assertEqual(errors[0].message, "Missing DOCTYPE declaration.")
+        self.assertEqual(len(errors), 3)
+
+    def test_processing_instruction_before_the_root(self):
+        data = (SAMPLE % DOCTYPE).replace('<article>',
+                '<?xml-stylesheet href="a.xsl"?>\n<article>')
+        errors = run(checks.StreamingStyleCheckingPipeline(),
+                     io.BytesIO(data.encode('utf-8')))
+        self.assertEqual(len(errors), 2)
+
+    def test_same_errors_as_the_tree_based_pipeline(self):
+        for doctype in [DOCTYPE, '']:
+            data = (SAMPLE % doctype).encode('utf-8')
+            expected = run(checks.StyleCheckingPipeline(),
+                           etree.parse(io.BytesIO(data)))
+            streamed = run(checks.StreamingStyleCheckingPipeline(),
+                           io.BytesIO(data))
+            self.assertEqual(as_tuples(streamed), as_tuples(expected))
+
+    def test_country_code_of_the_root(self):
+        data = (SAMPLE % DOCTYPE).replace('<article>',
+                '<article country="XX">').encode('utf-8')
+        expected = run(checks.StyleCheckingPipeline(),
+                       etree.parse(io.BytesIO(data)))
+        streamed = run(checks.StreamingStyleCheckingPipeline(),
+                       io.BytesIO(data))
+        self.assertEqual(as_tuples(streamed), as_tuples(expected))
+        self.assertEqual(len(expected), 3)
+        self.assertIn("Element 'article'", expected[0].message)
+
+    def test_processed_subtrees_are_discarded(self):
+        refs = ''.join('<ref id="r%s"><mixed-citation>Foo</mixed-citation></ref>' % i
+                       for i in range(20000))
+        data = ('<article><back><ref-list>%s</ref-list></back></article>' % refs)
+
+        seen = []
+        original = checks._check_country_code
+        def spy(elem):
+            seen.append(sum(1 for _ in elem.getroottree().iter()))
+            return original(elem)
+
+        checks._check_country_code = spy
+        try:
+            run(checks.StreamingStyleCheckingPipeline(),
+                io.BytesIO(data.encode('utf-8')))
+        finally:
+            checks._check_country_code = original
+
+        # lxml parses ahead of the events it reports, so the tree is
+        # bounded by its buffer rather than by the document.
+        self.assertTrue(max(seen) < 5000)
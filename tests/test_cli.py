@@ -0,0 +1,84 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import shutil
+import tempfile
+import os
+import io
+import json
+import contextlib
+
+from erudit_catalog import cli
+
+
+TEXTURE_SAMPLE = os.path.join(os.path.dirname(__file__),
+        'samples/texture/original_refs/document.xml')
+
+
+class IterFilenamesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        for name in ['b.xml', 'a.xml', 'sub/c.xml', 'sub/d.txt']:
+            path = os.path.join(self.tmpdir, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            open(path, 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _relative(self, filenames):
+        return [os.path.relpath(f, self.tmpdir) for f in filenames]
+
+    def test_directories_are_searched_recursively(self):
+        self.assertEqual(self._relative(cli.iter_filenames([self.tmpdir])),
+                ['a.xml', 'b.xml', os.path.join('sub', 'c.xml')])
+
+    def test_glob_patterns(self):
+        pattern = os.path.join(self.tmpdir, '**', '*.txt')
+        self.assertEqual(self._relative(cli.iter_filenames([pattern])),
+                [os.path.join('sub', 'd.txt')])
+
+    def test_files_are_kept(self):
+        self.assertEqual(list(cli.iter_filenames(['foo.xml'])), ['foo.xml'])
+
+
+class MainTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        shutil.copy(TEXTURE_SAMPLE, os.path.join(self.tmpdir, 'valid.xml'))
+        with open(os.path.join(self.tmpdir, 'broken.xml'), 'w') as f:
+            f.write('<article>')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _main(self, *args):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            status = cli.main(list(args))
+        return status, [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_results_are_json_lines(self):
+        status, results = self._main('-j', '1', self.tmpdir)
+
+        self.assertEqual(status, 1)
+        self.assertEqual([os.path.basename(r['filename']) for r in results],
+                ['broken.xml', 'valid.xml'])
+        self.assertFalse(results[0]['is_valid'])
+        self.assertIn('error', results[0])
+        self.assertEqual(sorted(results[1].keys()),
+                ['dtd_errors', 'filename', 'is_valid', 'style_errors'])
+
+    def test_process_pool_gives_the_same_results(self):
+        _, expected = self._main('-j', '1', self.tmpdir)
+        _, results = self._main('-j', '2', self.tmpdir)
+        self.assertEqual(results, expected)
+
+    def test_filenames_may_be_a_generator(self):
+        filenames = [os.path.join(self.tmpdir, name)
+                     for name in ['valid.xml', 'broken.xml']]
+        results = list(cli.validate_files(iter(filenames), max_workers=2))
+        self.assertEqual([result['filename'] for result in results], filenames)
@@ -0,0 +1,80 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import io
+
+from lxml import etree
+
+from erudit_catalog import catalog, corpus, dtd, native
+
+
+class BuildArticleTests(unittest.TestCase):
+
+    def _failures(self, et):
+        return [message for _, _, message in
+                native.NativeValidator().iter_failures(et)]
+
+    def test_articles_are_valid(self):
+        for sizes in [{}, dict(refs=0, figs=0, tables=0, formulas=0, affs=0),
+                      dict(refs=50, xrefs=120, contribs=5, affs=3)]:
+            et = corpus.build_article(**sizes)
+            self.assertEqual(self._failures(et), [])
+
+    def test_articles_are_valid_against_the_dtd(self):
+        for sizes in [{}, dict(contribs=0)]:
+            data = corpus.tostring(corpus.build_article(**sizes),
+                    public_id=catalog['ALLOWED_PUBLIC_IDS'][0])
+            et = etree.parse(io.BytesIO(data))
+            self.assertTrue(dtd.get_dtd_for(et).validate(et), sizes)
+
+    def test_no_contributors(self):
+        et = corpus.build_article(contribs=0)
+        self.assertIsNone(et.find('front/article-meta/contrib-group'))
+
+    def test_counts_are_consistent(self):
+        et = corpus.build_article(refs=7, figs=3, tables=4, formulas=5)
+        counts = et.find('front/article-meta/counts')
+        self.assertEqual(counts.find('ref-count').get('count'), '7')
+        self.assertEqual(len(et.findall('back/ref-list/ref')), 7)
+        self.assertEqual(len(et.findall('.//fig')), 3)
+        self.assertEqual(len(et.findall('.//table-wrap')), 4)
+        self.assertEqual(len(et.findall('.//disp-formula')), 5)
+        self.assertEqual(len(et.findall('.//xref[@ref-type="bibr"]')), 7)
+
+    def test_articles_are_reproducible(self):
+        first = etree.tostring(corpus.build_article(seed=1))
+        self.assertEqual(first, etree.tostring(corpus.build_article(seed=1)))
+        self.assertNotEqual(first, etree.tostring(corpus.build_article(seed=2)))
+
+    def test_attributes_are_ordered_by_name(self):
+        attrs = corpus._attrs(xml_lang='fr', article_type='research-article',
+                specific_use='eps-0.1', dtd_version='1.1')
+        self.assertEqual(list(attrs), ['article-type', 'dtd-version',
+            'specific-use', '{http://www.w3.org/XML/1998/namespace}lang'])
+
+    def test_defects_break_the_style_rules(self):
+        for defect in corpus.DEFECTS:
+            et = corpus.build_article(defects=[defect])
+            self.assertNotEqual(self._failures(et), [], defect)
+
+    def test_unknown_defect(self):
+        self.assertRaises(ValueError, corpus.build_article, defects=['foo'])
+
+
+class GenerateTests(unittest.TestCase):
+
+    def test_corpus_is_reproducible(self):
+        first = list(corpus.generate(5, invalid_ratio=0.5, seed=3, refs=5))
+        self.assertEqual(first,
+                list(corpus.generate(5, invalid_ratio=0.5, seed=3, refs=5)))
+
+    def test_articles_declare_allowed_doctypes(self):
+        for _, _, data in corpus.generate(3, refs=2):
+            et = etree.parse(io.BytesIO(data))
+            self.assertIn(et.docinfo.public_id, catalog['ALLOWED_PUBLIC_IDS'])
+
+    def test_invalid_ratio(self):
+        defects = [d for _, d, _ in corpus.generate(20, invalid_ratio=1, refs=2)]
+        self.assertTrue(all(defects))
+        defects = [d for _, d, _ in corpus.generate(20, refs=2)]
+        self.assertFalse(any(defects))
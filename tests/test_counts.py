@@ -0,0 +1,112 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import io
+
+from lxml import etree
+
+from erudit_catalog import catalog, counts, schematron
+
+
+SAMPLE = u"""<article>
+              <front>
+                <article-meta>
+                  <fpage>%(fpage)s</fpage>
+                  <lpage>%(lpage)s</lpage>
+                  <counts>
+                    <table-count count="%(tables)s"/>
+                    <ref-count count="%(refs)s"/>
+                    <fig-count count="%(figs)s"/>
+                    <equation-count count="%(equations)s"/>
+                    <page-count count="%(pages)s"/>
+                  </counts>
+                </article-meta>
+              </front>
+              <body>
+                <sec>
+                  <table-wrap/><table-wrap/>
+                  <fig/>
+                  <p><disp-formula/></p>
+                </sec>
+              </body>
+              <back>
+                <ref-list><ref/><ref/><ref/></ref-list>
+              </back>
+            </article>
+         """
+
+VALID = dict(fpage='10', lpage='12', tables='2', refs='3', figs='1',
+             equations='1', pages='3')
+
+
+def sample(**values):
+    params = dict(VALID, **values)
+    return io.BytesIO((SAMPLE % params).encode('utf-8'))
+
+
+class CheckCountsTests(unittest.TestCase):
+
+    def test_valid(self):
+        self.assertEqual(counts.check_counts(sample()), [])
+
+    def test_wrong_values(self):
+        failures = counts.check_counts(sample(refs='2', figs='foo', pages='2'))
+        self.assertEqual([(tag, message) for tag, _, message in failures], [
+            ('ref-count', "Element 'ref-count': Wrong value in ref-count."),
+            ('fig-count', "Element 'fig-count': Wrong value in fig-count."),
+            ('page-count', "Element 'page-count': Wrong value in page-count."),
+        ])
+
+    def test_failures_point_to_source_lines(self):
+        failures = counts.check_counts(sample(tables='1'))
+        self.assertEqual([line for _, line, _ in failures], [7])
+
+    def test_non_numeric_pages_are_not_checked(self):
+        self.assertEqual(
+                counts.check_counts(sample(fpage='iv', pages='100')), [])
+
+    def test_tree_and_stream_agree(self):
+        source = sample(tables='0', equations='3').getvalue()
+        streamed = counts.check_counts(io.BytesIO(source))
+        in_memory = counts.check_counts(etree.parse(io.BytesIO(source)))
+        self.assertEqual(streamed, in_memory)
+        self.assertEqual(len(streamed), 2)
+
+    def test_processing_instruction_before_the_root(self):
+        source = b'<?xml-stylesheet href="a.xsl"?>' + sample(refs='2').getvalue()
+        failures = counts.check_counts(io.BytesIO(source))
+        self.assertEqual([tag for tag, _, _ in failures], ['ref-count'])
+
+    def test_counts_outside_article_meta_are_ignored(self):
+        source = u"""<article>
+                      <body><sec><counts><ref-count count="9"/></counts></sec></body>
+                    </article>"""
+        self.assertEqual(counts.check_counts(io.BytesIO(source.encode('utf-8'))), [])
+
+    def test_xpath_number(self):
+        self.assertEqual(counts.xpath_number(' 12 '), 12)
+        self.assertEqual(counts.xpath_number('-.5'), -0.5)
+        nan = counts.xpath_number('1e3')
+        self.assertNotEqual(nan, nan)
+
+
+class CountsValidatorTests(unittest.TestCase):
+
+    def test_matches_the_schematron_phase(self):
+        sch = schematron.PrecompiledSchematron(
+                schematron.compile_validator_xslt(
+                    catalog['SCH_SCHEMAS']['eps-0.1'], phase='phase.counts'))
+        cases = [{}, dict(refs='2'), dict(tables='x', pages='0'),
+                 dict(fpage='0', lpage='0', pages='0'), dict(lpage='')]
+
+        for values in cases:
+            et = etree.parse(sample(**values))
+            is_valid, errors = counts.CountsValidator().validate(et)
+            self.assertEqual(is_valid, sch.validate(et))
+            self.assertEqual(len(errors), len(sch.error_log))
+
+    def test_errors_are_labeled(self):
+        is_valid, errors = counts.CountsValidator(label='foo').validate(
+                sample(figs='2'))
+        self.assertFalse(is_valid)
+        self.assertEqual([(e.label, e.line) for e in errors], [('foo', 9)])
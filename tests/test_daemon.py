@@ -0,0 +1,88 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import threading
+import os
+import http.client
+from concurrent import futures
+
+from erudit_catalog import daemon
+
+
+TEXTURE_SAMPLE = os.path.join(os.path.dirname(__file__),
+        'samples/texture/original_refs/document.xml')
+
+
+class DaemonTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = daemon.ValidationServer(('127.0.0.1', 0), workers=2)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.client = daemon.Client(port=cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+
+    def test_health(self):
+        self.assertEqual(self.client.health(),
+                {'status': 'ok', 'schema': 'eps-0.1', 'profile': None})
+
+    def test_validate_file(self):
+        result = self.client.validate_file(TEXTURE_SAMPLE)
+        self.assertEqual(result['filename'], TEXTURE_SAMPLE)
+        self.assertIn('dtd_errors', result)
+        self.assertIn('style_errors', result)
+
+    def test_results_match_the_local_validator(self):
+        with open(TEXTURE_SAMPLE, 'rb') as f:
+            data = f.read()
+        expected = self.server.validate(data)
+        self.assertEqual(self.client.validate(data), expected)
+
+    def test_invalid_xml(self):
+        result = self.client.validate(b'<article><front></article>')
+        self.assertFalse(result['is_valid'])
+        self.assertIn('error', result)
+
+    def test_concurrent_requests(self):
+        with open(TEXTURE_SAMPLE, 'rb') as f:
+            data = f.read()
+        expected = self.client.validate(data)
+
+        with futures.ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(self.client.validate, [data] * 12))
+
+        self.assertEqual(results, [expected] * 12)
+
+    def _post(self, headers):
+        conn = http.client.HTTPConnection('127.0.0.1',
+                self.server.server_address[1], timeout=10)
+        try:
+            conn.putrequest('POST', '/validate')
+            for name, value in headers:
+                conn.putheader(name, value)
+            conn.endheaders()
+            return conn.getresponse().status
+        finally:
+            conn.close()
+
+    def test_missing_content_length(self):
+        self.assertEqual(self._post([]), 400)
+
+    def test_negative_content_length(self):
+        self.assertEqual(self._post([('Content-Length', '-1')]), 400)
+
+    def test_unknown_path(self):
+        with self.assertRaises(daemon.DaemonError):
+            self.client._request('GET', '/unknown')
+
+    def test_unreachable_daemon(self):
+        client = daemon.Client(port=1, timeout=1)
+        with self.assertRaises(daemon.DaemonError):
+            client.health()
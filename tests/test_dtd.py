@@ -0,0 +1,58 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import io
+import threading
+
+from lxml import etree
+
+from erudit_catalog import dtd
+
+
+JATS_1_1 = '-//NLM//DTD JATS (Z39.96) Journal Publishing DTD v1.1 20151215//EN'
+PMC_3_0 = '-//NLM//DTD Journal Publishing DTD v3.0 20080202//EN'
+
+
+def parse(doctype, body='<article><front><journal-meta/></front></article>'):
+    return etree.parse(io.BytesIO((doctype + body).encode('utf-8')))
+
+
+class GetDTDTests(unittest.TestCase):
+
+    def setUp(self):
+        dtd.clear()
+
+    def test_dtds_are_parsed_once(self):
+        self.assertIs(dtd.get_dtd(JATS_1_1), dtd.get_dtd(JATS_1_1))
+
+    def test_default_is_jats_1_1(self):
+        self.assertIs(dtd.get_dtd(), dtd.get_dtd(JATS_1_1))
+
+    def test_dtds_are_keyed_by_public_id(self):
+        jats = dtd.get_dtd(JATS_1_1)
+        pmc = dtd.get_dtd(PMC_3_0)
+        self.assertIsNot(jats, pmc)
+        self.assertIsInstance(pmc, etree.DTD)
+
+    def test_unknown_public_id(self):
+        self.assertRaises(ValueError, dtd.get_dtd, '-//FOO//DTD Foo//EN')
+
+    def test_dtd_declared_by_the_document(self):
+        et = parse('<!DOCTYPE article PUBLIC "%s" "journalpublishing3.dtd">' % PMC_3_0)
+        self.assertIs(dtd.get_dtd_for(et), dtd.get_dtd(PMC_3_0))
+
+    def test_documents_without_doctype(self):
+        self.assertIs(dtd.get_dtd_for(parse('')), dtd.get_dtd(JATS_1_1))
+
+    def test_concurrent_lookups_share_the_dtd(self):
+        results = []
+        def lookup():
+            results.append(dtd.get_dtd(JATS_1_1))
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(id(r) for r in results)), 1)
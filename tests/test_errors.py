@@ -0,0 +1,102 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+
+from lxml import etree
+
+from packtools.style_errors import (StyleError, SchemaStyleError,
+        SchematronStyleError)
+from erudit_catalog import catalog, checks, corpus, errors, schematron, validator
+
+
+SVRL = ('<svrl:failed-assert xmlns:svrl="http://purl.oclc.org/dsdl/svrl" '
+        'test="@id" location="/article/front/fig[2]"><svrl:text>\n'
+        '        Element \'fig\': Missing attribute id.\n'
+        '      </svrl:text></svrl:failed-assert>')
+
+
+class ErrorRecordTests(unittest.TestCase):
+
+    def test_records_have_no_instance_dict(self):
+        for record in [errors.ErrorRecord('foo'),
+                       errors.SchematronRecord(SVRL),
+                       errors.DTDRecord('foo')]:
+            self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_message_is_formatted_on_access(self):
+        record = errors.ErrorRecord("Invalid code \"%s\".", ('XX',), line=3)
+        self.assertEqual(record.args, ('XX',))
+        self.assertEqual(record.message, 'Invalid code "XX".')
+
+    def test_message_without_args(self):
+        self.assertEqual(errors.ErrorRecord('100% wrong').message, '100% wrong')
+
+    def test_to_style_error(self):
+        record = errors.ErrorRecord("Element '%s': foo.", ('fig',), line=3,
+                label='@eps-0.1')
+        err = record.to_style_error()
+        self.assertIsInstance(err, StyleError)
+        self.assertEqual((err.line, err.message, err.level, err.label),
+                (3, "Element 'fig': foo.", record.level, '@eps-0.1'))
+
+    def test_schematron_record(self):
+        record = errors.SchematronRecord(SVRL, label='@eps-0.1')
+        self.assertEqual(record.message, "Element 'fig': Missing attribute id.")
+        self.assertEqual(record.location, '/article/front/fig[2]')
+
+        err = record.to_style_error()
+        self.assertIsInstance(err, SchematronStyleError)
+        self.assertEqual((err.message, err.level, err.label),
+                (record.message, record.level, '@eps-0.1'))
+
+    def test_dtd_record(self):
+        record = errors.DTDRecord('foo', line=7)
+        err = record.to_style_error()
+        self.assertIsInstance(err, SchemaStyleError)
+        self.assertEqual((err.line, err.message, err.level),
+                (7, 'foo', record.level))
+
+    def test_levels_match_packtools(self):
+        self.assertEqual(errors.ErrorRecord.level, StyleError.level)
+        self.assertEqual(errors.SchematronRecord.level,
+                SchematronStyleError.level)
+        self.assertEqual(errors.DTDRecord.level, SchemaStyleError.level)
+
+
+class PipelineTests(unittest.TestCase):
+
+    def _run(self, pipeline):
+        et = corpus.build_article()
+        et.getroot().find('.//aff').set('country', 'XX')
+        return next(pipeline.run(et, rewrap=True))
+
+    def test_plugin_pipeline_returns_style_errors(self):
+        result = self._run(checks.StyleCheckingPipeline())
+        self.assertEqual(len(result), 2)
+        self.assertTrue(all(isinstance(err, StyleError) for err in result))
+
+    def test_records_pipeline(self):
+        result = self._run(checks.StyleCheckingRecordsPipeline())
+        self.assertTrue(all(isinstance(err, errors.ErrorRecord) for err in result))
+        self.assertEqual([err.message for err in result],
+                [err.message for err in self._run(checks.StyleCheckingPipeline())])
+
+
+class ValidatorRecordsTests(unittest.TestCase):
+
+    def test_validator_returns_records(self):
+        data = corpus.tostring(corpus.build_article(defects=['fig-without-id']),
+                public_id=catalog['ALLOWED_PUBLIC_IDS'][0])
+        et = etree.fromstring(data, validator.XMLPARSER).getroottree()
+        _, style_errors = validator.Validator().validate(et)
+        self.assertTrue(style_errors)
+        self.assertTrue(all(isinstance(err, errors.SchematronRecord)
+                            for err in style_errors))
+
+    def test_messages_match_packtools(self):
+        et = corpus.build_article(defects=['fig-without-id', 'invalid-issn'])
+        sch = schematron.CompiledSchematron('eps-0.1')
+        sch.validate(et)
+        expected = [SchematronStyleError(entry).message for entry in sch.error_log]
+        self.assertEqual([errors.SchematronRecord(entry.message).message
+                          for entry in sch.error_log], expected)
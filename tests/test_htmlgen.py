@@ -0,0 +1,66 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import threading
+
+from lxml import etree
+
+from packtools import domain
+from erudit_catalog import corpus, htmlgen
+
+
+class GetTransformTests(unittest.TestCase):
+
+    def setUp(self):
+        htmlgen.clear()
+
+    def test_same_version_and_params(self):
+        self.assertIs(htmlgen.get_transform('1.0', css='a.css'),
+                htmlgen.get_transform('1.0', css='a.css'))
+
+    def test_other_params(self):
+        self.assertIsNot(htmlgen.get_transform('1.0', css='a.css'),
+                htmlgen.get_transform('1.0', css='b.css'))
+
+    def test_stylesheet_is_compiled_once(self):
+        self.assertIs(htmlgen.get_transform('1.0')._xslt,
+                htmlgen.get_transform('1.0', css='a.css')._xslt)
+
+    def test_unrecognized_version(self):
+        self.assertRaises(ValueError, htmlgen.get_transform, '0.9')
+
+
+class HTMLTransformTests(unittest.TestCase):
+
+    def setUp(self):
+        self.et = corpus.build_article(refs=2)
+
+    def test_render(self):
+        html = htmlgen.get_transform()(self.et, article_lang='fr')
+        self.assertEqual(html.getroot().tag, 'html')
+        self.assertIn('Érudit Article', etree.tostring(html, encoding='unicode'))
+
+    def test_params_are_quoted(self):
+        transform = htmlgen.HTMLTransform(css="it's.css")
+        transform(self.et, article_lang='fr', js=etree.XSLT.strparam('a.js'))
+
+    def test_threads_have_their_own_copy(self):
+        transform = htmlgen.HTMLTransform()
+        xslts = []
+
+        def render():
+            transform(self.et)
+            xslts.append(transform._thread_xslt())
+
+        threads = [threading.Thread(target=render) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(id(xslt) for xslt in xslts)), 4)
+        self.assertNotIn(transform._xslt, xslts)
+
+    def test_packtools_html_generator(self):
+        generator = domain.HTMLGenerator(self.et, xslt=htmlgen.get_transform())
+        self.assertEqual([lang for lang, _ in generator], ['fr'])
@@ -0,0 +1,142 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import io
+
+from erudit_catalog import corpus, identifiers
+
+
+ARTICLE = """<article>
+  <front>
+    <journal-meta>
+      <issn pub-type="epub">%s</issn>
+    </journal-meta>
+    <article-meta>
+      <article-id pub-id-type="doi">%s</article-id>
+    </article-meta>
+  </front>
+  <back>
+    <ref-list>
+      <ref><element-citation><pub-id pub-id-type="doi">%s</pub-id></element-citation></ref>
+      <ref><element-citation><pub-id pub-id-type="pmid">123</pub-id></element-citation></ref>
+    </ref-list>
+  </back>
+</article>
+"""
+
+
+def article(issn='0317-8471', article_doi='10.7202/1000001ar',
+        ref_doi='10.1016/j.foo.2017.01.001'):
+    return io.BytesIO((ARTICLE % (issn, article_doi, ref_doi)).encode('utf-8'))
+
+
+class ISSNCheckDigitTests(unittest.TestCase):
+
+    def test_known_issns(self):
+        for issn in ['0317-8471', '2049-3630', '0000-006X', '1050-124X']:
+            self.assertEqual(identifiers.issn_check_digit(issn), issn[-1])
+
+    def test_check_value(self):
+        self.assertIsNone(identifiers.check_value('issn', '0317-8471'))
+        self.assertIsNone(identifiers.check_value('issn', '1050-124x'))
+        self.assertEqual(identifiers.check_value('issn', '0317-8472'),
+                'check-digit')
+        self.assertIsNone(identifiers.check_value('issn', '0317-8472',
+                check_digit=False))
+        self.assertEqual(identifiers.check_value('issn', '123-45678'), 'format')
+
+    def test_unknown_kind(self):
+        self.assertRaises(ValueError, identifiers.check_value, 'isbn', 'foo')
+
+
+class DOITests(unittest.TestCase):
+
+    def test_article_doi(self):
+        self.assertIsNone(identifiers.check_value('article-id_doi',
+            '10.7202/1000001ar'))
+        self.assertEqual(identifiers.check_value('article-id_doi',
+            'doi:10.7202/1000001ar'), 'format')
+
+    def test_ref_doi_must_be_raw(self):
+        self.assertIsNone(identifiers.check_value('pub-id_doi',
+            '10.1016/j.foo.2017.01.001'))
+        self.assertEqual(identifiers.check_value('pub-id_doi',
+            ' 10.1016/j.foo.2017.01.001'), 'format')
+
+
+class CheckIdentifiersTests(unittest.TestCase):
+
+    def test_extraction(self):
+        found = [(i.kind, i.value) for i in identifiers.iter_identifiers([article()])]
+        self.assertEqual(found, [
+            ('issn', '0317-8471'),
+            ('article-id_doi', '10.7202/1000001ar'),
+            ('pub-id_doi', '10.1016/j.foo.2017.01.001'),
+        ])
+
+    def test_valid_articles(self):
+        self.assertEqual(list(identifiers.check_identifiers(
+            [article(), article()])), [])
+
+    def test_failures(self):
+        sources = [article(), article(issn='0317-8472'),
+                   article(article_doi='doi:10.7202/1000001ar', ref_doi='foo')]
+        failures = list(identifiers.check_identifiers(sources))
+        self.assertEqual([(f.source, f.kind, f.reason) for f in failures], [
+            (sources[1], 'issn', 'check-digit'),
+            (sources[2], 'article-id_doi', 'format'),
+            (sources[2], 'pub-id_doi', 'format'),
+        ])
+        self.assertEqual(failures[0].line, 4)
+
+    def test_distinct_values_are_checked_once(self):
+        calls = []
+        original = identifiers.check_value
+
+        def spy(kind, value, check_digit=True):
+            calls.append(value)
+            return original(kind, value, check_digit)
+
+        identifiers.check_value = spy
+        try:
+            list(identifiers.check_identifiers([article() for _ in range(5)]))
+        finally:
+            identifiers.check_value = original
+
+        self.assertEqual(len(calls), 3)
+
+    def test_failures_are_yielded_as_they_are_found(self):
+        def sources():
+            yield article(issn='0317-8472')
+            raise AssertionError('the next source should not be read yet')
+
+        failure = next(identifiers.check_identifiers(sources()))
+        self.assertEqual(failure.reason, 'check-digit')
+
+    def test_memo_is_bounded(self):
+        calls = []
+        original = identifiers.check_value
+
+        def spy(kind, value, check_digit=True):
+            calls.append(value)
+            return original(kind, value, check_digit)
+
+        identifiers.check_value = spy
+        try:
+            list(identifiers.check_identifiers([article() for _ in range(2)],
+                maxsize=1))
+        finally:
+            identifiers.check_value = original
+
+        self.assertEqual(len(calls), 6)
+
+    def test_unparsable_sources_are_skipped(self):
+        sources = [io.BytesIO(b'<article>'), article(issn='foo')]
+        failures = identifiers.check_identifiers(sources)
+        self.assertEqual([f.source for f in failures], [sources[1]])
+
+    def test_same_formats_as_the_schematron(self):
+        et = corpus.build_article(defects=['invalid-doi', 'invalid-issn'])
+        failures = identifiers.check_identifiers([et], check_digit=False)
+        self.assertEqual(sorted(f.kind for f in failures),
+                ['article-id_doi', 'issn'])
@@ -0,0 +1,102 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import subprocess
+import pkgutil
+import sys
+import os
+
+import erudit_catalog
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(
+    erudit_catalog.__file__)))
+
+MODULES = sorted(name for _, name, _ in
+        pkgutil.iter_modules(erudit_catalog.__path__))
+
+SVRL_SCRIPT = """
+from lxml import etree
+from erudit_catalog import errors, svrl
+
+report = etree.fromstring(
+    '<svrl:schematron-output xmlns:svrl="http://purl.oclc.org/dsdl/svrl">'
+    '<svrl:failed-assert test="@id" location="/article">'
+    '<svrl:text>Missing id.</svrl:text></svrl:failed-assert>'
+    '</svrl:schematron-output>')
+records = list(svrl.iter_records(report))
+assert [err.message for err in errors.to_style_errors(records)] == [
+    'Missing id.']
+"""
+
+INCREMENTAL_SCRIPT = """
+from erudit_catalog import corpus
+from erudit_catalog.incremental import IncrementalValidator
+
+et = corpus.build_article(refs=2)
+validator = IncrementalValidator()
+result = validator.validate(et)
+et.find('.//fig').attrib.pop('id')
+result = validator.validate(et, previous=result)
+assert not result.is_valid
+"""
+
+
+def run_python(code):
+    """Runs `code` in a fresh interpreter, where packtools was not imported
+    beforehand. Returns the exit status and the standard error.
+    """
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=ROOT_DIR,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    return process.returncode, stderr.decode('utf-8', 'replace')
+
+
+class ImportTests(unittest.TestCase):
+
+    def test_modules_are_listed(self):
+        for name in ['aio', 'checks', 'errors', 'incremental', 'svrl',
+                'validator']:
+            self.assertIn(name, MODULES)
+
+    def test_modules_import_on_their_own(self):
+        for name in MODULES:
+            status, stderr = run_python('import erudit_catalog.%s' % name)
+            self.assertEqual(status, 0, '%s: %s' % (name, stderr))
+
+    def test_documented_usages(self):
+        for code in ['from erudit_catalog.aio import validate_async',
+                     'from erudit_catalog.incremental import '
+                     'IncrementalValidator']:
+            status, stderr = run_python(code)
+            self.assertEqual(status, 0, '%s: %s' % (code, stderr))
+
+    def test_svrl_records_are_converted_to_style_errors(self):
+        status, stderr = run_python(SVRL_SCRIPT)
+        self.assertEqual(status, 0, stderr)
+
+    def test_incremental_validator_usage(self):
+        status, stderr = run_python(INCREMENTAL_SCRIPT)
+        self.assertEqual(status, 0, stderr)
+
+    def test_package_reads_no_assets_manifest(self):
+        status, stderr = run_python(
+                'import sys\n'
+                'import erudit_catalog\n'
+                'assert "erudit_catalog.assets" not in sys.modules\n')
+        self.assertEqual(status, 0, stderr)
+
+    def test_assets_build_runs_without_warnings(self):
+        process = subprocess.Popen([sys.executable, '-W', 'error',
+                '-m', 'erudit_catalog.assets', '--help'], cwd=ROOT_DIR,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, stderr = process.communicate()
+        self.assertEqual(process.returncode, 0, stderr.decode('utf-8'))
+
+    def test_plugin_is_loaded_after_the_checks(self):
+        status, stderr = run_python(
+                'from erudit_catalog import checks\n'
+                'from packtools import catalogs\n'
+                'assert catalogs.StyleCheckingPipeline is '
+                'checks.StyleCheckingPipeline\n')
+        self.assertEqual(status, 0, stderr)
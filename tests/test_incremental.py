@@ -0,0 +1,149 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import copy
+
+from erudit_catalog import corpus, incremental, validator
+
+
+def as_dicts(dtd_errors, style_errors):
+    return ([validator.error_to_dict(err) for err in dtd_errors],
+            [validator.error_to_dict(err) for err in style_errors])
+
+
+class SnapshotTests(unittest.TestCase):
+
+    def setUp(self):
+        self.et = corpus.build_article(refs=3)
+        self.old = incremental.snapshot(self.et)
+
+    def test_unchanged(self):
+        new = incremental.snapshot(copy.deepcopy(self.et))
+        self.assertEqual(incremental.diff(self.old, new), (set(), set()))
+
+    def test_text_edit(self):
+        self.et.find('.//ref/element-citation/styled-content').text = 'foo'
+        changed, affected = incremental.diff(self.old,
+                incremental.snapshot(self.et))
+        self.assertEqual(changed, set(['styled-content']))
+        self.assertEqual(affected, set(['article', 'back', 'ref-list', 'ref',
+            'element-citation', 'styled-content']))
+
+    def test_attribute_edit(self):
+        self.et.find('.//issn').set('pub-type', 'foo')
+        changed, affected = incremental.diff(self.old,
+                incremental.snapshot(self.et))
+        self.assertEqual(changed, set(['issn']))
+        self.assertIn('journal-meta', affected)
+
+    def test_insertion_edits_the_subtree_of_the_parent(self):
+        ref_list = self.et.find('.//ref-list')
+        ref_list.append(copy.deepcopy(ref_list.find('ref')))
+        changed, affected = incremental.diff(self.old,
+                incremental.snapshot(self.et))
+        self.assertTrue(set(['ref-list', 'ref', 'element-citation']) <= changed)
+        self.assertNotIn('front', affected)
+
+
+class PatternDependenciesTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.validator = incremental.IncrementalValidator()
+
+    def test_local_pattern(self):
+        dependencies = self.validator.dependencies['issn_notempty']
+        self.assertEqual(dependencies.contexts, frozenset(['issn']))
+        self.assertFalse(dependencies.is_global)
+
+    def test_key_pattern(self):
+        dependencies = self.validator.dependencies['counts_refs']
+        self.assertTrue(dependencies.is_global)
+        self.assertIn('ref', dependencies.names)
+
+    def test_param_pattern(self):
+        dependencies = self.validator.dependencies['counts_pages']
+        self.assertTrue(dependencies.is_global)
+        self.assertTrue(set(['fpage', 'lpage']) <= dependencies.names)
+
+
+class IncrementalValidatorTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.validator = incremental.IncrementalValidator()
+        cls.full_validator = validator.Validator()
+
+    def setUp(self):
+        self.et = corpus.build_article(refs=5, defects=['dangling-xref'])
+        self.result = self.validator.validate(self.et)
+
+    def assertMatchesFullValidation(self, result):
+        self.assertEqual(as_dicts(result.dtd_errors, result.style_errors),
+                as_dicts(*self.full_validator.validate(self.et)))
+        expected = as_dicts(*self.full_validator.validate(self.et))
+        self.assertEqual(result.to_dict(), {
+            'is_valid': not (expected[0] or expected[1]),
+            'dtd_errors': expected[0],
+            'style_errors': expected[1],
+        })
+
+    def test_first_validation_runs_all_patterns(self):
+        self.assertEqual(self.result.revalidated,
+                frozenset(self.validator.dependencies))
+        self.assertMatchesFullValidation(self.result)
+
+    def test_unchanged_tree_runs_no_pattern(self):
+        result = self.validator.validate(self.et, previous=self.result)
+        self.assertEqual(result.revalidated, frozenset())
+        self.assertMatchesFullValidation(result)
+
+    def test_ref_edit(self):
+        self.et.find('.//ref/element-citation/pub-id').text = 'not a doi'
+        result = self.validator.validate(self.et, previous=self.result)
+        self.assertIn('pub-id_doi_value', result.revalidated)
+        self.assertNotIn('issn_isvalid', result.revalidated)
+        self.assertNotIn('counts_refs', result.revalidated)
+        self.assertMatchesFullValidation(result)
+
+    def test_ref_insertion(self):
+        ref_list = self.et.find('.//ref-list')
+        ref_list.append(copy.deepcopy(ref_list.find('ref')))
+        result = self.validator.validate(self.et, previous=self.result)
+        self.assertIn('counts_refs', result.revalidated)
+        self.assertNotIn('issn_isvalid', result.revalidated)
+        self.assertMatchesFullValidation(result)
+
+    def test_issn_edit(self):
+        self.et.find('.//issn').text = 'foo'
+        result = self.validator.validate(self.et, previous=self.result)
+        self.assertIn('issn_isvalid', result.revalidated)
+        self.assertNotIn('pub-id_doi_value', result.revalidated)
+        self.assertMatchesFullValidation(result)
+
+    def test_counts_edit(self):
+        self.et.find('.//counts/ref-count').set('count', '99')
+        result = self.validator.validate(self.et, previous=self.result)
+        self.assertIn('counts_refs', result.revalidated)
+        self.assertMatchesFullValidation(result)
+
+    def test_fixing_an_error(self):
+        self.et.find(".//xref[@rid='B0']").set('rid', 'B1')
+        result = self.validator.validate(self.et, previous=self.result)
+        self.assertIn('xref-reftype-integrity-bibr', result.revalidated)
+        self.assertLess(len(result.style_errors), len(self.result.style_errors))
+        self.assertMatchesFullValidation(result)
+
+    def test_successive_edits(self):
+        result = self.result
+        for text in ('foo', '0317-8471', 'bar'):
+            self.et.find('.//issn').text = text
+            result = self.validator.validate(self.et, previous=result)
+            self.assertMatchesFullValidation(result)
+
+    def test_previous_of_other_profile(self):
+        other = incremental.IncrementalValidator(profile='references')
+        result = other.validate(self.et)
+        result = self.validator.validate(self.et, previous=result)
+        self.assertEqual(result.revalidated,
+                frozenset(self.validator.dependencies))
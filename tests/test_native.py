@@ -0,0 +1,238 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import io
+import re
+
+from lxml import etree
+
+from erudit_catalog import catalog, native, schematron
+
+
+SCH_NS = '{http://purl.oclc.org/dsdl/schematron}'
+
+SAMPLES = [
+    u"""<article article-type="research-article" xml:lang="en"
+                 dtd-version="1.1" specific-use="eps-0.1">
+          <front>
+            <journal-meta>
+              <journal-id journal-id-type="erudit">foo</journal-id>
+              <journal-title-group>
+                <journal-title>Foo</journal-title>
+              </journal-title-group>
+              <issn pub-type="epub">1234-5678</issn>
+              <publisher><publisher-name>Érudit</publisher-name></publisher>
+            </journal-meta>
+            <article-meta>
+              <article-id pub-id-type="doi">10.1590/foo</article-id>
+              <contrib-group content-type="author">
+                <contrib contrib-type="person">
+                  <name><surname>Doe</surname><given-names>J</given-names></name>
+                  <xref ref-type="aff" rid="aff1"/>
+                </contrib>
+              </contrib-group>
+              <aff id="aff1">
+                <institution content-type="orgname">Érudit</institution>
+              </aff>
+              <pub-date date-type="pub" publication-format="epub">
+                <day>1</day><month>1</month><year>2018</year>
+              </pub-date>
+              <pub-date date-type="collection"><year>2018</year></pub-date>
+              <fpage>10</fpage>
+              <lpage>12</lpage>
+              <permissions/>
+              <counts>
+                <fig-count count="1"/>
+                <table-count count="1"/>
+                <ref-count count="1"/>
+                <equation-count count="0"/>
+                <page-count count="3"/>
+              </counts>
+            </article-meta>
+          </front>
+          <body>
+            <sec id="s1">
+              <label>1</label>
+              <p><xref ref-type="bibr" rid="B1">1</xref></p>
+              <fig id="f1"><label>Fig 1</label><graphic/></fig>
+              <table-wrap id="t1"><label>Tab 1</label><table/></table-wrap>
+            </sec>
+          </body>
+          <back>
+            <ref-list>
+              <ref id="B1">
+                <element-citation>
+                  <styled-content>Foo</styled-content>
+                  <pub-id pub-id-type="doi">10.1590/bar</pub-id>
+                </element-citation>
+              </ref>
+            </ref-list>
+          </back>
+        </article>
+    """,
+    u"""<article article-type="foo" specific-use="sps-1.8">
+          <front>
+            <journal-meta>
+              <journal-id journal-id-type="nlm-ta"> </journal-id>
+              <issn>123-45678</issn>
+              <contrib-group content-type="author"/>
+            </journal-meta>
+            <article-meta>
+              <article-id>   </article-id>
+              <article-id pub-id-type="doi">http://dx.doi.org/10.1590/foo</article-id>
+              <contrib-group content-type="foo">
+                <contrib contrib-type="group">
+                  <contrib-id>http://orcid.org/0000</contrib-id>
+                  <aff/>
+                </contrib>
+                <aff-alternatives/>
+              </contrib-group>
+              <aff><institution>Érudit</institution></aff>
+              <pub-date date-type="pub" publication-format="print"><month>13</month><month>1</month></pub-date>
+              <volume/><volume>2</volume>
+              <history><date date-type="foo"/></history>
+              <kwd-group><nested-kwd/><compounded-kwd/></kwd-group>
+              <abstract><title>Foo</title></abstract>
+              <trans-abstract/>
+              <fpage>1</fpage>
+              <lpage>4</lpage>
+              <counts>
+                <fig-count count="0"/>
+                <table-count count="2"/>
+                <ref-count count="foo"/>
+                <equation-count count="1"/>
+                <page-count count="3"/>
+              </counts>
+            </article-meta>
+          </front>
+          <body>
+            <sec>
+              <label/><label>2</label>
+              <p>
+                <xref ref-type="bibr" rid="B2">1</xref>
+                <xref ref-type="fig"/>
+                <xref ref-type="foo" rid="f1"/>
+                <list list-type="foo"><list-item><list/></list-item></list>
+                <ext-link/><self-uri/><collab><named-content/></collab>
+              </p>
+              <fig/>
+              <table-wrap>
+                <table><tr/><thead><tr><td/></tr></thead><tbody><tr><th/></tr></tbody></table>
+              </table-wrap>
+              <table-wrap-foot><fn id="tfn1"/></table-wrap-foot>
+              <p><xref ref-type="table-fn" rid="tfn1"/><xref ref-type="fn" rid="tfn1"/></p>
+            </sec>
+          </body>
+          <back>
+            <ack><sec/></ack>
+            <fn-group><fn/></fn-group>
+            <app-group><app/></app-group>
+            <ref-list>
+              <ref id="B1">
+                <element-citation>
+                  <pub-id>  </pub-id>
+                  <pub-id pub-id-type="doi">doi:10.1590/bar</pub-id>
+                  <issue>1</issue><issue>2</issue>
+                </element-citation>
+                <element-citation/>
+              </ref>
+            </ref-list>
+          </back>
+        </article>
+    """,
+]
+
+
+def parse(sample):
+    return etree.parse(io.BytesIO(sample.encode('utf-8')))
+
+
+def svrl_messages(sch):
+    return sorted(
+            re.search(r"<svrl:text>(.*)</svrl:text>", err.message, re.DOTALL)
+                .group(1).strip()
+            for err in sch.error_log)
+
+
+class NativeValidatorTests(unittest.TestCase):
+    cache = {}
+
+    def _schematron(self, phase=None):
+        if phase not in self.cache:
+            self.cache[phase] = schematron.PrecompiledSchematron(
+                    schematron.compile_validator_xslt(
+                        catalog['SCH_SCHEMAS']['eps-0.1'], phase=phase))
+        return self.cache[phase]
+
+    def test_patterns_follow_the_schema(self):
+        sch_doc = etree.parse(catalog['SCH_SCHEMAS']['eps-0.1'])
+        pattern_ids = [pattern.attrib['id']
+                       for pattern in sch_doc.iter(SCH_NS + 'pattern')
+                       if pattern.get('abstract') != 'true']
+
+        self.assertEqual([p.id for p in native.PATTERNS], pattern_ids)
+
+    def test_valid_sample(self):
+        is_valid, errors = native.NativeValidator().validate(parse(SAMPLES[0]))
+        self.assertTrue(is_valid)
+        self.assertEqual(errors, [])
+
+    def test_messages_match_the_schematron(self):
+        sch = self._schematron()
+        for sample in SAMPLES:
+            et = parse(sample)
+            sch.validate(et)
+            messages = sorted(m for _, _, m in
+                              native.NativeValidator().iter_failures(et))
+            self.assertEqual(messages, svrl_messages(sch))
+
+    def test_messages_match_the_schematron_by_phase(self):
+        et = parse(SAMPLES[1])
+        for phase in ['phase.counts', 'phase.contrib', 'phase.xhtml-table']:
+            sch = self._schematron(phase)
+            sch.validate(et)
+            messages = sorted(m for _, _, m in
+                              native.NativeValidator(phase).iter_failures(et))
+            self.assertEqual(messages, svrl_messages(sch))
+
+    def test_failures_are_ordered_by_pattern(self):
+        pattern_order = [p.id for p in native.PATTERNS]
+        failures = list(native.NativeValidator().iter_failures(parse(SAMPLES[1])))
+        positions = [pattern_order.index(pattern_id) for pattern_id, _, _ in failures]
+
+        self.assertEqual(positions, sorted(positions))
+
+    def test_errors_point_to_source_lines(self):
+        _, errors = native.NativeValidator('phase.list').validate(parse(SAMPLES[1]))
+        list_line = [number for number, line in
+                     enumerate(SAMPLES[1].splitlines(), 1) if '<list ' in line][0]
+        self.assertEqual([e.line for e in errors], [list_line, list_line])
+        self.assertEqual(errors[0].message,
+                "Element 'list': Missing attribute list-type.")
+
+    def test_unknown_phase(self):
+        self.assertRaises(ValueError, native.NativeValidator, 'phase.foo')
+
+
+class ContextTests(unittest.TestCase):
+
+    def _matches(self, context, sample, xpath):
+        et = etree.fromstring(sample)
+        return native.Context(context).matches(et.xpath(xpath)[0])
+
+    def test_descendant_anywhere(self):
+        self.assertTrue(self._matches('//b', '<a><b/></a>', '//b'))
+
+    def test_relative_path_matches_anywhere(self):
+        self.assertTrue(self._matches('a/b', '<x><a><b/></a></x>', '//b'))
+        self.assertFalse(self._matches('a/b', '<x><b/></x>', '//b'))
+
+    def test_descendant_step(self):
+        self.assertTrue(self._matches('a//c', '<a><b><c/></b></a>', '//c'))
+        self.assertFalse(self._matches('a//c', '<x><b><c/></b></x>', '//c'))
+
+    def test_attribute_predicates(self):
+        self.assertTrue(self._matches("//b[@t='1']", '<a><b t="1"/></a>', '//b'))
+        self.assertFalse(self._matches("//b[@t='1']", '<a><b t="2"/></a>', '//b'))
+        self.assertTrue(self._matches("//b[@t]", '<a><b t=""/></a>', '//b'))
+        self.assertFalse(self._matches("//b[@t]", '<a><b/></a>', '//b'))
@@ -0,0 +1,73 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+
+from lxml import etree
+
+from erudit_catalog import corpus, prefilter, schematron, svrl, validator
+
+
+def as_tuples(records):
+    return [(r.location, r.message) for r in records]
+
+
+class RuleContextsTests(unittest.TestCase):
+
+    def test_context_names(self):
+        self.assertEqual(schematron.context_names('article/front/article-meta//aff'),
+                set(['aff']))
+        self.assertEqual(schematron.context_names(
+            "//xref[@ref-type='bibr'][@rid]/@rid | fig"), set(['xref', 'fig']))
+        self.assertEqual(schematron.context_names('/'),
+                set([schematron.WILDCARD]))
+
+    def test_required_elements(self):
+        required = prefilter.required_elements(schematron.schema_xslt('eps-0.1'))
+        self.assertEqual(required['xhtml-table'], frozenset(['table']))
+        self.assertEqual(required['fig_has_id'], frozenset(['fig']))
+        self.assertEqual(required['collab_must_have_named-content'],
+                frozenset(['collab']))
+        self.assertEqual(required['counts_refs'], frozenset(['ref-count']))
+
+
+class PrefilteredXSLTTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.xslt_doc = schematron.schema_xslt('eps-0.1')
+        cls.xslt = prefilter.PrefilteredXSLT(cls.xslt_doc)
+
+    def test_element_names(self):
+        root = etree.fromstring('<a><b/><m:c xmlns:m="urn:m"/><!-- d --></a>')
+        self.assertEqual(prefilter.element_names(root.getroottree()),
+                set(['a', 'b', '{urn:m}c']))
+
+    def test_inapplicable_patterns_are_skipped(self):
+        et = corpus.build_article(tables=0)
+        applicable = self.xslt.applicable_patterns(et)
+        self.assertNotIn('xhtml-table', applicable)
+        self.assertNotIn('list_attributes', applicable)
+        self.assertIn('fig_has_id', applicable)
+
+    def test_results_are_unchanged(self):
+        for defects in [(), ('fig-without-id', 'invalid-issn'),
+                ('dangling-xref', 'wrong-ref-count')]:
+            et = corpus.build_article(tables=0, defects=defects)
+            expected = svrl.iter_records(etree.XSLT(self.xslt_doc)(et))
+            self.assertEqual(as_tuples(svrl.iter_records(self.xslt(et))),
+                    as_tuples(expected))
+
+    def test_validators_are_cached_per_applicable_set(self):
+        xslt = prefilter.PrefilteredXSLT(self.xslt_doc)
+        xslt(corpus.build_article())
+        xslt(corpus.build_article(seed=1))
+        self.assertEqual(len(xslt._selections), 1)
+        xslt(corpus.build_article(figs=0))
+        self.assertEqual(len(xslt._selections), 2)
+
+    def test_validator(self):
+        et = corpus.build_article(figs=0, defects=['invalid-issn'])
+        _, errors = validator.Validator().validate(et)
+        _, expected = validator.Validator(prefilter=False).validate(et)
+        self.assertEqual([validator.error_to_dict(err) for err in errors],
+                [validator.error_to_dict(err) for err in expected])
@@ -0,0 +1,103 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+
+from lxml import etree
+
+from erudit_catalog import catalog, corpus, profiles, schematron, validator
+
+
+XSL_NS = '{http://www.w3.org/1999/XSL/Transform}'
+
+
+class SelectPatternsTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.xslt_doc = schematron.validator_xslt(catalog['SCH_SCHEMAS']['eps-0.1'])
+
+    def _modes(self, xslt_doc):
+        return set(t.get('mode') for t in xslt_doc.getroot().iter(XSL_NS + 'template'))
+
+    def test_keeps_the_order_of_the_schema(self):
+        selected = ['issn_notempty', 'counts_refs', 'issn_isvalid']
+        xslt_doc = schematron.select_patterns(self.xslt_doc, selected)
+        self.assertEqual(schematron.pattern_ids(xslt_doc),
+                [p for p in schematron.pattern_ids(self.xslt_doc) if p in selected])
+
+    def test_templates_of_dropped_patterns_are_removed(self):
+        xslt_doc = schematron.select_patterns(self.xslt_doc, ['counts_refs'])
+        self.assertLess(len(self._modes(xslt_doc)), len(self._modes(self.xslt_doc)))
+        # the result is still a valid stylesheet.
+        etree.XSLT(xslt_doc)
+
+    def test_unknown_patterns(self):
+        self.assertRaises(ValueError, schematron.select_patterns,
+                self.xslt_doc, ['counts_refs', 'foo'])
+
+
+class ProfilePatternsTests(unittest.TestCase):
+
+    def test_union_of_phases(self):
+        phases = schematron.schema_phases(catalog['SCH_SCHEMAS']['eps-0.1'])
+        patterns = profiles.profile_patterns('eps-0.1', 'references')
+        expected = set()
+        for phase in profiles.PROFILES['references']:
+            expected.update(phases[phase])
+        self.assertEqual(set(patterns), expected)
+
+    def test_patterns_shared_by_phases_are_listed_once(self):
+        patterns = profiles.profile_patterns('eps-0.1', 'metadata-only')
+        self.assertEqual(patterns.count('journal-id_notempty'), 1)
+
+    def test_metadata_only_skips_body_patterns(self):
+        patterns = profiles.profile_patterns('eps-0.1', 'metadata-only')
+        self.assertNotIn('xhtml-table', patterns)
+        self.assertNotIn('table-wrap_has_id', patterns)
+        self.assertIn('issn_isvalid', patterns)
+
+    def test_full_runs_all_patterns(self):
+        self.assertIsNone(profiles.profile_patterns('eps-0.1', 'full'))
+
+    def test_profiles_refer_to_known_phases(self):
+        for profile in profiles.PROFILES:
+            profiles.profile_patterns('eps-0.1', profile)
+
+    def test_unknown_profile(self):
+        self.assertRaises(ValueError, profiles.profile_patterns, 'eps-0.1', 'foo')
+
+    def test_unknown_phase(self):
+        self.assertRaises(ValueError, profiles.phases_patterns,
+                catalog['SCH_SCHEMAS']['eps-0.1'], ['phase.foo'])
+
+
+class ProfileSchematronTests(unittest.TestCase):
+
+    def test_metadata_only(self):
+        sch = profiles.ProfileSchematron('eps-0.1', 'metadata-only')
+        self.assertTrue(sch.validate(corpus.build_article(
+            defects=['table-wrap-without-id', 'fig-without-id'])))
+        self.assertFalse(sch.validate(corpus.build_article(
+            defects=['invalid-issn'])))
+
+    def test_full(self):
+        sch = profiles.ProfileSchematron('eps-0.1', 'full')
+        self.assertFalse(sch.validate(corpus.build_article(
+            defects=['table-wrap-without-id'])))
+
+
+class ValidatorProfileTests(unittest.TestCase):
+
+    def test_profile(self):
+        data = corpus.tostring(corpus.build_article(
+            defects=['table-wrap-without-id']),
+            public_id=catalog['ALLOWED_PUBLIC_IDS'][0])
+        et = etree.fromstring(data, validator.XMLPARSER).getroottree()
+        _, errors = validator.Validator(profile='metadata-only').validate(et)
+        self.assertEqual(errors, [])
+        _, errors = validator.Validator().validate(et)
+        self.assertNotEqual(errors, [])
+
+    def test_phase_and_profile_are_exclusive(self):
+        self.assertRaises(ValueError, validator.Validator,
+                phase='phase.issn', profile='references')
@@ -0,0 +1,76 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import shutil
+import tempfile
+
+from lxml import etree
+
+from erudit_catalog import catalog, corpus, profiling, schematron
+
+
+SCH_NS = '{http://purl.oclc.org/dsdl/schematron}'
+
+
+class PatternXSLTTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.xslt_doc = schematron.compile_validator_xslt(
+                catalog['SCH_SCHEMAS']['eps-0.1'])
+
+    def test_pattern_ids_follow_the_schema(self):
+        sch_doc = etree.parse(catalog['SCH_SCHEMAS']['eps-0.1'])
+        expected = [pattern.attrib['id']
+                    for pattern in sch_doc.iter(SCH_NS + 'pattern')
+                    if pattern.get('abstract') != 'true']
+        self.assertEqual(schematron.pattern_ids(self.xslt_doc), expected)
+
+    def test_single_pattern(self):
+        xslt_doc = profiling.pattern_xslt(self.xslt_doc, 'counts_refs')
+        self.assertEqual(schematron.pattern_ids(xslt_doc), ['counts_refs'])
+        # the original document is left untouched.
+        self.assertEqual(len(schematron.pattern_ids(self.xslt_doc)), 119)
+
+    def test_single_pattern_reports_its_failures_only(self):
+        et = corpus.build_article(defects=['wrong-ref-count', 'invalid-issn'])
+        xslt_doc = profiling.pattern_xslt(self.xslt_doc, 'counts_refs')
+        sch = schematron.PrecompiledSchematron(xslt_doc)
+
+        self.assertFalse(sch.validate(et))
+        self.assertEqual(len(sch.error_log), 1)
+        self.assertIn('ref-count', sch.error_log[0].message)
+
+    def test_no_pattern(self):
+        xslt_doc = profiling.pattern_xslt(self.xslt_doc)
+        self.assertEqual(schematron.pattern_ids(xslt_doc), [])
+
+    def test_unknown_pattern(self):
+        self.assertRaises(ValueError, profiling.pattern_xslt, self.xslt_doc,
+                'foo')
+
+
+class PatternProfilerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_profile(self):
+        profiler = profiling.PatternProfiler(phase='phase.rid_integrity_all',
+                cache_dir=self.cache_dir)
+        et = corpus.build_article(refs=10, xrefs=30, defects=['dangling-xref'])
+        result = profiler.profile(et)
+
+        self.assertEqual([p['pattern'] for p in result['patterns']],
+                profiler.pattern_ids)
+        bibr = [p for p in result['patterns']
+                if p['pattern'] == 'xref-reftype-integrity-bibr'][0]
+        self.assertEqual(bibr['fired_rules'], 30)
+        self.assertEqual(bibr['failed_asserts'], 1)
+        self.assertTrue(all(p['seconds'] >= 0 for p in result['patterns']))
+
+    def test_unknown_schema(self):
+        self.assertRaises(ValueError, profiling.PatternProfiler, 'foo')
@@ -0,0 +1,104 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import shutil
+import tempfile
+import os
+import io
+import json
+import contextlib
+
+from erudit_catalog import corpus, render
+
+
+class RenderFilesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.tmpdir, 'in')
+        self.output_dir = os.path.join(self.tmpdir, 'out')
+        os.makedirs(self.input_dir)
+        for i in range(3):
+            corpus.build_article(refs=2, seed=i).write(
+                    os.path.join(self.input_dir, 'article%s.xml' % i))
+        with open(os.path.join(self.input_dir, 'broken.xml'), 'w') as f:
+            f.write('<article>')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _main(self, *args):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            status = render.main(['-o', self.output_dir] + list(args))
+        return status, [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_results_are_json_lines(self):
+        status, results = self._main('-j', '1', self.input_dir)
+
+        self.assertEqual(status, 1)
+        self.assertEqual([os.path.basename(r['filename']) for r in results],
+                ['article0.xml', 'article1.xml', 'article2.xml', 'broken.xml'])
+        self.assertIn('error', results[3])
+        self.assertEqual(results[0]['outputs'],
+                [os.path.join(self.output_dir, 'article0', 'fr.html')])
+        self.assertTrue(os.path.isfile(results[0]['outputs'][0]))
+
+    def test_process_pool_gives_the_same_results(self):
+        _, expected = self._main('-j', '1', self.input_dir)
+        _, results = self._main('-j', '2', self.input_dir)
+        self.assertEqual(results, expected)
+
+    def test_assets_are_written_once_per_output_tree(self):
+        links = render.write_assets(self.output_dir)
+        self.assertEqual(links['css'], 'static/article-standalone.css')
+        self.assertTrue(os.path.isfile(os.path.join(self.output_dir,
+            'static', 'bundle-print.css')))
+
+        results = list(render.render_files([os.path.join(self.input_dir,
+            'article0.xml')], self.output_dir, max_workers=1))
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                ['article0', 'static'])
+        self.assertNotIn('error', results[0])
+
+    def test_packages_are_kept_apart(self):
+        filenames = []
+        for package in ('p1', 'p2'):
+            os.makedirs(os.path.join(self.input_dir, package))
+            filename = os.path.join(self.input_dir, package, 'document.xml')
+            shutil.copy(os.path.join(self.input_dir, 'article0.xml'), filename)
+            filenames.append(filename)
+
+        results = list(render.render_files(filenames, self.output_dir,
+            max_workers=1))
+        self.assertEqual([r['outputs'] for r in results], [
+            [os.path.join(self.output_dir, 'p1', 'document', 'fr.html')],
+            [os.path.join(self.output_dir, 'p2', 'document', 'fr.html')],
+        ])
+
+    def test_outputs_are_not_overwritten(self):
+        filename = os.path.join(self.input_dir, 'article0.xml')
+        for max_workers in (1, 2):
+            results = list(render.render_files([filename, filename],
+                self.output_dir, max_workers=max_workers))
+            self.assertNotIn('error', results[0])
+            self.assertIn('would overwrite', results[1]['error'])
+
+    def test_links_are_relative_to_the_pages(self):
+        generator_class = render.domain.HTMLGenerator
+        original = generator_class.__dict__['parse']
+        captured = {}
+
+        def spy(cls, et, **kwargs):
+            captured.update(kwargs)
+            return original.__func__(cls, et, **kwargs)
+
+        generator_class.parse = classmethod(spy)
+        try:
+            render.render_file(os.path.join(self.input_dir, 'article0.xml'),
+                    self.output_dir, links={'css': 'static/a.css'},
+                    name=os.path.join('p1', 'document'))
+        finally:
+            generator_class.parse = original
+
+        self.assertEqual(captured['css'], '../../static/a.css')
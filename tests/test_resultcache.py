@@ -0,0 +1,155 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import shutil
+import tempfile
+import os
+import threading
+
+from erudit_catalog import resultcache, validator
+
+
+TEXTURE_SAMPLE = os.path.join(os.path.dirname(__file__),
+        'samples/texture/original_refs/document.xml')
+
+
+class ResultKeyTests(unittest.TestCase):
+
+    def test_key_depends_on_contents(self):
+        self.assertEqual(resultcache.result_key(b'<a/>', 'eps-0.1'),
+                         resultcache.result_key(b'<a/>', 'eps-0.1'))
+        self.assertNotEqual(resultcache.result_key(b'<a/>', 'eps-0.1'),
+                            resultcache.result_key(b'<a />', 'eps-0.1'))
+
+    def test_key_depends_on_rules(self):
+        key = resultcache.result_key(b'<a/>', 'eps-0.1')
+        original = resultcache._FINGERPRINTS.copy()
+        resultcache._FINGERPRINTS['eps-0.1'] = 'changed'
+        try:
+            self.assertNotEqual(key, resultcache.result_key(b'<a/>', 'eps-0.1'))
+        finally:
+            resultcache._FINGERPRINTS.clear()
+            resultcache._FINGERPRINTS.update(original)
+
+    def test_key_depends_on_library_versions(self):
+        original = resultcache._FINGERPRINTS.copy()
+        original_versions = resultcache.LIBRARY_VERSIONS
+        try:
+            resultcache._FINGERPRINTS.clear()
+            key = resultcache.result_key(b'<a/>', 'eps-0.1')
+
+            resultcache._FINGERPRINTS.clear()
+            resultcache.LIBRARY_VERSIONS = original_versions + (('lxml', 'x'),)
+            self.assertNotEqual(key, resultcache.result_key(b'<a/>', 'eps-0.1'))
+        finally:
+            resultcache.LIBRARY_VERSIONS = original_versions
+            resultcache._FINGERPRINTS.clear()
+            resultcache._FINGERPRINTS.update(original)
+
+    def test_rules_include_the_validation_modules(self):
+        names = [os.path.basename(path) for path in resultcache.SOURCE_PATHS]
+        for name in ('__init__.py', 'checks.py', 'errors.py', 'prefilter.py',
+                'profiles.py', 'svrl.py', 'validator.py', 'iso3166-codes.json'):
+            self.assertIn(name, names)
+        for path in resultcache.SOURCE_PATHS:
+            self.assertTrue(os.path.isfile(path), path)
+
+    def test_unknown_schema(self):
+        self.assertRaises(ValueError, resultcache.result_key, b'<a/>', 'foo')
+
+
+class ResultCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'results.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_results_are_stored(self):
+        cache = resultcache.ResultCache(self.path)
+        cache.put('foo', {'is_valid': True, 'style_errors': []})
+
+        self.assertIn('foo', cache)
+        self.assertEqual(resultcache.ResultCache(self.path).get('foo'),
+                {'is_valid': True, 'style_errors': []})
+
+    def test_missing_results(self):
+        cache = resultcache.ResultCache(self.path)
+        self.assertIsNone(cache.get('foo'))
+        self.assertEqual(cache.get('foo', 'bar'), 'bar')
+
+    def test_least_recently_used_results_are_evicted(self):
+        cache = resultcache.ResultCache(self.path, max_bytes=80)
+        cache.put('a', 'x' * 30)
+        cache.put('b', 'x' * 30)
+        cache.get('a')
+        cache.put('c', 'x' * 30)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertTrue(cache.size() <= 80)
+
+    def test_size_is_kept_up_to_date(self):
+        cache = resultcache.ResultCache(self.path)
+        cache.put('a', 'x' * 30)
+        cache.put('b', 'x' * 10)
+        cache.put('a', 'x' * 20)
+        self.assertEqual(cache.size(), 22 + 12)
+        self.assertEqual(resultcache.ResultCache(self.path).size(), 22 + 12)
+
+        cache.clear()
+        self.assertEqual(cache.size(), 0)
+
+    def test_oversized_results_are_not_stored(self):
+        cache = resultcache.ResultCache(self.path, max_bytes=10)
+        cache.put('a', 'x' * 30)
+        self.assertEqual(len(cache), 0)
+
+    def test_concurrent_writes(self):
+        cache = resultcache.ResultCache(self.path)
+        def write(i):
+            for j in range(20):
+                cache.put('%s-%s' % (i, j), j)
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(cache), 80)
+
+
+class CachedValidatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = resultcache.ResultCache(
+                os.path.join(self.tmpdir, 'results.sqlite'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_unchanged_articles_are_not_parsed(self):
+        expected = validator.Validator(cache=self.cache).validate_file(
+                TEXTURE_SAMPLE)
+
+        cached_validator = validator.Validator(cache=self.cache)
+        def fail(data):
+            self.fail('the result should have been loaded from cache')
+        cached_validator._validate_bytes = fail
+
+        self.assertEqual(cached_validator.validate_file(TEXTURE_SAMPLE), expected)
+
+    def test_results_are_reported_for_each_filename(self):
+        copy = os.path.join(self.tmpdir, 'copy.xml')
+        shutil.copy(TEXTURE_SAMPLE, copy)
+
+        v = validator.Validator(cache=self.cache)
+        v.validate_file(TEXTURE_SAMPLE)
+        self.assertEqual(v.validate_file(copy)['filename'], copy)
+        self.assertEqual(len(self.cache), 1)
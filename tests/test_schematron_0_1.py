@@ -4183,6 +4183,132 @@ class XrefRidTests(PhaseBasedTestCase):
 
         self.assertFalse(self._run_validation(sample))
 
+    def test_other_reftypes_are_not_checked(self):
+        sample = u"""<article>
+                      <body>
+                        <sec>
+                          <p><xref ref-type="bibr" rid="B2">1</xref></p>
+                        </sec>
+                      </body>
+                    </article>
+                 """
+        sample = io.BytesIO(sample.encode('utf-8'))
+
+        self.assertTrue(self._run_validation(sample))
+
+
+class XrefRidAllTests(PhaseBasedTestCase):
+    """Tests for //xref[@rid] of all the reference types.
+    """
+    sch_phase = 'phase.rid_integrity_all'
+
+    def test_mismatching_aff_rid(self):
+        sample = u"""<article>
+                      <front>
+                        <article-meta>
+                          <contrib-group>
+                            <contrib>
+                              <xref ref-type="aff" rid="aff1">
+                                <sup>I</sup>
+                              </xref>
+                            </contrib>
+                          </contrib-group>
+                        </article-meta>
+                      </front>
+                    </article>
+                 """
+        sample = io.BytesIO(sample.encode('utf-8'))
+
+        self.assertFalse(self._run_validation(sample))
+
+    def test_matching_bibr_rid(self):
+        for ref in ['<ref id="B1"/>',
+                    '<ref><element-citation id="B1"/></ref>',
+                    '<ref><mixed-citation id="B1"/></ref>']:
+            sample = u"""<article>
+                          <body>
+                            <sec>
+                              <p><xref ref-type="bibr" rid="B1">1</xref></p>
+                            </sec>
+                          </body>
+                          <back>
+                            <ref-list>
+                              %s
+                            </ref-list>
+                          </back>
+                        </article>
+                     """ % ref
+            sample = io.BytesIO(sample.encode('utf-8'))
+
+            self.assertTrue(self._run_validation(sample))
+
+    def test_mismatching_bibr_rid(self):
+        sample = u"""<article>
+                      <body>
+                        <sec>
+                          <p><xref ref-type="bibr" rid="B2">1</xref></p>
+                        </sec>
+                      </body>
+                      <back>
+                        <ref-list>
+                          <ref id="B1"/>
+                        </ref-list>
+                      </back>
+                    </article>
+                 """
+        sample = io.BytesIO(sample.encode('utf-8'))
+
+        self.assertFalse(self._run_validation(sample))
+
+    def test_missing_rid(self):
+        sample = u"""<article>
+                      <body>
+                        <sec id="s1">
+                          <p><xref ref-type="sec">1</xref></p>
+                        </sec>
+                      </body>
+                    </article>
+                 """
+        sample = io.BytesIO(sample.encode('utf-8'))
+
+        self.assertFalse(self._run_validation(sample))
+
+    def test_table_fn_rid_must_point_to_table_wrap_foot(self):
+        sample = u"""<article>
+                      <body>
+                        <sec>
+                          <table-wrap id="t01">
+                            <table-wrap-foot>
+                              <fn id="tfn1"/>
+                            </table-wrap-foot>
+                          </table-wrap>
+                          <p><xref ref-type="table-fn" rid="tfn1">a</xref></p>
+                        </sec>
+                      </body>
+                    </article>
+                 """
+        sample = io.BytesIO(sample.encode('utf-8'))
+
+        self.assertTrue(self._run_validation(sample))
+
+    def test_table_fn_rid_pointing_to_other_fn(self):
+        sample = u"""<article>
+                      <body>
+                        <sec>
+                          <p><xref ref-type="table-fn" rid="fn1">a</xref></p>
+                        </sec>
+                      </body>
+                      <back>
+                        <fn-group>
+                          <fn id="fn1"/>
+                        </fn-group>
+                      </back>
+                    </article>
+                 """
+        sample = io.BytesIO(sample.encode('utf-8'))
+
+        self.assertFalse(self._run_validation(sample))
+
 
 class XrefRefTypeTests(PhaseBasedTestCase):
     """Tests for //xref[@ref-type]
@@ -0,0 +1,142 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import shutil
+import tempfile
+import os
+import io
+import threading
+
+from lxml import etree
+
+from erudit_catalog import catalog, schematron
+
+
+SAMPLE = b"""<article>
+              <body>
+                <sec>
+                  <p>
+                    <list list-type="invalid">
+                      <list-item><p>Lorem ipsum.</p></list-item>
+                    </list>
+                  </p>
+                </sec>
+              </body>
+            </article>
+         """
+
+
+class CompiledSchematronTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def _cached_files(self):
+        return [f for f in os.listdir(self.cache_dir) if f.endswith('.xsl')]
+
+    def test_compilation_populates_the_cache(self):
+        schematron.CompiledSchematron('eps-0.1', phase='phase.list',
+                cache_dir=self.cache_dir)
+        self.assertEqual(len(self._cached_files()), 1)
+
+    def test_cached_validator_is_reused(self):
+        schematron.CompiledSchematron('eps-0.1', phase='phase.list',
+                cache_dir=self.cache_dir)
+
+        original = schematron.compile_validator_xslt
+        def fail(*args, **kwargs):
+            self.fail('the validator should have been loaded from cache')
+        schematron.compile_validator_xslt = fail
+        try:
+            sch = schematron.CompiledSchematron('eps-0.1', phase='phase.list',
+                    cache_dir=self.cache_dir)
+        finally:
+            schematron.compile_validator_xslt = original
+
+        self.assertFalse(sch.validate(etree.parse(io.BytesIO(SAMPLE))))
+        self.assertEqual(len(sch.error_log), 1)
+
+    def test_phases_are_cached_independently(self):
+        schematron.CompiledSchematron('eps-0.1', phase='phase.list',
+                cache_dir=self.cache_dir)
+        schematron.CompiledSchematron('eps-0.1', phase='phase.fig',
+                cache_dir=self.cache_dir)
+        self.assertEqual(len(self._cached_files()), 2)
+
+    def test_corrupted_cache_is_rebuilt(self):
+        schematron.CompiledSchematron('eps-0.1', phase='phase.list',
+                cache_dir=self.cache_dir)
+        cached_path = os.path.join(self.cache_dir, self._cached_files()[0])
+        with open(cached_path, 'wb') as f:
+            f.write(b'<xsl:stylesheet')
+
+        sch = schematron.CompiledSchematron('eps-0.1', phase='phase.list',
+                cache_dir=self.cache_dir)
+        self.assertFalse(sch.validate(etree.parse(io.BytesIO(SAMPLE))))
+
+    def test_cache_key_depends_on_schema_contents(self):
+        schema_path = os.path.join(self.cache_dir, 'schema.sch')
+        shutil.copy(catalog['SCH_SCHEMAS']['eps-0.1'], schema_path)
+        key = schematron.cache_key(schema_path)
+
+        with open(schema_path, 'ab') as f:
+            f.write(b'\n')
+
+        self.assertNotEqual(key, schematron.cache_key(schema_path))
+
+    def test_unknown_schema(self):
+        self.assertRaises(ValueError, schematron.CompiledSchematron, 'foo')
+
+
+class PhaseRegistryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.registry = schematron.PhaseRegistry('eps-0.1', maxsize=2,
+                cache_dir=self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_phases_are_memoized(self):
+        first = self.registry.get('phase.list')
+        self.assertIs(first, self.registry.get('phase.list'))
+
+    def test_least_recently_used_phase_is_evicted(self):
+        self.registry.get('phase.list')
+        self.registry.get('phase.fig')
+        self.registry.get('phase.list')
+        self.registry.get('phase.issn')
+
+        self.assertEqual(len(self.registry), 2)
+        self.assertIn('phase.list', self.registry)
+        self.assertIn('phase.issn', self.registry)
+        self.assertNotIn('phase.fig', self.registry)
+
+    def test_compiled_phase_validates(self):
+        sch = self.registry.get('phase.list')
+        self.assertFalse(sch.validate(etree.parse(io.BytesIO(SAMPLE))))
+
+    def test_unknown_phase(self):
+        self.assertRaises(ValueError, self.registry.get, 'phase.foo')
+
+    def test_concurrent_lookups_share_the_compiled_phase(self):
+        results = []
+        def lookup():
+            results.append(self.registry.get('phase.counts'))
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(id(r) for r in results)), 1)
+
+    def test_schema_phases(self):
+        phases = schematron.schema_phases(catalog['SCH_SCHEMAS']['eps-0.1'])
+        self.assertEqual(phases['phase.list'],
+                ['list_attributes', 'list_list-type-values'])
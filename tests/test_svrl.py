@@ -0,0 +1,92 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+import io
+
+from lxml import etree
+
+from erudit_catalog import corpus, errors, schematron, svrl
+
+
+REPORT = """<svrl:schematron-output xmlns:svrl="http://purl.oclc.org/dsdl/svrl">
+  <svrl:active-pattern id="fig_has_id"/>
+  <svrl:fired-rule context="fig"/>
+  <svrl:failed-assert test="@id" location="/article/fig[1]"><svrl:text>Missing id.</svrl:text></svrl:failed-assert>
+  <svrl:failed-assert test="@id" location="/article/fig[2]"><svrl:text>Missing id.</svrl:text></svrl:failed-assert>
+  <svrl:failed-assert test="@id" location="/article/fig[1]"><svrl:text>
+    Missing id.
+  </svrl:text></svrl:failed-assert>
+  <svrl:successful-report test="label" location="/article/fig[2]"><svrl:text>Has label.</svrl:text></svrl:successful-report>
+</svrl:schematron-output>
+"""
+
+
+def as_tuples(records):
+    return [(r.location, r.message) for r in records]
+
+
+class IterRecordsTests(unittest.TestCase):
+
+    def test_tree(self):
+        records = list(svrl.iter_records(etree.fromstring(REPORT), label='foo'))
+        self.assertEqual(as_tuples(records), [
+            ('/article/fig[1]', 'Missing id.'),
+            ('/article/fig[2]', 'Missing id.'),
+            ('/article/fig[2]', 'Has label.'),
+        ])
+        self.assertTrue(all(isinstance(r, errors.SchematronRecord) for r in records))
+        self.assertEqual(set(r.label for r in records), set(['foo']))
+
+    def test_file_is_parsed_incrementally(self):
+        source = io.BytesIO(REPORT.encode('utf-8'))
+        self.assertEqual(as_tuples(svrl.iter_records(source)),
+                as_tuples(svrl.iter_records(etree.fromstring(REPORT))))
+
+    def test_without_dedup(self):
+        records = list(svrl.iter_records(etree.fromstring(REPORT), dedup=False))
+        self.assertEqual(len(records), 4)
+
+    def test_max_errors(self):
+        records = list(svrl.iter_records(etree.fromstring(REPORT), max_errors=2))
+        self.assertEqual(len(records), 2)
+
+    def test_tree_is_consumed(self):
+        root = etree.fromstring(REPORT)
+        list(svrl.iter_records(root))
+        self.assertEqual(len(root), 0)
+
+    def test_records_match_isoschematron(self):
+        et = corpus.build_article(defects=['dangling-xref', 'fig-without-id',
+            'invalid-issn'])
+        xslt_doc = schematron.schema_xslt('eps-0.1')
+        sch = schematron.PrecompiledSchematron(xslt_doc)
+        sch.validate(et)
+        expected = [errors.SchematronRecord(entry.message) for entry in sch.error_log]
+
+        report = etree.XSLT(xslt_doc)(et)
+        self.assertEqual(as_tuples(svrl.iter_records(report)), as_tuples(expected))
+
+    def test_pattern_records(self):
+        patterns = list(svrl.iter_pattern_records(etree.fromstring(REPORT)))
+        self.assertEqual([pattern_id for pattern_id, _ in patterns], ['fig_has_id'])
+        self.assertEqual(as_tuples(patterns[0][1]),
+                as_tuples(svrl.iter_records(etree.fromstring(REPORT))))
+
+    def test_pattern_records_without_failures(self):
+        et = corpus.build_article()
+        xslt_doc = schematron.select_patterns(schematron.schema_xslt('eps-0.1'),
+                ['fig_has_id', 'issn_isvalid'])
+        report = etree.XSLT(xslt_doc)(et)
+        self.assertEqual(list(svrl.iter_pattern_records(report)),
+                [('fig_has_id', []), ('issn_isvalid', [])])
+
+    def test_pathological_input(self):
+        et = corpus.build_article(refs=0, xrefs=0)
+        body = et.getroot().find('body')
+        p = etree.SubElement(body, 'p')
+        for i in range(2000):
+            etree.SubElement(p, 'xref', {'ref-type': 'foo', 'rid': 'x'})
+
+        report = etree.XSLT(schematron.schema_xslt('eps-0.1'))(et)
+        records = list(svrl.iter_records(report, max_errors=100))
+        self.assertEqual(len(records), 100)
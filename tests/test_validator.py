@@ -0,0 +1,149 @@
+# coding: utf-8
+from __future__ import unicode_literals
+import unittest
+
+from lxml import etree
+
+from packtools.style_errors import SchematronStyleError
+from erudit_catalog import catalog, checks, corpus, schematron, validator
+
+
+def parse(et, public_id=catalog['ALLOWED_PUBLIC_IDS'][0]):
+    data = corpus.tostring(et, public_id=public_id)
+    return etree.fromstring(data, validator.XMLPARSER).getroottree()
+
+
+class ReorderPatternsTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.xslt_doc = schematron.schema_xslt('eps-0.1')
+
+    def test_listed_patterns_run_first(self):
+        xslt_doc = schematron.reorder_patterns(self.xslt_doc,
+                ['counts_refs'])
+        original = schematron.pattern_ids(self.xslt_doc)
+        reordered = schematron.pattern_ids(xslt_doc)
+        self.assertEqual(reordered[0], 'counts_refs')
+        self.assertEqual(reordered[1:],
+                [p for p in original if p != 'counts_refs'])
+        etree.XSLT(xslt_doc)
+
+    def test_fail_fast_order(self):
+        order = validator.fail_fast_order(schematron.pattern_ids(self.xslt_doc))
+        self.assertEqual(order[:3], list(validator.FAIL_FAST_FIRST[:3]))
+        self.assertTrue(order[-1].startswith(validator.FAIL_FAST_LAST))
+        self.assertEqual(sorted(order),
+                sorted(schematron.pattern_ids(self.xslt_doc)))
+
+
+class FailFastSchematronTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.xslt_doc = schematron.schema_xslt('eps-0.1')
+        cls.full = schematron.PrecompiledSchematron(cls.xslt_doc)
+
+    def test_valid_document(self):
+        sch = schematron.FailFastSchematron(self.xslt_doc)
+        self.assertTrue(sch.validate(corpus.build_article()))
+        self.assertEqual(sch.error_log, [])
+
+    def test_reports_the_first_failure_only(self):
+        et = corpus.build_article(defects=['invalid-issn', 'wrong-ref-count'])
+        sch = schematron.FailFastSchematron(self.xslt_doc, order=['counts_refs'])
+        self.assertFalse(sch.validate(et))
+        self.assertEqual(len(sch.error_log), 1)
+        self.assertEqual(SchematronStyleError(sch.error_log[0]).message,
+                "Element 'ref-count': Wrong value in ref-count.")
+
+    def test_order_decides_the_failure(self):
+        et = corpus.build_article(defects=['invalid-issn', 'wrong-ref-count'])
+        sch = schematron.FailFastSchematron(self.xslt_doc, order=['issn_isvalid'])
+        sch.validate(et)
+        self.assertIn("Element 'issn'",
+                SchematronStyleError(sch.error_log[0]).message)
+
+    def test_failures_match_the_full_validation(self):
+        et = corpus.build_article(defects=['invalid-contrib-type'])
+        self.full.validate(et)
+        expected = etree.fromstring(self.full.error_log[0].message)
+
+        sch = schematron.FailFastSchematron(self.xslt_doc)
+        sch.validate(et)
+        failure = etree.fromstring(sch.error_log[0].message)
+
+        self.assertEqual(failure.attrib, expected.attrib)
+        self.assertEqual(failure[0].text, expected[0].text)
+
+    def test_error_log_is_reset(self):
+        sch = schematron.FailFastSchematron(self.xslt_doc)
+        sch.validate(corpus.build_article(defects=['invalid-issn']))
+        sch.validate(corpus.build_article())
+        self.assertEqual(sch.error_log, [])
+
+
+class FirstStyleErrorTests(unittest.TestCase):
+
+    def test_missing_doctype(self):
+        err = checks.first_style_error(corpus.build_article())
+        self.assertEqual(err.message, 'Missing DOCTYPE declaration.')
+
+    def test_valid(self):
+        self.assertIsNone(checks.first_style_error(parse(corpus.build_article())))
+
+    def test_country_code(self):
+        et = parse(corpus.build_article())
+        et.getroot().find('.//aff').set('country', 'XX')
+        self.assertIn('Invalid country code',
+                checks.first_style_error(et).message)
+
+    def test_country_code_of_the_root_as_in_the_pipeline(self):
+        et = parse(corpus.build_article())
+        et.getroot().set('country', 'XX')
+        errors = next(checks.StyleCheckingPipeline().run(et, rewrap=True))
+        self.assertEqual([err.message for err in errors],
+                [checks.first_style_error(et).message])
+
+
+class FailFastValidatorTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.validator = validator.Validator(fail_fast=True)
+
+    def test_valid(self):
+        self.assertEqual(self.validator.validate(parse(corpus.build_article())),
+                ([], []))
+
+    def test_single_error(self):
+        et = parse(corpus.build_article(
+            defects=['invalid-issn', 'wrong-ref-count', 'invalid-month']))
+        dtd_errors, style_errors = self.validator.validate(et)
+        self.assertEqual(dtd_errors, [])
+        self.assertEqual(len(style_errors), 1)
+        self.assertIn("Element 'issn'", style_errors[0].message)
+        self.assertEqual(style_errors[0].label, '@eps-0.1')
+
+    def test_doctype_is_checked_first(self):
+        et = corpus.build_article(defects=['invalid-issn'])
+        _, style_errors = self.validator.validate(et)
+        self.assertEqual([e.message for e in style_errors],
+                ['Missing DOCTYPE declaration.'])
+
+    def test_validity_matches_the_full_validation(self):
+        full = validator.Validator()
+        for name, defects, data in corpus.generate(12, invalid_ratio=0.5,
+                refs=5):
+            expected = full.validate_bytes(data)['is_valid']
+            self.assertEqual(self.validator.validate_bytes(data)['is_valid'],
+                    expected, name)
+
+
+class XMLParserTests(unittest.TestCase):
+
+    def test_external_entities_are_not_resolved(self):
+        data = ('<!DOCTYPE article [<!ENTITY xxe SYSTEM "file://%s">]>'
+                '<article><p>&xxe;</p></article>' % __file__).encode('utf-8')
+        et = etree.fromstring(data, validator.XMLPARSER)
+        self.assertNotIn('XMLParserTests', etree.tostring(et).decode('utf-8'))